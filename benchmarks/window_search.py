@@ -0,0 +1,51 @@
+# Compare the window search of the scheduler before and after the switch to a
+# cumulative-sum search, for growing horizons and window lengths.
+# Run from the repository root with `python -m benchmarks.window_search`.
+
+from timeit import timeit
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view as swv
+from scheduling.engine.availability import find_windows
+
+
+def sliding_window_search(is_free_array: np.ndarray, num_timeslots: int) -> list:
+    """
+    The previous search: a 2d sliding window reduced in a Python loop.
+    """
+
+    free_timeslots = swv(is_free_array, (is_free_array.shape[0], num_timeslots))
+    free_timeslots = [check.all() for check in free_timeslots[0]]
+    free_timeslots += [False for _ in range(num_timeslots - 1)]
+
+    return free_timeslots
+
+
+def main(num_assignees: int = 5, repeat: int = 5):
+    rng = np.random.default_rng(0)
+
+    print(f"{'slots':>8} {'window':>7} {'sliding [ms]':>13} {'cumsum [ms]':>12}")
+
+    for num_slots in [36, 288, 2_880, 28_800]:
+        is_free_array = rng.random((num_assignees, num_slots)) < 0.97
+
+        for num_timeslots in [2, 8, 32]:
+            old = sliding_window_search(is_free_array, num_timeslots)
+            new = find_windows(is_free_array, num_timeslots)
+            assert list(np.flatnonzero(old)) == list(new)
+
+            t_old = timeit(
+                lambda: sliding_window_search(is_free_array, num_timeslots),
+                number=repeat,
+            )
+            t_new = timeit(
+                lambda: find_windows(is_free_array, num_timeslots), number=repeat
+            )
+
+            print(
+                f"{num_slots:>8} {num_timeslots:>7} "
+                f"{1000 * t_old / repeat:>13.3f} {1000 * t_new / repeat:>12.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,194 +1,245 @@
 # Every Tueday at noon, calculate the schedule for the next week and update the
 # GitHub project accordingly.
 
-from biocypher import BioCypher
 from scheduling.adapters.adapter import (
     GitHubAdapter,
     GitHubAdapterNodeType,
     GitHubAdapterEdgeType,
     GitHubAdapterIssueField,
 )
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import argparse
+import os
 import pandas as pd
-import numpy as np
-from numpy.lib.stride_tricks import sliding_window_view as swv
+from scheduling import reporting
+from scheduling.plan import ApplyJournal, Plan, apply_plan, keep_plan, read_plan
+from scheduling.tables import load_tables
+from scheduling.calendars import horizon_dates, load_availability
+from scheduling.engine import (
+    BranchAndBound,
+    Club,
+    MultiStart,
+    Person,
+    Problem,
+    RandomGreedy,
+    Saturation,
+    TimeslotCalendar,
+    solve,
+)
 
 pd.set_option("display.max_columns", None)
 
+# persons attending every club
+MANDATORY_ATTENDEES = ("saezrodriguez",)
 
-def main():
-    bc = BioCypher()
+# busy times of individual persons, one calendar file per GitHub login
+AVAILABILITY_DIR = "config/availability"
 
-    node_types = [
-        GitHubAdapterNodeType.ISSUE,
-    ]
+# time zone of the timeslots, to which UTC calendar times are converted
+TIMEZONE = "Europe/Berlin"
 
-    node_fields = [
-        GitHubAdapterIssueField.NUMBER,
-        GitHubAdapterIssueField.TITLE,
-        GitHubAdapterIssueField.BODY,
-    ]
+# no meeting may run into the lunch break
+LUNCH_START = "12:00"
 
-    edge_types = [
-        GitHubAdapterEdgeType.PART_OF,
+
+def build_problem(dfs: dict, timeslots: list, busy: dict) -> Problem:
+    """
+    Translate the BioCypher tables into a scheduling problem.
+
+    Clubs with status "To be scheduled" or "Scheduled" are scheduled anew;
+    clubs skipped last week ("Unscheduled") are placed first. The attendees
+    of each club are taken from the `attends` edges, the timeslots are the
+    options of the board's Timeslot field ("HH:MM" or "<day> HH:MM"), and
+    `busy` maps persons to the offsets of the timeslots they are not free in.
+    """
+
+    attendance = {}
+    if "attends" in dfs:
+        for person_id, club_id in zip(
+            dfs["attends"]["source_id"], dfs["attends"]["target_id"]
+        ):
+            attendance.setdefault(club_id, []).append(person_id)
+
+    all_clubs = dfs["club"]
+    rows = all_clubs[
+        all_clubs["status"].isin(["To be scheduled", "Scheduled", "Unscheduled"])
     ]
 
-    adapter = GitHubAdapter(
-        node_types=node_types,
-        node_fields=node_fields,
-        edge_types=edge_types,
+    clubs = tuple(
+        Club(
+            id=row["id"],
+            title=row["title"],
+            duration=int(row["duration"]),
+            assignees=tuple(attendance.get(row["id"], ())),
+            priority=row["status"] == "Unscheduled",
+        )
+        for _, row in rows.iterrows()
+    )
+
+    # mandatory attendees and persons with a calendar file need not have a
+    # node, but their busy times still count
+    person_ids = dict.fromkeys(
+        [*dfs["person"]["id"], *MANDATORY_ATTENDEES, *sorted(busy)]
+    )
+    persons = tuple(
+        Person(person_id, busy=busy.get(person_id, ())) for person_id in person_ids
+    )
+
+    return Problem(
+        clubs=clubs,
+        persons=persons,
+        slots=tuple(timeslots),
+        boundaries=(LUNCH_START,),
+        mandatory=MANDATORY_ATTENDEES,
     )
 
-    bc.add_nodes(adapter.get_nodes())
-    bc.add_edges(adapter.get_edges())
 
-    dfs = bc.to_df()
+def next_monday() -> date:
+    today = date.today()
+
+    return today + timedelta(days=7 - today.weekday())
+
+
+def make_plan(
+    adapter: GitHubAdapter,
+    solver: str = "greedy",
+    time_limit: float = 10.0,
+    starts: int = 64,
+    workers: int = None,
+    seed: int = None,
+    start_date: date = None,
+    biocypher: bool = False,
+    reporter: reporting.Reporter = None,
+) -> Plan:
+    """
+    Compute the schedule of the coming week and the project updates it takes,
+    without writing anything. `seed` seeds the greedy solver, or draws the
+    seeds of the multi-start runs.
+    """
+
+    reporter = reporter or reporting.Reporter()
+
+    cache_dir = os.getenv("BIOCYPHER_GITHUB_CACHE_DIR")
+    dfs = load_tables(
+        adapter,
+        biocypher=biocypher,
+        cache_dir=cache_dir and os.path.join(cache_dir, "ontology"),
+    )
 
     for name, df in dfs.items():
-        print(name)
-        print(df.head())
+        reporter.table(name, df, reporting.DEBUG)
 
     ## Calculate timeslots
 
-    all_clubs = dfs["club"]
-    persons = dfs["person"]
-    timeslots = dfs["timeslot"]
-    # remove skipped row
-    timeslots = timeslots[timeslots["id"] != "skipped"]
-
-    # add column "is_free" to persons, as a vector of booleans representing
-    # whether the person is free at the timeslot (as many as there are rows in
-    # timeslots)
-    persons["is_free"] = [
-        [True for _ in range(len(timeslots))] for _ in range(len(persons))
-    ]
-    # custom is_free for slobentanzer (could be automated later): set first four
-    # timeslots to False (of the entire vector)
-    persons.loc[persons["id"] == "slobentanzer", "is_free"].iloc[0][:4] = [
-        False for _ in range(4)
-    ]
-    # add column "schedule" to persons, collecting all individual attended clubs
-    persons["schedule"] = [[] for _ in range(len(persons))]
-
-    # filter rows only with status "To be scheduled" and "Scheduled", but not
-    # "Unscheduled" or "Closed / Parked"
-    clubs = all_clubs[
-        (all_clubs["status"] == "To be scheduled")
-        | (all_clubs["status"] == "Scheduled")
-    ].copy()
-    clubs["status"] = "To be scheduled"
-
-    # randomize the order of the rows
-    clubs = clubs.sample(frac=1).reset_index(drop=True)
-
-    # prepend rows that were skipped last week ("Unscheduled")
-    unscheduled_clubs = all_clubs[all_clubs["status"] == "Unscheduled"]
-    clubs = pd.concat([unscheduled_clubs, clubs], ignore_index=True)
-
-    # define start and end times for the lunch break
-    lunch_start = datetime.strptime("12:00", "%H:%M")
-
-    # row-wise through clubs
-    for index, row in clubs.iterrows():
-        # skip if scheduled
-        if row["status"] == "Scheduled":
-            continue
+    timeslots = adapter.get_field_options("Timeslot")
 
-        # assign earliest timeslot available, if it does not run into the lunch
-        # break
-        duration = row["duration"]
-        assignees = row["assignees"]
+    # compile the calendar files of all persons for the dates of the horizon
+    calendar = TimeslotCalendar(timeslots)
+    busy = load_availability(
+        AVAILABILITY_DIR,
+        calendar,
+        horizon_dates(calendar, start_date or next_monday()),
+        cache_dir=cache_dir and os.path.join(cache_dir, "availability"),
+        timezone=TIMEZONE,
+    )
 
-        # add saezrodriguez if not already in assignees
-        if "saezrodriguez" not in assignees:
-            assignees.append("saezrodriguez")
+    problem = build_problem(dfs, timeslots, busy)
+    if solver == "exact":
+        strategy = BranchAndBound(time_limit=time_limit)
+    elif solver == "multi-start":
+        strategy = MultiStart(
+            starts=starts, time_limit=time_limit, workers=workers, seed=seed
+        )
+    elif solver == "dsatur":
+        strategy = Saturation(workers=workers or 1)
+    else:
+        strategy = RandomGreedy(seed=seed)
+
+    schedule = solve(problem, strategy)
+    reporter.event(
+        "solved",
+        reporting.SUMMARY,
+        strategy=schedule.strategy,
+        seed=schedule.seed,
+        optimal=schedule.optimal,
+        scheduled=len(schedule.assignments),
+        unscheduled=len(schedule.unscheduled),
+    )
+
+    # only the fields whose value on the board actually changes are updated
+    desired = {}
+    clubs = {club.id: club for club in problem.clubs}
+    rows = []
 
-        # calculate the number of consecutive timeslots needed
-        num_timeslots = int(duration / 15)
+    for club_id in schedule.order:
+        club = clubs[club_id]
+        assignment = schedule.assignments.get(club_id)
 
-        # find a window num_timeslots consecutive True values in all rows
+        if assignment is None:
+            reporter.event("skipped", club=club_id, title=club.title)
+            rows.append((club.title, club.duration, None, "Unscheduled"))
+            desired[club_id] = {"Status": "Unscheduled", "Timeslot": "Skipped"}
+            continue
 
-        # 2d array of "is_free" values, with rows corresponding to assignees
-        # and columns corresponding to timeslots
-        is_free_array = np.array(
-            [
-                persons[persons["id"] == assignee]["is_free"].iloc[0]
-                for assignee in assignees
-            ]
+        reporter.event(
+            "scheduled", club=club_id, title=club.title, span=assignment.span
         )
+        rows.append((club.title, club.duration, assignment.timeslot, "Scheduled"))
+        desired[club_id] = {
+            "Status": "Scheduled",
+            "Timeslot": assignment.timeslot,
+            "Duration": str(club.duration),
+        }
+
+    table = pd.DataFrame(rows, columns=["title", "duration", "timeslot", "status"])
+    reporter.table("Schedule", table)
+
+    # collect all individual attended clubs per person
+    schedules = schedule.person_schedules(problem)
+    persons = dfs["person"]
+    persons["schedule"] = [schedules.get(person_id, []) for person_id in persons["id"]]
+    reporter.table("Persons", persons[["id", "schedule"]], reporting.DEBUG)
 
-        # sliding window view of the array, with window size assignees times
-        # number of timeslots
-        free_timeslots = swv(is_free_array, (len(assignees), num_timeslots))
-
-        # aggregate each timeslot window into a single boolean value
-        free_timeslots = [check.all() for check in free_timeslots[0]]
-
-        # fill vector with False values to account for the ultimate timeslots
-        # that do not have enough values to form a window of num_timeslots
-        free_timeslots += [False for _ in range(num_timeslots - 1)]
-
-        # if there is no block of True values of length num_timeslots, skip
-        if not np.any(free_timeslots):
-            # update status
-            row["status"] = "Unscheduled"
-            clubs.loc[index] = row
-            print(f"{row['title']}: ----- Skipped -----")
-            print(clubs.head())
-            adapter.mutate_column(row["id"], row["status"])
-            adapter.mutate_timeslot(row["id"], "Skipped")
-            continue
+    updates = adapter.plan_changes(desired)
+    reporter.message(lambda: adapter.format_changes(updates))
+
+    return Plan(
+        project_id=adapter.project_id,
+        updates=updates,
+        schedule=table.to_dict("records"),
+        persons=dict(zip(persons["id"], persons["schedule"])),
+    )
 
-        # get earliest timeslot from the index of the first True value
-        earliest_timeslot = timeslots[free_timeslots].iloc[0]["id"]
-
-        # if not skipped, assign the timeslot to the club
-        club_name = row["title"]
-        row["timeslot"] = earliest_timeslot
-        end_timeslot = (
-            datetime.strptime(earliest_timeslot, "%H:%M")
-            + timedelta(minutes=15 * (num_timeslots - 1))
-        ).strftime("%H:%M")
-        for assignee in assignees:
-            # set is_free to False for the timeslots of the event, keeping the
-            # rest of the vector
-            persons.loc[persons["id"] == assignee, "is_free"].iloc[0][
-                timeslots[timeslots["id"] == earliest_timeslot]
-                .index[0] : timeslots[timeslots["id"] == end_timeslot]
-                .index[0]
-                + 1
-            ] = [False for _ in range(num_timeslots)]
-
-            # update the schedule of the assignees
-            timespan = (
-                earliest_timeslot
-                + " - "
-                + (
-                    datetime.strptime(earliest_timeslot, "%H:%M")
-                    + timedelta(minutes=15 * num_timeslots)
-                ).strftime("%H:%M")
-            )
-            persons.loc[persons["id"] == assignee, "schedule"].iloc[0].append(
-                club_name + " " + timespan
-            )
-
-        row["status"] = "Scheduled"
-
-        # update clubs dataframe
-        clubs.loc[index] = row
-
-        print(f"{row['title']}: ----- Scheduled -----")
-        print(clubs[["title", "duration", "timeslot", "status"]])
-        print(persons[["id", "is_free", "schedule"]])
-
-        # update the github project using the updated clubs dataframe
-        adapter.mutate_column(row["id"], row["status"])
-        adapter.mutate_timeslot(row["id"], row["timeslot"])
-        adapter.mutate_duration(row["id"], str(row["duration"]))
+
+def apply(
+    adapter: GitHubAdapter,
+    plan: Plan,
+    journal: ApplyJournal = None,
+    reporter: reporting.Reporter = None,
+    concurrency: int = 4,
+):
+    """
+    Write a plan to the project board and the README.
+    """
+
+    reporter = reporter or reporting.Reporter()
+
+    results = apply_plan(adapter, plan, journal, concurrency=concurrency)
+    failed = [result for result in results if not result.ok]
+    reporter.event(
+        "applied",
+        reporting.SUMMARY,
+        sent=len(results),
+        skipped=len(plan.updates) - len(results),
+        failed=len(failed),
+    )
 
     # append the persons table in markdown format to the README.md, replacing
     # the previous table
-    persons_md = persons[["id", "schedule"]].to_markdown(index=False, tablefmt="github")
+    persons = pd.DataFrame(
+        {"id": list(plan.persons), "schedule": list(plan.persons.values())}
+    )
+    persons_md = persons.to_markdown(index=False, tablefmt="github")
     with open("README.md", "r") as f:
         lines = f.readlines()
         for i, line in enumerate(lines):
@@ -205,6 +256,194 @@ def main():
     with open("README.md", "w") as f:
         f.writelines(lines)
 
+    if failed:
+        resume = (
+            f" Send them again with --apply {journal.path.removesuffix('.journal')}."
+            if journal
+            else ""
+        )
+        raise SystemExit(
+            f"{len(failed)} of {len(results)} project updates failed, see log." + resume
+        )
+
+
+def main(
+    dry_run: bool = False,
+    solver: str = "greedy",
+    time_limit: float = 10.0,
+    starts: int = 64,
+    workers: int = None,
+    seed: int = None,
+    start_date: date = None,
+    biocypher: bool = False,
+    plan_path: str = None,
+    apply_path: str = None,
+    concurrency: int = 4,
+    reporter: reporting.Reporter = None,
+):
+    reporter = reporter or reporting.Reporter()
+
+    node_types = [
+        GitHubAdapterNodeType.ISSUE,
+    ]
+
+    node_fields = [
+        GitHubAdapterIssueField.NUMBER,
+        GitHubAdapterIssueField.TITLE,
+        GitHubAdapterIssueField.STATUS,
+        GitHubAdapterIssueField.DURATION,
+        GitHubAdapterIssueField.TIMESLOT,
+        GitHubAdapterIssueField.ASSIGNEES,
+    ]
+
+    edge_types = [
+        GitHubAdapterEdgeType.ATTENDS,
+    ]
+
+    adapter = GitHubAdapter(
+        node_types=node_types,
+        node_fields=node_fields,
+        edge_types=edge_types,
+        lazy=True,
+    )
+
+    # a saved plan is applied as is, resuming where an earlier apply stopped
+    if apply_path:
+        plan = read_plan(apply_path)
+        apply(
+            adapter,
+            plan,
+            ApplyJournal(apply_path + ".journal"),
+            reporter,
+            concurrency=concurrency,
+        )
+        return
+
+    plan = make_plan(
+        adapter,
+        solver=solver,
+        time_limit=time_limit,
+        starts=starts,
+        workers=workers,
+        seed=seed,
+        start_date=start_date,
+        biocypher=biocypher,
+        reporter=reporter,
+    )
+
+    if plan_path:
+        plan.save(plan_path)
+        reporter.message(f"Plan written to {plan_path}.")
+        return
+
+    if dry_run:
+        return
+
+    # the plan is kept, so that an interrupted apply can be resumed
+    plan_path = keep_plan(plan, "calculate_schedule")
+    reporter.message(f"Plan written to {plan_path}.")
+    apply(
+        adapter,
+        plan,
+        ApplyJournal(plan_path + ".journal"),
+        reporter,
+        concurrency=concurrency,
+    )
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Schedule the clubs of the coming week."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the planned project updates without writing anything",
+    )
+    parser.add_argument(
+        "--solver",
+        choices=["greedy", "exact", "multi-start", "dsatur"],
+        default="greedy",
+        help="random-order first-fit, a search for the most clubs that fit, "
+        "the best of many random-order runs in parallel, or first-fit with "
+        "the most constrained clubs first",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=10.0,
+        help="seconds the exact and multi-start solvers may take",
+    )
+    parser.add_argument(
+        "--starts",
+        type=int,
+        default=64,
+        help="number of random-order runs of the multi-start solver",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes of the multi-start and dsatur solvers",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed of the greedy solver, or from which the multi-start solver "
+        "draws its seeds; the seed of a run is printed with its summary",
+    )
+    parser.add_argument(
+        "--start-date",
+        type=date.fromisoformat,
+        default=None,
+        help="first day of the schedule (YYYY-MM-DD), by default next Monday",
+    )
+    parser.add_argument(
+        "--plan",
+        metavar="PATH",
+        default=None,
+        help="compute the schedule and save it with the project updates to a "
+        "JSON file, without writing anything",
+    )
+    parser.add_argument(
+        "--apply",
+        metavar="PATH",
+        default=None,
+        help="write a saved plan to the project board and the README; a "
+        "repeated apply skips the updates that already succeeded",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="mutation requests in flight while applying; the updates of one "
+        "card are always sent in order",
+    )
+    parser.add_argument(
+        "--biocypher",
+        action="store_true",
+        help="build the tables through BioCypher instead of directly from the "
+        "adapter",
+    )
+    reporting.add_arguments(parser)
+    args = parser.parse_args()
+    reporter = reporting.from_arguments(args)
+
+    try:
+        main(
+            dry_run=args.dry_run,
+            solver=args.solver,
+            time_limit=args.time_limit,
+            starts=args.starts,
+            workers=args.workers,
+            seed=args.seed,
+            start_date=args.start_date,
+            biocypher=args.biocypher,
+            plan_path=args.plan,
+            apply_path=args.apply,
+            concurrency=args.concurrency,
+            reporter=reporter,
+        )
+    finally:
+        reporter.close()
@@ -1,18 +1,28 @@
 # Monday evening, move all issues from Scheduled to Closed
-from biocypher import BioCypher
 from scheduling.adapters.adapter import (
     GitHubAdapter,
     GitHubAdapterNodeType,
-    GitHubAdapterEdgeType,
     GitHubAdapterIssueField,
 )
+import argparse
+import os
 import pandas as pd
+from scheduling import reporting
+from scheduling.plan import ApplyJournal, Plan, apply_plan, keep_plan, read_plan
+from scheduling.tables import load_tables
 
 pd.set_option("display.max_columns", None)
 
 
-def main():
-    bc = BioCypher()
+def main(
+    dry_run: bool = False,
+    biocypher: bool = False,
+    plan_path: str = None,
+    apply_path: str = None,
+    concurrency: int = 4,
+    reporter: reporting.Reporter = None,
+):
+    reporter = reporter or reporting.Reporter()
 
     node_types = [
         GitHubAdapterNodeType.ISSUE,
@@ -21,31 +31,96 @@ def main():
     node_fields = [
         GitHubAdapterIssueField.NUMBER,
         GitHubAdapterIssueField.TITLE,
-        GitHubAdapterIssueField.BODY,
+        GitHubAdapterIssueField.STATUS,
     ]
 
-    edge_types = [
-        GitHubAdapterEdgeType.PART_OF,
-    ]
+    edge_types = []
 
     adapter = GitHubAdapter(
         node_types=node_types,
         node_fields=node_fields,
         edge_types=edge_types,
+        lazy=True,
+        item_filter={"Status": "Scheduled"},
     )
 
-    bc.add_nodes(adapter.get_nodes())
-    bc.add_edges(adapter.get_edges())
+    # a saved plan is applied as is, resuming where an earlier apply stopped
+    if apply_path:
+        plan = read_plan(apply_path)
+        apply(
+            adapter,
+            plan,
+            ApplyJournal(apply_path + ".journal"),
+            reporter,
+            concurrency=concurrency,
+        )
+        return
+
+    cache_dir = os.getenv("BIOCYPHER_GITHUB_CACHE_DIR")
+    dfs = load_tables(
+        adapter,
+        biocypher=biocypher,
+        cache_dir=cache_dir and os.path.join(cache_dir, "ontology"),
+    )
 
-    dfs = bc.to_df()
+    for name, df in dfs.items():
+        reporter.table(name, df, reporting.DEBUG)
 
-    # Filter issues with status "Scheduled"
-    dfs
-    scheduled_clubs = dfs["club"][dfs["club"]["status"] == "Scheduled"]
+    # Filter issues with status "Scheduled"; the adapter only downloads those
+    clubs = dfs.get("club", pd.DataFrame(columns=["id", "status"]))
+    scheduled_clubs = clubs[clubs["status"] == "Scheduled"]
 
     # Move all issues from Scheduled to Closed
-    for _id in scheduled_clubs["id"]:
-        adapter.mutate_column(_id, "Closed / Parked")
+    desired = {_id: {"Status": "Closed / Parked"} for _id in scheduled_clubs["id"]}
+    updates = adapter.plan_changes(desired)
+    for update in updates:
+        reporter.event("closed", club=update.item_id)
+    reporter.message(lambda: adapter.format_changes(updates))
+
+    plan = Plan(project_id=adapter.project_id, updates=updates)
+
+    if plan_path:
+        plan.save(plan_path)
+        reporter.message(f"Plan written to {plan_path}.")
+        return
+
+    if dry_run:
+        return
+
+    # the plan is kept, so that an interrupted apply can be resumed
+    plan_path = keep_plan(plan, "close_issues")
+    reporter.message(f"Plan written to {plan_path}.")
+    apply(
+        adapter,
+        plan,
+        ApplyJournal(plan_path + ".journal"),
+        reporter,
+        concurrency=concurrency,
+    )
+
+
+def apply(
+    adapter: GitHubAdapter,
+    plan: Plan,
+    journal: ApplyJournal = None,
+    reporter: reporting.Reporter = None,
+    concurrency: int = 4,
+):
+    """
+    Write a plan to the project board and clear the schedule from the README.
+    """
+
+    reporter = reporter or reporting.Reporter()
+
+    results = apply_plan(adapter, plan, journal, concurrency=concurrency)
+    failed = [result for result in results if not result.ok]
+    reporter.event(
+        "applied",
+        reporting.SUMMARY,
+        sent=len(results),
+        skipped=len(plan.updates) - len(results),
+        failed=len(failed),
+    )
 
     # Remove this week's schedule from README.md
     with open("README.md", "r") as f:
@@ -62,6 +137,65 @@ def main():
     with open("README.md", "w") as f:
         f.writelines(lines)
 
+    if failed:
+        resume = (
+            f" Send them again with --apply {journal.path.removesuffix('.journal')}."
+            if journal
+            else ""
+        )
+        raise SystemExit(
+            f"{len(failed)} of {len(results)} project updates failed, see log." + resume
+        )
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Move all scheduled clubs to Closed / Parked."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the planned project updates without writing anything",
+    )
+    parser.add_argument(
+        "--plan",
+        metavar="PATH",
+        default=None,
+        help="save the project updates to a JSON file without writing anything",
+    )
+    parser.add_argument(
+        "--apply",
+        metavar="PATH",
+        default=None,
+        help="write a saved plan to the project board and the README; a "
+        "repeated apply skips the updates that already succeeded",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="mutation requests in flight while applying; the updates of one "
+        "card are always sent in order",
+    )
+    parser.add_argument(
+        "--biocypher",
+        action="store_true",
+        help="build the tables through BioCypher instead of directly from the "
+        "adapter",
+    )
+    reporting.add_arguments(parser)
+    args = parser.parse_args()
+
+    reporter = reporting.from_arguments(args)
+
+    try:
+        main(
+            dry_run=args.dry_run,
+            biocypher=args.biocypher,
+            plan_path=args.plan,
+            apply_path=args.apply,
+            concurrency=args.concurrency,
+            reporter=reporter,
+        )
+    finally:
+        reporter.close()
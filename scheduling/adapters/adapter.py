@@ -1,13 +1,118 @@
-import requests
-import gzip
+import hashlib
 import json
 import os
+import threading
+from dataclasses import replace
 from enum import Enum, auto
+from concurrent.futures import Future, ThreadPoolExecutor
 from itertools import chain
 from biocypher._logger import logger
+from scheduling.adapters.mutations import (
+    MAX_MUTATIONS_PER_DOCUMENT,
+    FieldUpdate,
+    build_mutation_document,
+    chunked,
+    is_unknown_id_error,
+    parse_mutation_response,
+)
+from scheduling.adapters.transport import GitHubAPIError, GraphQLTransport
+from scheduling.adapters.dispatcher import MutationDispatcher
+from scheduling.adapters.cache import ItemSnapshot, ProjectMetadata, item_version
+from scheduling.adapters.cassette import REPLAY, cassette_from_env
+from scheduling.adapters.store import GraphStore
 
 logger.debug(f"Loading module {__name__}.")
 
+# Seconds the project ID and field schema are cached for
+METADATA_TTL = 24 * 60 * 60
+
+# Alias prefix of the board field values requested by name
+FIELD_VALUE_ALIAS = "fieldValue_"
+
+# Selection of a field value of any of the types the adapter reads
+FIELD_VALUE = """
+      ... on ProjectV2ItemFieldTextValue {
+        text
+        field {
+          ... on ProjectV2FieldCommon {
+            name
+          }
+        }
+      }
+      ... on ProjectV2ItemFieldDateValue {
+        date
+        field {
+          ... on ProjectV2FieldCommon {
+            name
+          }
+        }
+      }
+      ... on ProjectV2ItemFieldSingleSelectValue {
+        name
+        field {
+          ... on ProjectV2FieldCommon {
+            name
+          }
+        }
+      }
+"""
+
+# Selections of the issue fields the adapter reads
+CONTENT_FIELDS = {
+    "number": "number",
+    "title": "title",
+    "body": "body",
+    "labels": """labels(first: 10) {
+          edges {
+            node {
+              name
+            }
+          }
+        }""",
+    "assignees": """assignees(first: 10) {
+          nodes {
+            login
+          }
+        }""",
+}
+
+
+def field_value_selection(field_names) -> str:
+    """
+    Build the selection of the values of the given board fields, one aliased
+    `fieldValueByName` per field.
+    """
+
+    return "\n".join(
+        "%s%d: fieldValueByName(name: %s) {%s}"
+        % (FIELD_VALUE_ALIAS, i, json.dumps(name), FIELD_VALUE)
+        for i, name in enumerate(field_names)
+    )
+
+
+def item_selection(field_names, content_fields) -> str:
+    """
+    Build the selection of a project item that fetches only the given board
+    fields, by name, and issue fields, see `CONTENT_FIELDS`.
+    """
+
+    content = "\n        ".join(CONTENT_FIELDS[name] for name in content_fields)
+
+    return """
+    id
+    updatedAt
+    %s
+    content {
+      ... on Issue {
+        updatedAt
+        %s
+      }
+    }
+""" % (
+        field_value_selection(field_names),
+        content,
+    )
+
 
 class GitHubAdapterNodeType(Enum):
     """
@@ -25,6 +130,11 @@ class GitHubAdapterIssueField(Enum):
     NUMBER = "number"
     TITLE = "title"
     BODY = "body"
+    STATUS = "status"
+    DURATION = "duration"
+    TIMESLOT = "timeslot"
+    LABELS = "labels"
+    ASSIGNEES = "assignees"
 
 
 class GitHubAdapterEdgeType(Enum):
@@ -33,6 +143,55 @@ class GitHubAdapterEdgeType(Enum):
     """
 
     PART_OF = "part_of"
+    ATTENDS = "attends"
+
+
+# Board fields and issue fields every item query fetches, to identify and name
+# the items
+REQUIRED_FIELDS = (("Title",), ("number",))
+
+# Board fields and issue fields each node field and edge type needs
+FIELD_SOURCES = {
+    GitHubAdapterIssueField.NUMBER: ((), ()),
+    GitHubAdapterIssueField.TITLE: ((), ()),
+    GitHubAdapterIssueField.BODY: ((), ("body",)),
+    GitHubAdapterIssueField.STATUS: (("Status",), ()),
+    GitHubAdapterIssueField.DURATION: (("Duration",), ()),
+    GitHubAdapterIssueField.TIMESLOT: (("Timeslot",), ()),
+    GitHubAdapterIssueField.LABELS: ((), ("labels",)),
+    GitHubAdapterIssueField.ASSIGNEES: ((), ("assignees",)),
+    GitHubAdapterEdgeType.PART_OF: (("Component Type", "Data Type"), ("body",)),
+    GitHubAdapterEdgeType.ATTENDS: ((), ("assignees",)),
+}
+
+# Columns of the tables to_records always returns, even without any rows
+RECORD_COLUMNS = {
+    "club": (
+        "id",
+        "title",
+        "duration",
+        "timeslot",
+        "status",
+        "labels",
+        "assignees",
+        "issue",
+    ),
+    "person": ("id",),
+    "attends": ("source_id", "target_id"),
+    "part of": ("source_id", "target_id"),
+}
+
+
+class UnknownFieldOptionError(LookupError):
+    """
+    Raised when a single-select field or option does not exist on the
+    project board.
+    """
+
+    def __init__(self, field_name: str, option_name: str):
+        super().__init__(f"Could not find {option_name!r} in {field_name!r} options.")
+        self.field_name = field_name
+        self.option_name = option_name
 
 
 class GitHubAdapter:
@@ -45,6 +204,38 @@ class GitHubAdapter:
         node_fields: List of node fields to include in the result.
         edge_types: List of edge types to include in the result.
         edge_fields: List of edge fields to include in the result.
+        timeout: Connect and read timeout in seconds for API requests.
+        max_retries: Number of retries for transient API failures.
+        transport: Optional preconfigured `GraphQLTransport`; overrides
+            `timeout` and `max_retries`.
+        cache_dir: Directory for the compressed item snapshot. If set, only
+            new and changed items are downloaded. Defaults to the
+            BIOCYPHER_GITHUB_CACHE_DIR environment variable; without either,
+            all items are downloaded on every run.
+        page_size: Number of items requested per page, at most 100.
+        cassette: Fixture file to record GraphQL exchanges to or replay them
+            from. Defaults to the BIOCYPHER_GITHUB_CASSETTE environment
+            variable. Replaying needs neither a token nor network access.
+        cassette_mode: "record" or "replay". Defaults to the
+            BIOCYPHER_GITHUB_CASSETTE_MODE environment variable, else
+            "replay".
+        lazy: If True, the constructor does not touch the token or the
+            network. The project is set up on the first call that needs it,
+            or explicitly with `load` or `prefetch`.
+        organization: Login of the organization owning the project.
+        project_number: Number of the project within the organization.
+        metadata_ttl: Seconds the project ID and the field schema are kept
+            in the cache directory, if any. Defaults to the
+            BIOCYPHER_GITHUB_METADATA_TTL environment variable, else one day.
+            Updates that fail on an unknown ID download them again.
+        item_filter: Dict of board field name to the option name, or list of
+            option names, an item must have to be included, e.g.
+            `{"Status": "Scheduled"}`. Other items are dropped as soon as
+            their values arrive; with a cache directory, already when the
+            board is listed, so that they are never downloaded in full.
+
+    Only the board and issue fields needed for the requested node fields and
+    edge types are downloaded, e.g. the issue body only for `PART_OF` edges.
     """
 
     def __init__(
@@ -53,35 +244,185 @@ class GitHubAdapter:
         node_fields: str = None,
         edge_types: str = None,
         edge_fields: str = None,
+        timeout=(5.0, 30.0),
+        max_retries: int = 5,
+        transport: GraphQLTransport = None,
+        cache_dir: str = None,
+        page_size: int = 100,
+        cassette: str = None,
+        cassette_mode: str = None,
+        lazy: bool = False,
+        item_filter: dict = None,
+        organization: str = "saezlab",
+        project_number: int = 18,
+        metadata_ttl: float = None,
     ):
         self._set_types_and_fields(node_types, node_fields, edge_types, edge_fields)
+        self._set_selection(item_filter)
+
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._transport = transport
+        self._cache_dir = cache_dir or os.getenv("BIOCYPHER_GITHUB_CACHE_DIR")
+
+        if not 1 <= page_size <= 100:
+            raise ValueError("Page size must be between 1 and 100.")
+        self._page_size = page_size
+        self._cassette = cassette
+        self._cassette_mode = cassette_mode
+
+        self._organization = organization
+        self._project_number = project_number
+        if metadata_ttl is None:
+            metadata_ttl = float(
+                os.getenv("BIOCYPHER_GITHUB_METADATA_TTL", METADATA_TTL)
+            )
+        self._metadata = (
+            ProjectMetadata(
+                os.path.join(
+                    self._cache_dir, f"project-{organization}-{project_number}.json"
+                ),
+                organization,
+                project_number,
+                metadata_ttl,
+            )
+            if self._cache_dir
+            else None
+        )
+
+        self._items = {}
+        self._items_complete = False
+        self._graph = GraphStore()
+        self._nodes_complete = False
+        self._edges_complete = False
+        self._pending_updates = []
+        self._field_state = {}
+
+        self._api_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._api_ready = False
+        self._prefetch = None
+        self._prefetch_thread = None
+
+        if not lazy:
+            self._ensure_api()
+
+    def load(self):
+        """
+        Download and process all project data now instead of on first use.
+        Calling it again is a no-op.
+
+        Returns:
+            The adapter.
+        """
 
-        self._nodes = []
-        self._edges = []
+        for _ in self.get_nodes():
+            pass
+
+        for _ in self.get_edges():
+            pass
+
+        return self
+
+    def prefetch(self) -> Future:
+        """
+        Start `load` on a background thread, so the download overlaps with
+        other startup work. Later calls to `get_nodes`, `get_edges` and
+        `get_node_count` wait for it to finish.
+
+        Returns:
+            A future resolving to the adapter.
+        """
+
+        if self._prefetch is None:
+            future = Future()
+
+            def run():
+                try:
+                    future.set_result(self.load())
+                except BaseException as e:
+                    future.set_exception(e)
+
+            self._prefetch = future
+            self._prefetch_thread = threading.Thread(
+                target=run, name="adapter-prefetch", daemon=True
+            )
+            self._prefetch_thread.start()
 
-        self._setup_api()
-        self._download_data()
-        self._process_nodes()
-        self._process_edges()
+        return self._prefetch
 
-    def get_nodes(self) -> list:
+    def get_nodes(self):
         """
-        Returns a list of node tuples for node types specified in the
+        Returns an iterator over node tuples for node types specified in the
         adapter constructor.
 
+        Items are downloaded page by page while the nodes are consumed; once
+        an iteration has run to the end, later calls replay the result.
+        Duplicate nodes are yielded once, with their properties merged.
+
         Returns:
-            List of nodes.
+            Iterator of nodes.
         """
 
-        return self._nodes
+        self._wait_for_prefetch()
+
+        if self._nodes_complete:
+            yield from self._graph.nodes()
+            return
+
+        self._graph.clear_nodes()
+        for node in self._process_nodes():
+            if self._graph.add_node(*node):
+                yield self._graph.get_node(node[0], node[1])
+
+        self._nodes_complete = True
 
     def get_edges(self):
         """
-        Returns a list of edge tuples for edge types specified in the
+        Returns an iterator over edge tuples for edge types specified in the
         adapter constructor.
         """
 
-        return self._edges
+        self._wait_for_prefetch()
+
+        if self._edges_complete:
+            yield from self._graph.edges()
+            return
+
+        self._graph.clear_edges()
+        edges = []
+        if GitHubAdapterEdgeType.ATTENDS in self.edge_types:
+            edges.append(self._process_attendance())
+        if GitHubAdapterEdgeType.PART_OF in self.edge_types:
+            edges.append(self._process_edges())
+
+        for edge in chain(*edges):
+            if self._graph.add_edge(*edge):
+                yield edge
+
+        self._edges_complete = True
+
+    def _wait_for_prefetch(self):
+        # the prefetch thread itself must not wait for its own future
+        if (
+            self._prefetch is not None
+            and threading.current_thread() is not self._prefetch_thread
+        ):
+            self._prefetch.result()
+
+    def _ensure_api(self):
+        """
+        Set up the API and download the project metadata, once.
+        """
+
+        if self._api_ready:
+            return
+
+        with self._api_lock:
+            if not self._api_ready:
+                self._setup_api()
+                self._download_data()
+                self._api_ready = True
 
     def _get_token(self):
         token = os.getenv("BIOCYPHER_GITHUB_PROJECT_TOKEN")
@@ -101,167 +442,448 @@ class GitHubAdapter:
 
         # Set the API endpoint and headers
         self.url = "https://api.github.com/graphql"
-        self.headers = {"Authorization": f"Bearer {self._get_token()}"}
+
+        # A preconfigured transport brings its own endpoint and headers
+        if self._transport is not None:
+            return
+
+        session = cassette_from_env(self._cassette, self._cassette_mode)
+
+        if session is not None and session.mode == REPLAY:
+            self.headers = {}
+        else:
+            self.headers = {"Authorization": f"Bearer {self._get_token()}"}
+
+        self._transport = GraphQLTransport(
+            self.url,
+            self.headers,
+            timeout=self._timeout,
+            max_retries=self._max_retries,
+            session=session,
+        )
+
+    def invalidate_metadata(self):
+        """
+        Drop the cached project ID and field schema, so that they are
+        downloaded again when next needed.
+        """
+
+        if self._metadata is not None:
+            self._metadata.invalidate()
+
+        with self._api_lock:
+            self._api_ready = False
+
+    def refresh_metadata(self):
+        """
+        Download the project ID and field schema again now, replacing the
+        cached ones.
+        """
+
+        self._ensure_api()
+
+        with self._api_lock:
+            self._fetch_metadata()
 
     def _download_data(self):
         """
         Download data from the GitHub project page using the API.
         """
 
+        cached = self._metadata.load() if self._metadata is not None else None
+
+        if cached:
+            self._set_metadata(*cached)
+        else:
+            self._fetch_metadata()
+
+        # The project items are streamed by _iter_items on first use
+
+    def _fetch_metadata(self):
+        """
+        Download the project ID and fields and update the cache.
+        """
+
         # Get the project ID
-        self._id = self._get_project_id(self.url, self.headers)
+        project_id = self._get_project_id()
 
         # Get the project fields
-        self._fields = self._get_project_fields(self.url, self.headers, self._id)
+        fields = self._get_project_fields(project_id)
+
+        if self._metadata is not None:
+            self._metadata.save(project_id, fields)
+
+        self._set_metadata(project_id, fields)
+
+    def _set_metadata(self, project_id: str, fields: list):
+        self._id = project_id
+        self._fields = fields
+        self._field_index = self._build_field_index(self._fields)
+        self._folded_field_index = {
+            (field, option.lower()): (field, option)
+            for (field, option) in self._field_index
+        }
+        self._select_fields = [
+            field["name"] for field in self._fields if "options" in field
+        ]
+
+    @property
+    def project_id(self) -> str:
+        """
+        Node ID of the project board.
+        """
 
-        # Get the project items
-        self._items = self._get_project_items(self.url, self.headers, self._id)
+        self._ensure_api()
 
-    def mutate_column(self, item_id: str, new_column: str):
+        return self._id
+
+    def get_field_option(self, field_name: str, option_name: str) -> tuple:
+        """
+        Look up the IDs of a single-select field option.
+
+        Args:
+            field_name: Name of the single-select field, e.g. "Status".
+            option_name: Name of the option, e.g. "Scheduled".
+
+        Returns:
+            Tuple of field ID and option ID.
+
+        Raises:
+            UnknownFieldOptionError: If the field or option does not exist.
+        """
+
+        self._ensure_api()
+
+        key = (field_name, option_name)
+
+        if key not in self._field_index:
+            # node IDs of the options are lower case, e.g. "mon 09:00"
+            key = self._folded_field_index.get((field_name, str(option_name).lower()))
+
+        try:
+            return self._field_index[key]
+        except KeyError:
+            raise UnknownFieldOptionError(field_name, option_name) from None
+
+    def get_field_options(self, field_name: str) -> list:
         """
-        Move a card to a new column.
+        Returns the option names of a single-select field, in board order.
         """
 
-        # find the id of the status field and the column
-        for field in self._fields:
-            if field.get("name") == "Status":
-                field_id = field.get("id")
-                for option in field.get("options"):
-                    if option.get("name") == new_column:
-                        field_value = option.get("id")
+        self._ensure_api()
 
-        query = """
-          mutation {
-            updateProjectV2ItemFieldValue (input: {fieldId: "%s", itemId: "%s", projectId: "%s", value: {singleSelectOptionId: "%s"} }) {
-              clientMutationId
-            }
-          }
-        """ % (
-            field_id,
-            item_id,
-            self._id,
-            field_value,
+        return [
+            option
+            for (field, option) in self._field_index.keys()
+            if field == field_name
+        ]
+
+    def make_update(self, item_id: str, field_name: str, option_name: str):
+        """
+        Resolve a single-select field update to the IDs the API expects.
+
+        Args:
+            item_id: Node ID of the project item.
+            field_name: Name of the single-select field, e.g. "Status".
+            option_name: Name of the option to select, e.g. "Scheduled".
+
+        Returns:
+            A `FieldUpdate`.
+
+        Raises:
+            UnknownFieldOptionError: If the field or option does not exist.
+        """
+
+        field_id, option_id = self.get_field_option(field_name, option_name)
+
+        return FieldUpdate(
+            item_id=item_id,
+            field_id=field_id,
+            option_id=option_id,
+            description=f"{field_name}={option_name}",
+            field_name=field_name,
+            option_name=option_name,
+            previous=self._field_state.get(item_id, {}).get(field_name),
         )
 
-        # Set the request data as a dictionary
-        data = {"query": query}
+    def get_field_state(self, item_id: str) -> dict:
+        """
+        Returns the single-select values of an item as downloaded, updated
+        with every successful write since.
+        """
 
-        # Send the API request
-        response = requests.post(self.url, headers=self.headers, json=data)
+        for _ in self._iter_items():
+            pass
 
-        # Parse the response JSON
-        response_json = json.loads(response.text)
+        return dict(self._field_state.get(item_id, {}))
 
-        # Extract the data from the response JSON
-        data = response_json.get("data")
+    def plan_changes(self, desired: dict) -> list:
+        """
+        Compute the minimal set of updates that brings the board into the
+        desired state.
 
-    def mutate_timeslot(self, item_id: str, new_timeslot: str):
+        Args:
+            desired: Dict of item ID to a dict of field name to option name.
+                Fields that are not mentioned are left alone.
+
+        Returns:
+            A `FieldUpdate` for every field whose current value differs from
+            the desired one.
+
+        Raises:
+            UnknownFieldOptionError: If a desired field or option does not
+                exist.
+        """
+
+        # make sure the current state is known
+        for _ in self._iter_items():
+            pass
+
+        updates = []
+
+        for item_id, fields in desired.items():
+            current = self._field_state.get(item_id, {})
+            for field_name, option_name in fields.items():
+                update = self.make_update(item_id, field_name, option_name)
+                # compare option IDs, as option names are matched ignoring case
+                selected = self._field_index.get((field_name, current.get(field_name)))
+                if selected is None or selected[1] != update.option_id:
+                    updates.append(update)
+
+        return updates
+
+    def format_changes(self, updates: list) -> str:
         """
-        Update the timeslot value of a card.
+        Render planned updates as a human-readable report, one line per
+        update, e.g. for a dry run.
         """
 
-        field_value = None
+        titles = {item["id"]: item.get("Title") for item in self._items.values()}
 
-        # find the id of the status field and the column
-        for field in self._fields:
-            if field.get("name") == "Timeslot":
-                field_id = field.get("id")
-                for option in field.get("options"):
-                    if option.get("name") == new_timeslot:
-                        field_value = option.get("id")
-
-        if not field_value:
-            logger.warning(f"Could not find {new_timeslot} in field options.")
-            return
+        lines = [
+            f"{titles.get(update.item_id) or update.item_id}: "
+            f"{update.field_name} {update.previous!r} -> {update.option_name!r}"
+            for update in updates
+        ]
+        lines.append(f"{len(updates)} field updates planned.")
 
-        query = """
-          mutation {
-            updateProjectV2ItemFieldValue (input: {fieldId: "%s", itemId: "%s", projectId: "%s", value: {singleSelectOptionId: "%s"} }) {
-              clientMutationId
-            }
-          }
-        """ % (
-            field_id,
-            item_id,
-            self._id,
-            field_value,
-        )
+        return "\n".join(lines)
 
-        # Set the request data as a dictionary
-        data = {"query": query}
+    def queue_mutation(self, item_id: str, field_name: str, option_name: str):
+        """
+        Queue a single-select field update for the next `flush_mutations`.
 
-        # Send the API request
-        response = requests.post(self.url, headers=self.headers, json=data)
+        Raises:
+            UnknownFieldOptionError: If the field or option does not exist.
+        """
+
+        self._pending_updates.append(self.make_update(item_id, field_name, option_name))
+
+    def queue_updates(self, updates: list):
+        """
+        Queue resolved `FieldUpdate`s, e.g. from `plan_changes`, for the next
+        `flush_mutations`.
+        """
+
+        self._pending_updates.extend(updates)
+
+    def dispatcher(self, concurrency: int = 4) -> MutationDispatcher:
+        """
+        Create a `MutationDispatcher` that sends updates of this project
+        concurrently in the background.
+
+        Args:
+            concurrency: Maximum number of requests in flight.
+        """
+
+        return MutationDispatcher(self, concurrency=concurrency)
+
+    def flush_mutations(self, chunk_size: int = MAX_MUTATIONS_PER_DOCUMENT) -> list:
+        """
+        Send all queued updates as aliased mutation documents of at most
+        `chunk_size` operations each.
+
+        Returns:
+            One `MutationResult` per queued update, in queue order. Failed
+            updates are logged and reported with their error message.
+        """
+
+        updates = self._pending_updates
+        self._pending_updates = []
+
+        results = []
+        for chunk in chunked(updates, chunk_size):
+            results.extend(self.send_updates(chunk))
+
+        failed = [result for result in results if not result.ok]
+        for result in failed:
+            logger.error(
+                f"Could not set {result.update.description} on item "
+                f"{result.update.item_id}: {result.error}"
+            )
+
+        logger.info(f"Flushed {len(results)} project updates, {len(failed)} failed.")
+
+        return results
+
+    def send_updates(self, updates: list) -> list:
+        """
+        Send a list of updates as one aliased mutation document now, without
+        touching the queue of `flush_mutations`. Safe to call from several
+        threads, e.g. by a `MutationDispatcher`.
+
+        Updates that fail on an unknown ID, e.g. because a field was
+        recreated since the metadata were cached, are resolved again against
+        freshly downloaded metadata and sent once more.
+
+        Returns:
+            One `MutationResult` per update, in order.
+        """
+
+        results = self._send_document(updates)
+
+        stale = [
+            i
+            for i, result in enumerate(results)
+            if is_unknown_id_error(result) and result.update.field_name
+        ]
+        if not stale:
+            return results
+
+        # one refresh at a time when several threads send updates
+        with self._refresh_lock:
+            logger.info("Unknown IDs in project updates, downloading metadata again.")
+            project_id = self._id
+            self.refresh_metadata()
+
+            retries = []
+            for i in stale:
+                update = results[i].update
+                try:
+                    field_id, option_id = self.get_field_option(
+                        update.field_name, update.option_name
+                    )
+                except UnknownFieldOptionError:
+                    continue
+
+                fresh = replace(update, field_id=field_id, option_id=option_id)
+                if fresh != update or self._id != project_id:
+                    retries.append((i, fresh))
+
+        if retries:
+            retried = self._send_document([update for _, update in retries])
+            for (i, _), result in zip(retries, retried):
+                results[i] = result
+
+        return results
+
+    def _send_document(self, updates: list) -> list:
+        """
+        Send a list of updates as one aliased mutation document, as is.
+        """
+
+        self._ensure_api()
+
+        document, aliases = build_mutation_document(self._id, updates)
+
+        # Send the API request; a request that fails for good fails the
+        # whole chunk
+        try:
+            response_json = self._transport.execute(document)
+        except GitHubAPIError as e:
+            response_json = {"errors": [{"message": str(e)}]}
+
+        results = parse_mutation_response(response_json, aliases)
+
+        # keep the known board state in line with successful writes
+        for result in results:
+            if result.ok and result.update.field_name:
+                state = self._field_state.setdefault(result.update.item_id, {})
+                state[result.update.field_name] = result.update.option_name
+
+        return results
+
+    def mutate_column(self, item_id: str, new_column: str):
+        """
+        Move a card to a new column now.
 
-        # Parse the response JSON
-        response_json = json.loads(response.text)
+        Raises:
+            UnknownFieldOptionError: If the column does not exist.
+            GitHubAPIError: If the update failed.
+        """
+
+        self._mutate_now(item_id, "Status", new_column)
+
+    def mutate_timeslot(self, item_id: str, new_timeslot: str):
+        """
+        Update the timeslot value of a card now.
+
+        Raises:
+            UnknownFieldOptionError: If the timeslot does not exist.
+            GitHubAPIError: If the update failed.
+        """
 
-        # Extract the data from the response JSON
-        data = response_json.get("data")
+        self._mutate_now(item_id, "Timeslot", new_timeslot)
 
     def mutate_duration(self, item_id: str, new_duration: str):
         """
-        Update the duration of an event (card).
+        Update the duration of an event (card) now.
+
+        Raises:
+            UnknownFieldOptionError: If the duration does not exist.
+            GitHubAPIError: If the update failed.
         """
 
-        # find the id of the status field and the column
-        for field in self._fields:
-            if field.get("name") == "Duration":
-                field_id = field.get("id")
-                for option in field.get("options"):
-                    if option.get("name") == new_duration:
-                        field_value = option.get("id")
+        self._mutate_now(item_id, "Duration", new_duration)
 
-        query = """
-          mutation {
-            updateProjectV2ItemFieldValue (input: {fieldId: "%s", itemId: "%s", projectId: "%s", value: {singleSelectOptionId: "%s"} }) {
-              clientMutationId
-            }
-          }
-        """ % (
-            field_id,
-            item_id,
-            self._id,
-            field_value,
-        )
+    def _mutate_now(self, item_id: str, field_name: str, option_name: str):
+        """
+        Queue one update and flush the queue, raising if the update failed.
+        """
 
-        # Set the request data as a dictionary
-        data = {"query": query}
+        self.queue_mutation(item_id, field_name, option_name)
+        result = self.flush_mutations()[-1]
 
-        # Send the API request
-        response = requests.post(self.url, headers=self.headers, json=data)
+        if not result.ok:
+            raise GitHubAPIError(
+                f"Could not set {result.update.description} on item {item_id}: "
+                f"{result.error}"
+            )
 
-        # Parse the response JSON
-        response_json = json.loads(response.text)
+    def _build_field_index(self, fields: list) -> dict:
+        """
+        Map each (field name, option name) pair of the single-select fields to
+        its (field ID, option ID) pair.
+        """
+
+        index = {}
+
+        for field in fields:
+            for option in field.get("options", []):
+                index[(field["name"], option["name"])] = (field["id"], option["id"])
 
-        # Extract the data from the response JSON
-        data = response_json.get("data")
+        return index
 
-    def _get_project_id(self, url: str, headers: dict) -> str:
+    def _get_project_id(self) -> str:
         query = """
                 query{
-                    organization(login: "saezlab"){
-                        projectV2(number: 18) {
+                    organization(login: %s){
+                        projectV2(number: %d) {
                             id
                         }
                     }
                 }
-                """
-
-        # Set the request data as a dictionary
-        data = {"query": query}
+                """ % (
+            json.dumps(self._organization),
+            self._project_number,
+        )
 
         # Send the API request
-        response = requests.post(url, headers=headers, json=data)
-
-        # Parse the response JSON
-        response_json = json.loads(response.text)
+        data = self._transport.query(query)
 
-        # Extract the data from the response JSON
-        data = response_json.get("data")
         return data.get("organization").get("projectV2").get("id")
 
-    def _get_project_fields(self, url: str, headers: dict, id_: str) -> dict:
+    def _get_project_fields(self, id_: str) -> dict:
         query = (
             """
                 query{
@@ -290,75 +912,171 @@ class GitHubAdapter:
             % id_
         )
 
-        # Set the request data as a dictionary
-        data = {"query": query}
+        # Send the API request
+        data = self._transport.query(query)
+
+        return data.get("node").get("fields").get("nodes")
+
+    def _iter_items(self):
+        """
+        Yield normalized items, downloading them on first use.
+
+        Items are recorded in `_items` as they arrive, so that later passes
+        and lookups between items do not download them again.
+        """
+
+        if self._items_complete:
+            yield from self._items.values()
+            return
+
+        self._ensure_api()
+
+        if self._cache_dir:
+            pages = [self._sync_project_items(self._id).values()]
+        else:
+            pages = self._iter_project_items(self._id, self._page_size)
+
+        for page in pages:
+            for node in page:
+                item = self._normalize_item(node)
+                if not self._matches_filter(item):
+                    continue
+                self._items[item["content"]["number"]] = item
+                self._field_state[item["id"]] = {
+                    name: item.get(name)
+                    for name in self._select_fields
+                    if name in self._field_names
+                }
+                yield item
+
+        self._items_complete = True
+
+    def _iter_project_items(self, id_: str, page_size: int):
+        """
+        Yield the issue items of the project one page at a time.
+
+        The next page is requested in the background as soon as the cursor
+        of the current one is known, so network time overlaps with the
+        processing of the current page.
+        """
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._get_items_page, id_, page_size, None)
+
+            while future is not None:
+                nodes, pageInfo = future.result()
+
+                if pageInfo.get("hasNextPage"):
+                    future = executor.submit(
+                        self._get_items_page,
+                        id_,
+                        page_size,
+                        pageInfo.get("endCursor"),
+                    )
+                else:
+                    future = None
+
+                yield self._index_items(nodes).values()
+
+    def _get_items_page(self, id_: str, page_size: int, cursor: str) -> tuple:
+        """
+        Download one page of project items.
+
+        Returns:
+            The item nodes of the page and its page info.
+        """
+
+        after = ', after: "%s"' % cursor if cursor else ""
+        query = """
+            query{
+              node(id: "%s") {
+                ... on ProjectV2 {
+                  items(first: %d%s) {
+                    nodes {
+                      %s
+                    }
+                    pageInfo {
+                      endCursor
+                      hasNextPage
+                    }
+                  }
+                }
+              }
+            }
+            """ % (
+            id_,
+            page_size,
+            after,
+            self._selection,
+        )
 
         # Send the API request
-        response = requests.post(url, headers=headers, json=data)
+        data = self._transport.query(query)
+        items = data.get("node").get("items")
 
-        # Parse the response JSON
-        response_json = json.loads(response.text)
+        return items.get("nodes"), items.get("pageInfo")
 
-        # Extract the data from the response JSON
-        data = response_json.get("data")
-        return data.get("node").get("fields").get("nodes")
+    def _sync_project_items(self, id_: str) -> dict:
+        """
+        Bring the local item snapshot up to date and return its items.
 
-    def _get_project_items(self, url: str, headers: dict, id_: str) -> dict:
-        nodes = []
+        Only the IDs and update timestamps of all items are listed; full item
+        data is downloaded for new and changed items only.
+        """
 
-        query = (
-            """
+        # items fetched with another selection or filter are kept apart
+        key = hashlib.sha256(
+            (self._selection + json.dumps(self._item_filter, sort_keys=True)).encode()
+        ).hexdigest()[:12]
+        snapshot = ItemSnapshot(
+            os.path.join(self._cache_dir, f"items-{id_}-{key}.json.gz"), id_
+        )
+        snapshot.load()
+
+        versions = self._get_item_versions(id_)
+        changed, deleted = snapshot.diff(versions)
+
+        logger.info(
+            f"Item snapshot: {len(versions) - len(changed)} unchanged, "
+            f"{len(changed)} new or changed, {len(deleted)} deleted."
+        )
+
+        for chunk in chunked(changed, 100):
+            snapshot.merge(self._get_items_by_id(chunk), versions, [])
+
+        snapshot.merge([], versions, deleted)
+        snapshot.save()
+
+        return self._index_items(snapshot.nodes())
+
+    def _get_item_versions(self, id_: str) -> dict:
+        """
+        List the version of every item on the board.
+
+        Returns:
+            Dict of item ID to version, see `item_version`.
+        """
+
+        versions = {}
+        cursor = None
+
+        while True:
+            after = ', after: "%s"' % cursor if cursor else ""
+            query = """
                 query{
                   node(id: "%s") {
                     ... on ProjectV2 {
-                      items(first: 20) {
+                      items(first: 100%s) {
                         nodes {
                           id
-                          fieldValues(first: 100) {
-                            nodes {
-                              ... on ProjectV2ItemFieldTextValue {
-                                text
-                                field {
-                                  ... on ProjectV2FieldCommon {
-                                    name
-                                  }
-                                }
-                              }
-                              ... on ProjectV2ItemFieldDateValue {
-                                date
-                                field {
-                                  ... on ProjectV2FieldCommon {
-                                    name
-                                  }
-                                }
-                              }
-                              ... on ProjectV2ItemFieldSingleSelectValue {
-                                name
-                                field {
-                                  ... on ProjectV2FieldCommon {
-                                    name
-                                  }
-                                }
-                              }
-                            }
-                          }
+                          updatedAt
+                          %s
                           content {
                             ... on Issue {
-                              title
-                              body
-                              number
-                              labels(first: 10) {
-                                edges {
-                                  node {
-                                    name
-                                  }
-                                }
-                              }
-                              assignees(first: 10) {
-                                nodes {
-                                  login
-                                }
-                              }
+                              updatedAt
+                            }
+                            ... on DraftIssue {
+                              updatedAt
                             }
                           }
                         }
@@ -370,114 +1088,57 @@ class GitHubAdapter:
                     }
                   }
                 }
-                """
-            % id_
-        )
-
-        # Set the request data as a dictionary
-        data = {"query": query}
-
-        # Send the API request
-        response = requests.post(url, headers=headers, json=data)
-
-        # Parse the response JSON
-        response_json = json.loads(response.text)
-
-        nodes.extend(response_json.get("data").get("node").get("items").get("nodes"))
-
-        # Extract the data from the response JSON
-        pageInfo = response_json.get("data").get("node").get("items").get("pageInfo")
-
-        while pageInfo.get("hasNextPage"):
-            next_query = """
-                            query{
-                              node(id: "%s") {
-                                ... on ProjectV2 {
-                                  items(first: 20, after: "%s") {
-                                    nodes {
-                                      id
-                                      fieldValues(first: 100) {
-                                        nodes {
-                                          ... on ProjectV2ItemFieldTextValue {
-                                            text
-                                            field {
-                                              ... on ProjectV2FieldCommon {
-                                                name
-                                              }
-                                            }
-                                          }
-                                          ... on ProjectV2ItemFieldDateValue {
-                                            date
-                                            field {
-                                              ... on ProjectV2FieldCommon {
-                                                name
-                                              }
-                                            }
-                                          }
-                                          ... on ProjectV2ItemFieldSingleSelectValue {
-                                            name
-                                            field {
-                                              ... on ProjectV2FieldCommon {
-                                                name
-                                              }
-                                            }
-                                          }
-                                        }
-                                      }
-                                      content {
-                                        ... on Issue {
-                                          title
-                                          body
-                                          number
-                                          labels(first: 10) {
-                                            edges {
-                                              node {
-                                                name
-                                              }
-                                            }
-                                          assignees(first: 10) {
-                                            nodes {
-                                              login
-                                            }
-                                          }
-                                        }
-                                      }
-                                    }
-                                    pageInfo {
-                                      endCursor
-                                      hasNextPage
-                                    }
-                                  }
-                                }
-                              }
-                            }
-                            """ % (
+                """ % (
                 id_,
-                pageInfo.get("endCursor"),
+                after,
+                field_value_selection(self._item_filter),
             )
 
-            # Set the request data as a dictionary
-            data = {"query": next_query}
+            data = self._transport.query(query)
+            items = data.get("node").get("items")
 
-            # Send the API request
-            response = requests.post(url, headers=headers, json=data)
+            for node in items.get("nodes"):
+                if self._matches_filter(self._get_field_values(node)):
+                    versions[node["id"]] = item_version(node)
 
-            # Parse the response JSON
-            response_json = json.loads(response.text)
+            if not items.get("pageInfo").get("hasNextPage"):
+                break
 
-            nodes.extend(
-                response_json.get("data").get("node").get("items").get("nodes")
-            )
+            cursor = items.get("pageInfo").get("endCursor")
 
-            # Extract the data from the response JSON
-            pageInfo = (
-                response_json.get("data").get("node").get("items").get("pageInfo")
-            )
+        return versions
+
+    def _get_items_by_id(self, ids: list) -> list:
+        """
+        Download the full data of up to 100 items by their node IDs.
+        """
+
+        query = """
+            query{
+              nodes(ids: %s) {
+                ... on ProjectV2Item {
+                  %s
+                }
+              }
+            }
+            """ % (
+            json.dumps(ids),
+            self._selection,
+        )
+
+        data = self._transport.query(query)
+
+        return [node for node in data.get("nodes") if node]
+
+    def _index_items(self, nodes: list) -> dict:
+        """
+        Key item nodes by issue number, skipping items that are not issues.
+        """
 
         node_dict = {}
 
         for node in nodes:
-            if not node["content"].get("number"):
+            if not (node.get("content") or {}).get("number"):
                 continue
 
             issue_number = node["content"]["number"]
@@ -485,14 +1146,73 @@ class GitHubAdapter:
 
         return node_dict
 
+    def _normalize_item(self, value: dict) -> dict:
+        """
+        Flatten the field values, labels and assignees of an item node into
+        top-level keys of the node.
+        """
+
+        # add fields to item
+        value.update(self._get_field_values(value))
+
+        # add labels to item
+        labels = [
+            label["node"]["name"]
+            for label in value.get("content", {}).get("labels", {}).get("edges", [])
+        ]
+
+        value["labels"] = labels
+
+        # add assignees to item
+        assignees = [
+            assignee["login"]
+            for assignee in value.get("content", {})
+            .get("assignees", {})
+            .get("nodes", [])
+        ]
+
+        value["assignees"] = assignees
+
+        return value
+
+    def _get_field_values(self, node: dict) -> dict:
+        """
+        Returns the board field values of an item node by field name.
+        """
+
+        fields = [
+            field for field in node.get("fieldValues", {}).get("nodes", []) if field
+        ]
+        fields.extend(
+            field
+            for key, field in node.items()
+            if key.startswith(FIELD_VALUE_ALIAS) and field
+        )
+
+        return {
+            field["field"]["name"]: field.get("text") or field.get("name")
+            for field in fields
+        }
+
+    def _matches_filter(self, values: dict) -> bool:
+        """
+        Check whether the field values of an item pass the item filter.
+        """
+
+        return all(
+            values.get(name) in options for name, options in self._item_filter.items()
+        )
+
     def _process_nodes(self):
         """
-        Returns a list of node tuples for node types specified in the
-        adapter constructor.
+        Yields node tuples for node types specified in the adapter
+        constructor, streaming the items as they are downloaded.
         """
 
         logger.info("Generating nodes.")
 
+        self._ensure_api()
+
         # Fields
         for field in self._fields:
             if field["name"] not in [
@@ -506,43 +1226,10 @@ class GitHubAdapter:
                 name = option["name"].lower()
                 type = field["name"].lower()
 
-                self._nodes.append((name, type, {}))
+                yield (name, type, {})
 
         # Individual cards
-        for key, value in self._items.items():
-            # add fields to item
-            fields = [
-                field
-                for field in value.get("fieldValues", {}).get("nodes", [])
-                if field
-            ]
-
-            for field in fields:
-                field_type = field["field"]["name"]
-                field_value = field.get("text") or field.get("name")
-                value[field_type] = field_value
-
-            # add labels to item
-            labels = [
-                label["node"]["name"]
-                for label in value.get("content", {}).get("labels", {}).get("edges", [])
-            ]
-
-            value["labels"] = labels
-
-            # add assignees to item
-            assignees = [
-                assignee["login"]
-                for assignee in value.get("content", {})
-                .get("assignees", {})
-                .get("nodes", [])
-            ]
-
-            value["assignees"] = assignees
-
-            # add back to _items
-            self._items[key] = value
-
+        for value in self._iter_items():
             title = value.get("Title")
 
             if not title:
@@ -554,29 +1241,32 @@ class GitHubAdapter:
             status = value.get("Status")
             timeslot = value.get("Timeslot")
 
-            self._nodes.append(
-                (
-                    value["id"],
-                    label,
-                    {
-                        "title": title,
-                        "duration": duration,
-                        "timeslot": timeslot,
-                        "status": status,
-                        "labels": labels,
-                        "assignees": assignees,
-                        "issue": key,
-                    },
-                )
+            yield (
+                value["id"],
+                label,
+                {
+                    "title": title,
+                    "duration": duration,
+                    "timeslot": timeslot,
+                    "status": status,
+                    "labels": value["labels"],
+                    "assignees": value["assignees"],
+                    "issue": value["content"]["number"],
+                },
             )
 
-        # Edges to fields
-        for key, value in self._items.items():
-            for assignee in value.get("assignees", []):
-                if assignee not in self._nodes:
-                    self._nodes.append((assignee, "person", {}))
+            # Persons attending the card; get_nodes drops repeated persons
+            for assignee in value["assignees"]:
+                yield (assignee, "person", {})
 
-                self._edges.append((None, assignee, value["id"], "attends", {}))
+    def _process_attendance(self):
+        """
+        Yields the edges from persons to the cards they are assigned to.
+        """
+
+        for value in self._iter_items():
+            for assignee in value["assignees"]:
+                yield (None, assignee, value["id"], "attends", {})
 
     def _get_label(self):
         """
@@ -587,13 +1277,13 @@ class GitHubAdapter:
 
     def _process_edges(self):
         """
-        Returns a list of edge tuples for edge types specified in the
-        adapter constructor.
+        Yields edge tuples for edge types specified in the adapter
+        constructor. Needs all items, since edges point between them.
         """
 
         logger.info("Generating edges.")
 
-        for value in self._items.values():
+        for value in list(self._iter_items()):
             uses = self._extract_uses(value["content"]["body"])
 
             parent = "i" + str(value["content"]["number"])
@@ -604,7 +1294,7 @@ class GitHubAdapter:
 
                 part = use.replace("#", "i")
 
-                self._edges.append((None, part, parent, "part of", {}))
+                yield (None, part, parent, "part of", {})
 
                 # also connect pipelines to the adapter's data type
                 if value.get("Component Type") == "Pipeline":
@@ -617,7 +1307,7 @@ class GitHubAdapter:
                     if not data_type:
                         continue
 
-                    self._edges.append((None, parent, data_type.lower(), "uses", {}))
+                    yield (None, parent, data_type.lower(), "uses", {})
 
     def _extract_uses(self, body) -> list:
         """
@@ -637,19 +1327,71 @@ class GitHubAdapter:
 
         return []
 
+    def to_records(self) -> dict:
+        """
+        Export the graph as columnar records, without BioCypher: the direct
+        input of the scheduler.
+
+        Every node label becomes a table with an "id" column followed by the
+        node properties (e.g. "club" with "title", "duration", "timeslot",
+        "status", "labels", "assignees" and "issue"; "person" with just
+        "id"), and every edge label a table with "source_id" and "target_id"
+        columns followed by the edge properties (e.g. "attends"). Properties
+        a node or edge does not have are None. The "club", "person",
+        "attends" and "part of" tables are returned with their columns even
+        if the project has no items.
+
+        Returns:
+            Dict of table name to a dict of column name to list of values,
+            ready for `pandas.DataFrame`.
+        """
+
+        if not self._nodes_complete:
+            for _ in self.get_nodes():
+                pass
+
+        if not self._edges_complete:
+            for _ in self.get_edges():
+                pass
+
+        rows = {label: [] for label in RECORD_COLUMNS}
+
+        for node_id, label, properties in self._graph.nodes():
+            rows.setdefault(label, []).append({"id": node_id, **properties})
+
+        for _, source, target, label, properties in self._graph.edges():
+            rows.setdefault(label, []).append(
+                {"source_id": source, "target_id": target, **properties}
+            )
+
+        records = {}
+
+        for label, table in rows.items():
+            columns = dict.fromkeys(RECORD_COLUMNS.get(label, ()))
+            columns.update(dict.fromkeys(key for row in table for key in row))
+            records[label] = {
+                column: [row.get(column) for row in table] for column in columns
+            }
+
+        return records
+
     def get_node_count(self):
         """
         Returns the number of nodes generated by the adapter.
         """
-        return len(self.get_nodes())
+        if not self._nodes_complete:
+            for _ in self.get_nodes():
+                pass
+
+        return self._graph.node_count()
 
     def _set_types_and_fields(self, node_types, node_fields, edge_types, edge_fields):
-        if node_types:
+        if node_types is not None:
             self.node_types = node_types
         else:
             self.node_types = [type for type in GitHubAdapterNodeType]
 
-        if node_fields:
+        if node_fields is not None:
             self.node_fields = node_fields
         else:
             self.node_fields = [
@@ -659,12 +1401,35 @@ class GitHubAdapter:
                 )
             ]
 
-        if edge_types:
+        if edge_types is not None:
             self.edge_types = edge_types
         else:
             self.edge_types = [type for type in GitHubAdapterEdgeType]
 
-        if edge_fields:
+        if edge_fields is not None:
             self.edge_fields = edge_fields
         else:
             self.edge_fields = [field for field in chain()]
+
+    def _set_selection(self, item_filter: dict):
+        """
+        Derive the board and issue fields to download from the requested node
+        fields, edge types and item filter.
+        """
+
+        self._item_filter = {
+            name: sorted([options] if isinstance(options, str) else options)
+            for name, options in (item_filter or {}).items()
+        }
+
+        field_names, content_fields = (list(fields) for fields in REQUIRED_FIELDS)
+
+        for source in chain(self.node_fields, self.edge_types, self._item_filter):
+            board, content = FIELD_SOURCES.get(source, ((source,), ()))
+            field_names.extend(board)
+            content_fields.extend(content)
+
+        self._field_names = list(dict.fromkeys(field_names))
+        self._selection = item_selection(
+            self._field_names, list(dict.fromkeys(content_fields))
+        )
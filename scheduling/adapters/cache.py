@@ -0,0 +1,230 @@
+import copy
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+from biocypher._logger import logger
+
+
+class ItemSnapshot:
+    """
+    Gzip-compressed local snapshot of project items, keyed by item ID.
+
+    Each entry stores the raw item node as returned by the API together with
+    its version, the later of the item's and its content's `updatedAt`. A
+    sync compares these versions with a cheap listing of the board and only
+    downloads items that are new or changed; items that disappeared from the
+    board are dropped.
+
+    Args:
+        path: Location of the snapshot file.
+        project_id: Node ID of the project; a snapshot of another project is
+            ignored.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, project_id: str):
+        self.path = path
+        self.project_id = project_id
+        self.items = {}
+        self.synced_at = None
+
+    def load(self) -> bool:
+        """
+        Read the snapshot from disk.
+
+        Returns:
+            True if a compatible snapshot was loaded.
+        """
+
+        if not os.path.exists(self.path):
+            return False
+
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable item snapshot {self.path}: {e}")
+            return False
+
+        if (
+            snapshot.get("version") != self.VERSION
+            or snapshot.get("project_id") != self.project_id
+        ):
+            logger.info(f"Ignoring outdated item snapshot {self.path}.")
+            return False
+
+        self.items = snapshot.get("items", {})
+        self.synced_at = snapshot.get("synced_at")
+
+        return True
+
+    def save(self):
+        """
+        Write the snapshot to disk atomically.
+        """
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self.synced_at = datetime.now(timezone.utc).isoformat()
+        snapshot = {
+            "version": self.VERSION,
+            "project_id": self.project_id,
+            "synced_at": self.synced_at,
+            "items": self.items,
+        }
+
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def diff(self, versions: dict) -> tuple:
+        """
+        Compare current item versions with the snapshot.
+
+        Args:
+            versions: Dict of item ID to its current version.
+
+        Returns:
+            IDs of new or changed items, oldest change first, and IDs of
+            items that no longer exist.
+        """
+
+        changed = [
+            item_id
+            for item_id, version in versions.items()
+            if self.items.get(item_id, {}).get("version") != version
+        ]
+        changed.sort(key=lambda item_id: versions[item_id] or "")
+
+        deleted = [item_id for item_id in self.items if item_id not in versions]
+
+        return changed, deleted
+
+    def merge(self, nodes: list, versions: dict, deleted: list):
+        """
+        Insert or replace downloaded item nodes and drop deleted items.
+        """
+
+        for node in nodes:
+            self.items[node["id"]] = {
+                "version": versions.get(node["id"]),
+                "node": node,
+            }
+
+        for item_id in deleted:
+            self.items.pop(item_id, None)
+
+    def nodes(self) -> list:
+        """
+        Returns copies of all item nodes in the snapshot.
+        """
+
+        return [copy.deepcopy(entry["node"]) for entry in self.items.values()]
+
+
+def item_version(node: dict) -> str:
+    """
+    Returns the version of an item node: the later of the item's and its
+    content's `updatedAt` timestamp.
+    """
+
+    content = node.get("content") or {}
+
+    return max(node.get("updatedAt") or "", content.get("updatedAt") or "")
+
+
+class ProjectMetadata:
+    """
+    Local cache of the metadata of a project: its node ID and the schema of
+    its fields and options, which hardly ever change but otherwise cost two
+    sequential requests before any item can be fetched.
+
+    Args:
+        path: Location of the cache file.
+        organization: Login of the organization owning the project.
+        number: Number of the project within the organization.
+        ttl: Seconds after which the cached metadata are downloaded again.
+        clock: Wall clock in seconds since the epoch, replaceable for testing.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, path: str, organization: str, number: int, ttl: float, clock=time.time
+    ):
+        self.path = path
+        self.organization = organization
+        self.number = number
+        self.ttl = ttl
+        self.clock = clock
+
+    def load(self):
+        """
+        Read the metadata from disk.
+
+        Returns:
+            The project ID and fields, or None if there are no metadata of
+            this project younger than the TTL.
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                metadata = json.load(f)
+            fetched_at = datetime.fromisoformat(metadata["fetched_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable project metadata {self.path}: {e}")
+            return None
+
+        if (
+            metadata.get("version") != self.VERSION
+            or metadata.get("organization") != self.organization
+            or metadata.get("number") != self.number
+        ):
+            return None
+
+        age = self.clock() - fetched_at.timestamp()
+        if age > self.ttl:
+            logger.info(f"Project metadata {self.path} expired.")
+            return None
+
+        return metadata["project_id"], metadata["fields"]
+
+    def save(self, project_id: str, fields: list):
+        """
+        Write the metadata to disk atomically.
+        """
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        metadata = {
+            "version": self.VERSION,
+            "organization": self.organization,
+            "number": self.number,
+            "fetched_at": datetime.fromtimestamp(
+                self.clock(), timezone.utc
+            ).isoformat(),
+            "project_id": project_id,
+            "fields": fields,
+        }
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def invalidate(self):
+        """
+        Delete the cached metadata.
+        """
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
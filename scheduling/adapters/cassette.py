@@ -0,0 +1,292 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+from biocypher._logger import logger
+
+RECORD = "record"
+REPLAY = "replay"
+
+MUTATION_ALIAS = re.compile(r"(?:(\w+)\s*:\s*)?updateProjectV2ItemFieldValue\b")
+
+# response headers that are never written to a fixture
+SENSITIVE_HEADERS = frozenset(
+    {
+        "authorization",
+        "set-cookie",
+        "x-accepted-oauth-scopes",
+        "x-github-request-id",
+        "x-github-sso",
+        "x-oauth-client-id",
+        "x-oauth-scopes",
+    }
+)
+
+REDACTED = "[redacted]"
+
+
+class CassetteMissError(LookupError):
+    """
+    Raised in replay mode when a request was never recorded.
+    """
+
+
+class CassetteSession:
+    """
+    Drop-in replacement for the `requests.Session` of a `GraphQLTransport`
+    that records GraphQL exchanges to, or replays them from, a gzip-compressed
+    fixture file.
+
+    Requests are matched on their whitespace-normalized query and variables.
+    A request that was recorded several times is answered with its responses
+    in the recorded order, repeating the last one. Because the session sits
+    below the transport, replayed runs go through the same retry and backoff
+    code as live runs.
+
+    In replay mode, a request that was not recorded raises
+    `CassetteMissError`, so a run that diverges from its recording fails
+    loudly. With `allow_unrecorded_mutations`, unrecorded mutations are
+    instead answered with a successful empty result for each alias, e.g. for
+    pipelines that place clubs in a different order on every run.
+
+    Before an exchange is recorded, the headers in `SENSITIVE_HEADERS` are
+    dropped, the values of `scrub_fields` anywhere in the JSON body are
+    replaced, and `scrubber` may rewrite it further.
+
+    Args:
+        path: Location of the fixture file.
+        mode: "record" or "replay".
+        latency: Seconds to wait before answering each replayed request.
+        error_rate: Probability of answering a replayed request with a 502.
+        seed: Seed for the injected errors.
+        session: Session used to reach the API in record mode.
+        allow_unrecorded_mutations: Answer unrecorded mutations with success
+            in replay mode instead of raising.
+        scrub_fields: Names of JSON fields whose values are redacted in
+            recorded response bodies, e.g. `("email", "login")`.
+        scrubber: Function called with each exchange (a dict with
+            "status", "headers" and "body") before it is recorded, returning
+            the exchange to store.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = REPLAY,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = None,
+        session: requests.Session = None,
+        allow_unrecorded_mutations: bool = False,
+        scrub_fields=(),
+        scrubber=None,
+    ):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}.")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.error_rate = error_rate
+        self.allow_unrecorded_mutations = allow_unrecorded_mutations
+        self.scrub_fields = frozenset(scrub_fields)
+        self.scrubber = scrubber
+        self.headers = CaseInsensitiveDict()
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._exchanges = {}
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            self._session = session or requests.Session()
+            atexit.register(self.save)
+
+    def post(self, url: str, json: dict = None, timeout=None, **kwargs):
+        payload = json
+        key = self._key(payload)
+
+        if self.mode == RECORD:
+            self._session.headers.update(self.headers)
+            response = self._session.post(url, json=payload, timeout=timeout, **kwargs)
+            if response.status_code < 500 and response.status_code != 429:
+                self._record(key, payload, response)
+            return response
+
+        return self._replay(key, payload)
+
+    def save(self):
+        """
+        Write all recorded exchanges to the fixture file.
+        """
+
+        if self.mode != RECORD:
+            return
+
+        with self._lock:
+            exchanges = dict(self._exchanges)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(exchanges, f, separators=(",", ":"), sort_keys=True)
+
+        logger.info(f"Recorded {len(exchanges)} GraphQL requests to {self.path}.")
+
+    def close(self):
+        self.save()
+        if self.mode == RECORD:
+            self._session.close()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            self._exchanges = json.load(f)
+
+    def _record(self, key: str, payload: dict, response):
+        exchange = self._scrub(
+            {
+                "status": response.status_code,
+                "headers": dict(response.headers),
+                "body": response.text,
+            }
+        )
+
+        with self._lock:
+            entry = self._exchanges.setdefault(
+                key, {"request": payload, "responses": []}
+            )
+            entry["responses"].append(exchange)
+
+    def _replay(self, key: str, payload: dict):
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._response(502, {}, "Injected error")
+
+        with self._lock:
+            entry = self._exchanges.get(key)
+            if entry is not None:
+                position = self._positions.get(key, 0)
+                self._positions[key] = position + 1
+                responses = entry["responses"]
+                exchange = responses[min(position, len(responses) - 1)]
+                return self._response(
+                    exchange["status"], exchange["headers"], exchange["body"]
+                )
+
+        query = (payload or {}).get("query", "")
+        aliases = MUTATION_ALIAS.findall(query)
+        if (
+            self.allow_unrecorded_mutations
+            and query.lstrip().startswith("mutation")
+            and aliases
+        ):
+            data = {
+                alias or "updateProjectV2ItemFieldValue": {"clientMutationId": None}
+                for alias in aliases
+            }
+            return self._response(200, {}, json.dumps({"data": data}))
+
+        raise CassetteMissError(
+            f"No recorded interaction for key {key[:12]} in {self.path}: "
+            f"{' '.join(query.split())[:80]}"
+        )
+
+    def _scrub(self, exchange: dict) -> dict:
+        exchange["headers"] = {
+            name: value
+            for name, value in exchange["headers"].items()
+            if name.lower() not in SENSITIVE_HEADERS
+        }
+
+        if self.scrub_fields:
+            try:
+                body = json.loads(exchange["body"])
+            except ValueError:
+                pass
+            else:
+                exchange["body"] = json.dumps(self._redact(body))
+
+        if self.scrubber is not None:
+            exchange = self.scrubber(exchange)
+
+        return exchange
+
+    def _redact(self, value):
+        if isinstance(value, dict):
+            return {
+                key: REDACTED if key in self.scrub_fields else self._redact(item)
+                for key, item in value.items()
+            }
+
+        if isinstance(value, list):
+            return [self._redact(item) for item in value]
+
+        return value
+
+    def _response(self, status: int, headers: dict, body: str):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body.encode("utf-8")
+        response.encoding = "utf-8"
+
+        return response
+
+    def _key(self, payload: dict) -> str:
+        payload = payload or {}
+        query = " ".join(payload.get("query", "").split())
+        variables = json.dumps(payload.get("variables") or {}, sort_keys=True)
+
+        return hashlib.sha256(f"{query}\n{variables}".encode("utf-8")).hexdigest()
+
+
+def cassette_from_env(path: str = None, mode: str = None):
+    """
+    Create a `CassetteSession` from arguments, falling back to environment
+    variables.
+
+    BIOCYPHER_GITHUB_CASSETTE sets the fixture file and
+    BIOCYPHER_GITHUB_CASSETTE_MODE the mode ("replay" by default).
+    BIOCYPHER_GITHUB_CASSETTE_LATENCY, BIOCYPHER_GITHUB_CASSETTE_ERROR_RATE
+    and BIOCYPHER_GITHUB_CASSETTE_SEED configure injected latency and errors
+    in replay mode. BIOCYPHER_GITHUB_CASSETTE_ALLOW_MUTATIONS=1 answers
+    unrecorded mutations with success, and BIOCYPHER_GITHUB_CASSETTE_SCRUB
+    lists comma-separated JSON fields to redact when recording.
+
+    Returns:
+        A `CassetteSession`, or None if no fixture file is configured.
+    """
+
+    path = path or os.getenv("BIOCYPHER_GITHUB_CASSETTE")
+    if not path:
+        return None
+
+    mode = mode or os.getenv("BIOCYPHER_GITHUB_CASSETTE_MODE", REPLAY)
+    seed = os.getenv("BIOCYPHER_GITHUB_CASSETTE_SEED")
+
+    return CassetteSession(
+        path,
+        mode=mode,
+        latency=float(os.getenv("BIOCYPHER_GITHUB_CASSETTE_LATENCY", 0)),
+        error_rate=float(os.getenv("BIOCYPHER_GITHUB_CASSETTE_ERROR_RATE", 0)),
+        seed=int(seed) if seed else None,
+        allow_unrecorded_mutations=os.getenv(
+            "BIOCYPHER_GITHUB_CASSETTE_ALLOW_MUTATIONS", ""
+        ).lower()
+        in ("1", "true", "yes"),
+        scrub_fields=[
+            name.strip()
+            for name in os.getenv("BIOCYPHER_GITHUB_CASSETTE_SCRUB", "").split(",")
+            if name.strip()
+        ],
+    )
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from biocypher._logger import logger
+from scheduling.adapters.mutations import FieldUpdate
+
+
+class MutationDispatcher:
+    """
+    Sends project field updates concurrently in the background while the
+    caller keeps working.
+
+    The dispatcher runs its own event loop in a daemon thread. `submit` and
+    `submit_chunk` only enqueue updates and return immediately; each chunk is
+    sent as one aliased mutation document as soon as one of `concurrency`
+    slots is free. A chunk waits for the earlier chunks that update any of
+    its items, so the status, timeslot and duration of one card are always
+    written in submission order and never race each other. Chunks of
+    different items run in parallel. Once a request fails for good, e.g. on
+    an exhausted rate limit, chunks that have not been sent yet are dropped
+    and their futures cancelled.
+
+    Args:
+        adapter: The `GitHubAdapter` whose project is updated.
+        concurrency: Maximum number of requests in flight.
+    """
+
+    def __init__(self, adapter, concurrency: int = 4):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1.")
+
+        self._adapter = adapter
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="mutation"
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tails = {}
+        self._tasks = []
+        self._cancelled = False
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="mutation-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, item_id: str, field_name: str, option_name: str):
+        """
+        Enqueue a single-select field update without waiting for it.
+
+        Returns:
+            A `concurrent.futures.Future` resolving to the `MutationResult`.
+
+        Raises:
+            UnknownFieldOptionError: If the field or option does not exist.
+        """
+
+        update = self._adapter.make_update(item_id, field_name, option_name)
+
+        return self.submit_update(update)
+
+    def submit_update(self, update: FieldUpdate):
+        """
+        Enqueue a resolved `FieldUpdate` without waiting for it.
+
+        Returns:
+            A `concurrent.futures.Future` resolving to the `MutationResult`.
+        """
+
+        return asyncio.run_coroutine_threadsafe(self._schedule_one(update), self._loop)
+
+    def submit_chunk(self, updates: list):
+        """
+        Enqueue resolved `FieldUpdate`s to be sent in one mutation document,
+        without waiting for them.
+
+        Returns:
+            A `concurrent.futures.Future` resolving to the list of their
+            `MutationResult`s, or raising the error that aborted the request.
+        """
+
+        return asyncio.run_coroutine_threadsafe(
+            self._schedule(list(updates)), self._loop
+        )
+
+    async def flush(self) -> list:
+        """
+        Wait until every update submitted so far has been sent.
+
+        Returns:
+            The `MutationResult` of each update, in submission order.
+        """
+
+        future = asyncio.run_coroutine_threadsafe(self._drain(), self._loop)
+
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """
+        Stop the event loop and the worker threads. Pending updates are
+        dropped; call `flush` first.
+        """
+
+        if self._loop.is_closed():
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=True)
+
+    async def _schedule_one(self, update: FieldUpdate):
+        (result,) = await self._schedule([update])
+
+        return result
+
+    async def _schedule(self, updates: list) -> list:
+        # runs on the dispatcher loop; coroutines started with
+        # run_coroutine_threadsafe begin in submission order, so chaining
+        # onto the previous tasks of the same items preserves per-item order
+        previous = {
+            self._tails[update.item_id]
+            for update in updates
+            if update.item_id in self._tails
+        }
+        task = self._loop.create_task(self._run(updates, previous))
+        for update in updates:
+            self._tails[update.item_id] = task
+        self._tasks.append(task)
+
+        return await task
+
+    async def _run(self, updates: list, previous: set) -> list:
+        if previous:
+            await asyncio.wait(previous)
+
+        async with self._semaphore:
+            if self._cancelled:
+                raise asyncio.CancelledError()
+
+            try:
+                results = await self._loop.run_in_executor(
+                    self._executor, self._adapter.send_updates, updates
+                )
+            except Exception:
+                self._cancelled = True
+                raise
+
+        for result in results:
+            if not result.ok:
+                logger.error(
+                    f"Could not set {result.update.description} on item "
+                    f"{result.update.item_id}: {result.error}"
+                )
+
+        return results
+
+    async def _drain(self) -> list:
+        # let the _schedule coroutines submitted before this call create
+        # their tasks first
+        await asyncio.sleep(0)
+
+        tasks, self._tasks = self._tasks, []
+        chunks = await asyncio.gather(*tasks)
+
+        self._tails = {
+            item_id: task for item_id, task in self._tails.items() if not task.done()
+        }
+
+        return [result for chunk in chunks for result in chunk]
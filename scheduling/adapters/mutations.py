@@ -0,0 +1,142 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+# GitHub weighs every mutation at five points against the secondary rate limit
+# of 2,000 points per minute and rejects documents above 500,000 nodes. Fifty
+# single-select updates per document stays well below both limits while still
+# collapsing a whole week's write-back into a handful of requests.
+MAX_MUTATIONS_PER_DOCUMENT = 50
+
+# Start of GitHub's error message for node IDs that do not exist (anymore),
+# e.g. of a field or option that was deleted and created again
+UNKNOWN_ID_ERROR = "Could not resolve to a node"
+
+
+@dataclass(frozen=True)
+class FieldUpdate:
+    """
+    A single ``updateProjectV2ItemFieldValue`` operation on a single-select
+    field of a project item.
+
+    Args:
+        item_id: Node ID of the project item (card).
+        field_id: Node ID of the single-select field.
+        option_id: Node ID of the option to select.
+        description: Human-readable form of the update, used in logs.
+        field_name: Name of the field, if known.
+        option_name: Name of the option to select, if known.
+        previous: Option selected before the update, if known.
+    """
+
+    item_id: str
+    field_id: str
+    option_id: str
+    description: str = ""
+    field_name: str = ""
+    option_name: str = ""
+    previous: Optional[str] = None
+
+
+@dataclass
+class MutationResult:
+    """
+    Outcome of one aliased mutation within a batched document.
+    """
+
+    update: FieldUpdate
+    alias: str
+    ok: bool
+    error: Optional[str] = None
+
+
+def chunked(updates: list, size: int = MAX_MUTATIONS_PER_DOCUMENT):
+    """
+    Split a list of updates into consecutive chunks of at most `size`.
+    """
+
+    if size < 1:
+        raise ValueError("Chunk size must be at least 1.")
+
+    for start in range(0, len(updates), size):
+        yield updates[start : start + size]
+
+
+def build_mutation_document(project_id: str, updates: list) -> tuple:
+    """
+    Build one GraphQL document with an aliased mutation per update.
+
+    Returns:
+        The document and a dict mapping each alias to its update.
+    """
+
+    aliases = {}
+    operations = []
+
+    for i, update in enumerate(updates):
+        alias = f"m{i}"
+        aliases[alias] = update
+        operations.append(
+            "%s: updateProjectV2ItemFieldValue (input: {fieldId: %s, itemId: %s, "
+            "projectId: %s, value: {singleSelectOptionId: %s} }) "
+            "{ clientMutationId }"
+            % (
+                alias,
+                json.dumps(update.field_id),
+                json.dumps(update.item_id),
+                json.dumps(project_id),
+                json.dumps(update.option_id),
+            )
+        )
+
+    document = "mutation {\n  %s\n}" % "\n  ".join(operations)
+
+    return document, aliases
+
+
+def parse_mutation_response(response_json: dict, aliases: dict) -> list:
+    """
+    Map a GraphQL response back onto the aliases of a batched document.
+
+    An alias counts as successful if its key is present and non-null in
+    ``data`` and no error points at it. Errors without a path cannot be
+    attributed and fail every alias that did not return data.
+    """
+
+    data = response_json.get("data") or {}
+    errors = response_json.get("errors") or []
+
+    alias_errors = {}
+    global_errors = []
+
+    for error in errors:
+        message = error.get("message", "Unknown error")
+        path = error.get("path") or []
+        if path and path[0] in aliases:
+            alias_errors.setdefault(path[0], []).append(message)
+        else:
+            global_errors.append(message)
+
+    results = []
+
+    for alias, update in aliases.items():
+        if alias in alias_errors:
+            results.append(
+                MutationResult(update, alias, False, "; ".join(alias_errors[alias]))
+            )
+        elif data.get(alias) is None:
+            message = "; ".join(global_errors) or "No data returned."
+            results.append(MutationResult(update, alias, False, message))
+        else:
+            results.append(MutationResult(update, alias, True))
+
+    return results
+
+
+def is_unknown_id_error(result: MutationResult) -> bool:
+    """
+    Check whether an update failed because one of its IDs is not known to
+    GitHub.
+    """
+
+    return not result.ok and UNKNOWN_ID_ERROR in (result.error or "")
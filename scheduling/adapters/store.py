@@ -0,0 +1,133 @@
+class GraphStore:
+    """
+    Hash-indexed store of BioCypher node and edge tuples.
+
+    Nodes are keyed by `(id, label)` and edges by `(source, target, label)`,
+    so inserting a duplicate is an O(1) lookup that merges the new properties
+    into the stored ones instead of adding another tuple. Edges are also
+    indexed by each endpoint.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._edges = {}
+        self._edge_ids = {}
+        self._outgoing = {}
+        self._incoming = {}
+
+    def add_node(self, node_id: str, label: str, properties: dict = None) -> bool:
+        """
+        Insert a node or merge its properties into an existing one.
+
+        Returns:
+            True if the node is new.
+        """
+
+        key = (node_id, label)
+        stored = self._nodes.get(key)
+
+        if stored is None:
+            self._nodes[key] = dict(properties or {})
+            return True
+
+        stored.update(properties or {})
+        return False
+
+    def add_edge(
+        self,
+        edge_id: str,
+        source: str,
+        target: str,
+        label: str,
+        properties: dict = None,
+    ) -> bool:
+        """
+        Insert an edge or merge its properties into an existing one.
+
+        Returns:
+            True if the edge is new.
+        """
+
+        key = (source, target, label)
+        stored = self._edges.get(key)
+
+        if stored is None:
+            self._edges[key] = dict(properties or {})
+            self._edge_ids[key] = edge_id
+            self._outgoing.setdefault(source, []).append(key)
+            self._incoming.setdefault(target, []).append(key)
+            return True
+
+        stored.update(properties or {})
+        if edge_id is not None:
+            self._edge_ids[key] = edge_id
+        return False
+
+    def has_node(self, node_id: str, label: str) -> bool:
+        return (node_id, label) in self._nodes
+
+    def get_node(self, node_id: str, label: str):
+        """
+        Returns the node tuple for `(node_id, label)`, or None.
+        """
+
+        properties = self._nodes.get((node_id, label))
+
+        if properties is None:
+            return None
+
+        return (node_id, label, properties)
+
+    def nodes(self, label: str = None):
+        """
+        Iterate over node tuples in insertion order, optionally of one label.
+        """
+
+        for (node_id, node_label), properties in self._nodes.items():
+            if label is None or node_label == label:
+                yield (node_id, node_label, properties)
+
+    def edges(self, label: str = None):
+        """
+        Iterate over edge tuples in insertion order, optionally of one label.
+        """
+
+        for key, properties in self._edges.items():
+            if label is None or key[2] == label:
+                yield self._edge_tuple(key, properties)
+
+    def edges_from(self, source: str):
+        """
+        Iterate over the edges leaving `source`.
+        """
+
+        for key in self._outgoing.get(source, []):
+            yield self._edge_tuple(key, self._edges[key])
+
+    def edges_to(self, target: str):
+        """
+        Iterate over the edges entering `target`.
+        """
+
+        for key in self._incoming.get(target, []):
+            yield self._edge_tuple(key, self._edges[key])
+
+    def node_count(self) -> int:
+        return len(self._nodes)
+
+    def edge_count(self) -> int:
+        return len(self._edges)
+
+    def clear_nodes(self):
+        self._nodes.clear()
+
+    def clear_edges(self):
+        self._edges.clear()
+        self._edge_ids.clear()
+        self._outgoing.clear()
+        self._incoming.clear()
+
+    def _edge_tuple(self, key: tuple, properties: dict) -> tuple:
+        source, target, label = key
+
+        return (self._edge_ids[key], source, target, label, properties)
@@ -0,0 +1,208 @@
+import time
+import email.utils
+import requests
+from requests.adapters import HTTPAdapter
+from biocypher._logger import logger
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GitHubAPIError(RuntimeError):
+    """
+    Raised when a GraphQL request fails permanently or keeps failing after all
+    retries have been used up.
+    """
+
+    def __init__(self, message: str, status_code: int = None, errors: list = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.errors = errors or []
+
+
+class GraphQLTransport:
+    """
+    Shared HTTP transport for the GitHub GraphQL API.
+
+    Keeps one pooled keep-alive session for all requests and retries transient
+    failures (connection errors, 5xx responses, primary and secondary rate
+    limits) with exponential backoff. `Retry-After` and `X-RateLimit-Reset`
+    headers take precedence over the computed backoff. All requests the
+    adapter sends are safe to repeat: queries are read-only and
+    `updateProjectV2ItemFieldValue` sets an absolute value.
+
+    Args:
+        url: GraphQL endpoint.
+        headers: Headers sent with every request, e.g. the authorization.
+        timeout: Connect and read timeout in seconds, as a single number or a
+            `(connect, read)` tuple.
+        max_retries: Number of retries after the first attempt.
+        backoff_factor: Base delay in seconds; attempt `n` waits
+            `backoff_factor * 2 ** n`.
+        max_backoff: Upper bound for any single wait, including waits
+            requested by the server.
+        pool_maxsize: Number of connections kept alive in the pool.
+        session: Optional preconfigured `requests.Session`.
+        sleep: Function used to wait between attempts.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: dict = None,
+        timeout=(5.0, 30.0),
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 120.0,
+        pool_maxsize: int = 10,
+        session: requests.Session = None,
+        sleep=time.sleep,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self._sleep = sleep
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+        session.headers.update(headers or {})
+        self.session = session
+
+    def execute(self, query: str, variables: dict = None) -> dict:
+        """
+        Send a GraphQL document and return the parsed response JSON, which may
+        contain both `data` and `errors`.
+
+        Raises:
+            GitHubAPIError: If the request fails permanently or all retries
+                are used up.
+        """
+
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+
+        attempt = 0
+
+        while True:
+            try:
+                response = self.session.post(
+                    self.url, json=payload, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise GitHubAPIError(f"Request failed: {e}") from e
+                delay = self._backoff(attempt)
+                logger.warning(f"{e.__class__.__name__}, retrying in {delay:.1f}s.")
+                self._sleep(delay)
+                attempt += 1
+                continue
+
+            response_json = self._parse(response)
+
+            if self._is_retryable(response, response_json):
+                if attempt >= self.max_retries:
+                    raise GitHubAPIError(
+                        f"Giving up after {attempt + 1} attempts: "
+                        f"HTTP {response.status_code}.",
+                        status_code=response.status_code,
+                        errors=response_json.get("errors"),
+                    )
+                delay = self._retry_delay(response, attempt)
+                logger.warning(
+                    f"HTTP {response.status_code} from GitHub, "
+                    f"retrying in {delay:.1f}s."
+                )
+                self._sleep(delay)
+                attempt += 1
+                continue
+
+            if response.status_code >= 400:
+                raise GitHubAPIError(
+                    f"HTTP {response.status_code}: {response.text[:200]}",
+                    status_code=response.status_code,
+                    errors=response_json.get("errors"),
+                )
+
+            return response_json
+
+    def query(self, query: str, variables: dict = None) -> dict:
+        """
+        Send a read-only GraphQL query and return its `data`.
+
+        Raises:
+            GitHubAPIError: If the response carries no data.
+        """
+
+        response_json = self.execute(query, variables)
+        data = response_json.get("data")
+
+        if data is None:
+            errors = response_json.get("errors") or []
+            messages = "; ".join(error.get("message", "") for error in errors)
+            raise GitHubAPIError(f"Query returned no data: {messages}", errors=errors)
+
+        return data
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+
+        self.session.close()
+
+    def _parse(self, response) -> dict:
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def _is_retryable(self, response, response_json: dict) -> bool:
+        if response.status_code in RETRY_STATUS_CODES:
+            return True
+
+        if response.status_code == 403 and (
+            "Retry-After" in response.headers
+            or response.headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in response.text.lower()
+        ):
+            return True
+
+        # the primary rate limit is reported as a GraphQL error with status 200
+        return any(
+            error.get("type") == "RATE_LIMITED"
+            for error in response_json.get("errors") or []
+        )
+
+    def _retry_delay(self, response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            delay = self._parse_retry_after(retry_after)
+            if delay is not None:
+                return min(delay, self.max_backoff)
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return min(max(int(reset) - time.time(), 0.0) + 1.0, self.max_backoff)
+
+        return self._backoff(attempt)
+
+    def _parse_retry_after(self, value: str):
+        if value.strip().isdigit():
+            return float(value)
+
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        return max(date.timestamp() - time.time(), 0.0)
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.backoff_factor * 2**attempt, self.max_backoff)
@@ -0,0 +1,706 @@
+"""
+Per-person availability from local calendar files.
+
+Every person may have one file in the availability directory, named after
+their GitHub login:
+
+- ``<login>.ics``: an iCalendar export; every opaque, non-cancelled event is
+  busy time. Daily and weekly recurrences are expanded only within the
+  scheduling horizon.
+- ``<login>.yaml`` / ``<login>.yml``: a list of busy intervals (optionally
+  under a ``busy`` key) with ``start``, ``end`` and an optional ``day``.
+- ``<login>.csv``: the same intervals as ``start,end,day`` columns.
+
+A busy interval with dates in ``start`` and ``end`` happens once; with times
+only, it repeats on every ``day`` (a weekday name such as ``Mon``, or an ISO
+date) or, without a day, on every day.
+
+Each file is parsed into a few compact `BusyRule` entries, which are cached
+on disk by the hash of the file's content, so that unchanged calendars are
+not parsed again, and then compiled into a bitmask over the timeslots of the
+horizon.
+"""
+
+import csv
+import gzip
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+import yaml
+from biocypher._logger import logger
+from scheduling.engine.timeslots import MINUTES_PER_DAY, TimeslotCalendar
+
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+ICS_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# anchors of rules that repeat on every day or on a weekday, a Monday
+DAILY_ANCHOR = datetime(2000, 1, 3)
+
+_DURATION = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+@dataclass(frozen=True)
+class BusyRule:
+    """
+    A busy interval that happens once or repeats daily or weekly, in local
+    wall-clock time.
+
+    Args:
+        start: Start of the first occurrence, as an ISO datetime.
+        minutes: Length of each occurrence in minutes.
+        freq: None for a single occurrence, "DAILY" or "WEEKLY".
+        interval: Repeat every `interval` days or weeks.
+        weekdays: Weekdays (0 is Monday) of a weekly rule; by default the
+            weekday of `start`.
+        until: ISO datetime after which no occurrence starts.
+        count: Total number of occurrences.
+        exdates: ISO start datetimes of cancelled occurrences.
+    """
+
+    start: str
+    minutes: int
+    freq: Optional[str] = None
+    interval: int = 1
+    weekdays: tuple = ()
+    until: Optional[str] = None
+    count: Optional[int] = None
+    exdates: tuple = field(default_factory=tuple)
+
+    def occurrences(self, window_start: datetime, window_end: datetime):
+        """
+        Yield the `(start, end)` datetimes of all occurrences that overlap
+        the window, without visiting the occurrences before it.
+        """
+
+        first = datetime.fromisoformat(self.start)
+        length = timedelta(minutes=self.minutes)
+        until = datetime.fromisoformat(self.until) if self.until else None
+        exdates = {datetime.fromisoformat(exdate) for exdate in self.exdates}
+
+        for index, start in self._starts(first, length, window_start):
+            if start >= window_end:
+                break
+            if until is not None and start > until:
+                break
+            if self.count is not None and index >= self.count:
+                break
+            if start in exdates or start + length <= window_start:
+                continue
+
+            yield start, start + length
+
+    def _starts(self, first: datetime, length: timedelta, window_start: datetime):
+        """
+        Yield (occurrence index, start) pairs from the first occurrence that
+        may overlap `window_start` on.
+        """
+
+        if self.freq is None:
+            yield 0, first
+            return
+
+        if self.freq == "DAILY":
+            step = timedelta(days=self.interval)
+            skip = max(0, (window_start - length - first) // step)
+            while True:
+                yield skip, first + skip * step
+                skip += 1
+
+        # weekly: occurrences on the given weekdays of every interval-th
+        # week, counted from the week of the first occurrence
+        weekdays = sorted(set(self.weekdays or (first.weekday(),)))
+        monday = first - timedelta(days=first.weekday())
+        step = timedelta(weeks=self.interval)
+        in_first_week = len([day for day in weekdays if day >= first.weekday()])
+
+        week = max(0, (window_start - length - monday) // step)
+        index = 0 if week == 0 else in_first_week + (week - 1) * len(weekdays)
+
+        while True:
+            for day in weekdays:
+                start = monday + week * step + timedelta(days=day)
+                if start < first:
+                    continue
+                yield index, start
+                index += 1
+            week += 1
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Returns the `timedelta` of an ISO 8601 / iCalendar duration such as
+    "PT1H30M".
+    """
+
+    match = _DURATION.match(value.strip())
+
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+
+    parts = {k: int(v) for k, v in match.groupdict().items() if v and k != "sign"}
+    delta = timedelta(**parts)
+
+    return -delta if match.group("sign") == "-" else delta
+
+
+def _ics_datetime(value: str, params: dict, tz) -> datetime:
+    """
+    Parse an iCalendar DATE or DATE-TIME into a naive local datetime. UTC
+    times and times with a TZID are converted to `tz` if it is given.
+    """
+
+    value = value.strip()
+
+    if len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+
+    utc = value.endswith("Z")
+    moment = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+
+    if tz is None:
+        return moment
+
+    if utc:
+        source = ZoneInfo("UTC")
+    elif "TZID" in params:
+        try:
+            source = ZoneInfo(params["TZID"].strip('"'))
+        except (KeyError, ValueError):
+            return moment
+    else:
+        return moment
+
+    return moment.replace(tzinfo=source).astimezone(tz).replace(tzinfo=None)
+
+
+def _unfold(lines):
+    """
+    Join iCalendar continuation lines, which start with a space or tab.
+    """
+
+    current = None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+
+    if current is not None:
+        yield current
+
+
+def _content_line(line: str) -> tuple:
+    """
+    Split an iCalendar content line into name, parameters and value.
+    """
+
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+
+    return (
+        name.upper(),
+        dict(param.split("=", 1) for param in params if "=" in param),
+        value,
+    )
+
+
+def parse_ics(lines, tz=None) -> list:
+    """
+    Stream-parse the busy rules of an iCalendar file, one `BusyRule` per
+    event, however many occurrences it has.
+
+    Args:
+        lines: Iterable of the lines of the file.
+        tz: `ZoneInfo` to convert UTC and TZID times to; by default, all
+            times are taken as local wall-clock times.
+    """
+
+    rules = []
+    overrides = {}
+    event = None
+
+    for line in _unfold(lines):
+        name, params, value = _content_line(line)
+
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {"exdates": []}
+            continue
+
+        if event is None:
+            continue
+
+        if name == "END" and value.upper() == "VEVENT":
+            rule = _event_rule(event, tz)
+            if rule is not None:
+                rules.append((event.get("uid"), rule))
+            if "recurrence_id" in event:
+                overrides.setdefault(event.get("uid"), []).append(
+                    event["recurrence_id"].isoformat()
+                )
+            event = None
+        elif name == "UID":
+            event["uid"] = value
+        elif name == "DTSTART":
+            event["start"] = _ics_datetime(value, params, tz)
+            event["all_day"] = params.get("VALUE") == "DATE" or len(value) == 8
+        elif name == "DTEND":
+            event["end"] = _ics_datetime(value, params, tz)
+        elif name == "DURATION":
+            event["duration"] = parse_duration(value)
+        elif name == "RRULE":
+            event["rrule"] = dict(
+                part.split("=", 1) for part in value.split(";") if "=" in part
+            )
+        elif name == "EXDATE":
+            event["exdates"].extend(
+                _ics_datetime(v, params, tz) for v in value.split(",") if v
+            )
+        elif name == "RECURRENCE-ID":
+            event["recurrence_id"] = _ics_datetime(value, params, tz)
+        elif name == "TRANSP":
+            event["transparent"] = value.upper() == "TRANSPARENT"
+        elif name == "STATUS":
+            event["cancelled"] = value.upper() == "CANCELLED"
+
+    # occurrences moved or cancelled by an override are dropped from the
+    # recurring event they belong to
+    result = []
+    for uid, rule in rules:
+        if rule.freq and overrides.get(uid):
+            rule = BusyRule(
+                **{
+                    **asdict(rule),
+                    "exdates": rule.exdates + tuple(overrides[uid]),
+                }
+            )
+        result.append(rule)
+
+    return result
+
+
+def _event_rule(event: dict, tz=None) -> Optional[BusyRule]:
+    if event.get("transparent") or event.get("cancelled") or "start" not in event:
+        return None
+
+    start = event["start"]
+
+    if "end" in event:
+        length = event["end"] - start
+    elif "duration" in event:
+        length = event["duration"]
+    else:
+        length = timedelta(days=1) if event.get("all_day") else timedelta(0)
+
+    minutes = int(length.total_seconds() // 60)
+    if minutes <= 0:
+        return None
+
+    rrule = event.get("rrule")
+    if "recurrence_id" in event or not rrule:
+        return BusyRule(start.isoformat(), minutes)
+
+    freq = rrule.get("FREQ", "").upper()
+    if freq not in ("DAILY", "WEEKLY"):
+        logger.warning(
+            f"Unsupported recurrence {freq} of event {event.get('uid')}, "
+            "using its first occurrence only."
+        )
+        return BusyRule(start.isoformat(), minutes)
+
+    weekdays = tuple(
+        ICS_WEEKDAYS.index(day[-2:].upper())
+        for day in rrule.get("BYDAY", "").split(",")
+        if day[-2:].upper() in ICS_WEEKDAYS
+    )
+    # a UTC UNTIL is converted like the start times; a date-only UNTIL
+    # includes its whole day
+    until = rrule.get("UNTIL")
+    if until:
+        until = _ics_datetime(until, {}, tz)
+        if len(rrule["UNTIL"].strip()) == 8:
+            until += timedelta(days=1) - timedelta(seconds=1)
+
+    return BusyRule(
+        start=start.isoformat(),
+        minutes=minutes,
+        freq=freq,
+        interval=int(rrule.get("INTERVAL", 1)),
+        weekdays=weekdays if freq == "WEEKLY" else (),
+        until=until.isoformat() if until else None,
+        count=int(rrule["COUNT"]) if "COUNT" in rrule else None,
+        exdates=tuple(exdate.isoformat() for exdate in event["exdates"]),
+    )
+
+
+def _table_value(value):
+    """
+    Returns a table cell as a datetime, date, time or minute of day (YAML
+    reads unquoted "10:00" as the sexagesimal number 600), or None.
+    """
+
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, (datetime, date, int)):
+        return value
+
+    value = str(value).strip()
+
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        pass
+
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid time or date: {value}") from None
+
+
+def _minute_of(value) -> Optional[int]:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+
+    return None
+
+
+def parse_table(rows) -> list:
+    """
+    Returns the busy rules of `start`/`end`/`day` rows from a YAML or CSV
+    file.
+
+    Raises:
+        ValueError: If a row is not a mapping or not a valid interval.
+    """
+
+    rules = []
+
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"Busy interval is not a mapping: {row!r}")
+        try:
+            rules.append(_table_rule(row))
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"Malformed busy interval {row}: {e}") from e
+
+    return rules
+
+
+def _table_rule(row: dict) -> BusyRule:
+    start = _table_value(row.get("start"))
+    end = _table_value(row.get("end"))
+    day = str(row.get("day") or "").strip()
+
+    if start is None:
+        raise ValueError(f"Busy interval without start: {row}")
+
+    # whole days and absolute intervals happen once
+    if isinstance(start, date) and not isinstance(start, datetime):
+        start = datetime.combine(start, time())
+        end = end if end is not None else start + timedelta(days=1)
+        if isinstance(end, date) and not isinstance(end, datetime):
+            end = datetime.combine(end, time())
+
+    if isinstance(start, datetime):
+        if not isinstance(end, datetime):
+            raise ValueError(f"Busy interval needs an end date: {row}")
+        return BusyRule(start.isoformat(), int((end - start).total_seconds() // 60))
+
+    first, last = _minute_of(start), _minute_of(end)
+    if last is None or last <= first:
+        raise ValueError(f"Busy interval must end after it starts: {row}")
+
+    weekday = _weekday(day)
+    if weekday is not None:
+        anchor = DAILY_ANCHOR + timedelta(days=weekday, minutes=first)
+        return BusyRule(anchor.isoformat(), last - first, "WEEKLY", 1, (weekday,))
+
+    if day:
+        anchor = datetime.combine(date.fromisoformat(day), time())
+        anchor += timedelta(minutes=first)
+        return BusyRule(anchor.isoformat(), last - first)
+
+    anchor = DAILY_ANCHOR + timedelta(minutes=first)
+    return BusyRule(anchor.isoformat(), last - first, "DAILY")
+
+
+def _weekday(name: str) -> Optional[int]:
+    """
+    Returns the weekday (0 is Monday) named in a day label such as "Mon",
+    "monday" or "W2 Tue", or None.
+    """
+
+    for word in reversed(name.lower().split()):
+        for weekday, full_name in enumerate(WEEKDAYS):
+            if len(word) >= 2 and full_name.startswith(word):
+                return weekday
+
+    return None
+
+
+def read_rules(path: str, tz=None) -> list:
+    """
+    Parse the busy rules of one availability file, by its extension.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+
+    with open(path, encoding="utf-8", newline="") as f:
+        if extension == ".ics":
+            return parse_ics(f, tz)
+
+        if extension == ".csv":
+            return parse_table(csv.DictReader(f))
+
+        if extension in (".yaml", ".yml"):
+            try:
+                data = yaml.safe_load(f) or []
+            except yaml.YAMLError as e:
+                raise ValueError(f"Malformed YAML: {e}") from e
+            if isinstance(data, dict):
+                data = data.get("busy") or []
+            if not isinstance(data, list):
+                raise ValueError("Expected a list of busy intervals.")
+            return parse_table(data)
+
+    raise ValueError(f"Unsupported availability file: {path}")
+
+
+def file_hash(path: str) -> str:
+    """
+    Returns the SHA-256 of a file's content, read in chunks.
+    """
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class RuleCache:
+    """
+    On-disk cache of parsed busy rules, one gzip JSON file per content hash.
+
+    Args:
+        directory: Cache directory; None disables the cache.
+    """
+
+    # bumped whenever parsing changes, so that older entries are not read
+    VERSION = 2
+
+    def __init__(self, directory: str = None):
+        self.directory = directory
+
+    def rules(self, path: str, tz=None) -> list:
+        """
+        Returns the busy rules of a file, parsing it only if no rules for
+        its current content are cached.
+        """
+
+        if not self.directory:
+            return read_rules(path, tz)
+
+        key = hashlib.sha256(
+            f"{self.VERSION}:{file_hash(path)}:{os.path.splitext(path)[1].lower()}:"
+            f"{tz}".encode()
+        ).hexdigest()
+        cache_path = os.path.join(self.directory, key + ".json.gz")
+
+        if os.path.exists(cache_path):
+            try:
+                with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+                    return [
+                        BusyRule(
+                            **{
+                                **entry,
+                                "weekdays": tuple(entry["weekdays"]),
+                                "exdates": tuple(entry["exdates"]),
+                            }
+                        )
+                        for entry in json.load(f)
+                    ]
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable availability cache: {e}")
+
+        rules = read_rules(path, tz)
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump([asdict(rule) for rule in rules], f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+
+        return rules
+
+
+def horizon_dates(calendar: TimeslotCalendar, start: date) -> list:
+    """
+    Returns the date of every day of a calendar, in order.
+
+    Days named by an ISO date are that date. Days named by a weekday (e.g.
+    "Mon" or "W2 Mon") are the next such weekday after the previous day,
+    starting at `start`, and unnamed days follow the previous day.
+    """
+
+    dates = []
+    current = start
+
+    for day in calendar.days:
+        try:
+            dates.append(date.fromisoformat(day))
+            current = dates[-1] + timedelta(days=1)
+            continue
+        except ValueError:
+            pass
+
+        weekday = _weekday(day)
+        if weekday is not None:
+            current += timedelta(days=(weekday - current.weekday()) % 7)
+
+        dates.append(current)
+        current += timedelta(days=1)
+
+    return dates
+
+
+def compile_mask(rules: list, calendar: TimeslotCalendar, dates: list) -> int:
+    """
+    Compile busy rules into a bitmask over the offsets of the calendar, with
+    a bit set for every timeslot that overlaps a busy interval.
+
+    Args:
+        rules: `BusyRule` entries.
+        calendar: Calendar of the horizon.
+        dates: Date of each day of the calendar, see `horizon_dates`.
+    """
+
+    if not len(calendar) or not dates:
+        return 0
+
+    day_of = {}
+    for index, day in enumerate(dates):
+        day_of.setdefault(day, index)
+
+    window_start = datetime.combine(min(dates), time())
+    window_end = datetime.combine(max(dates), time()) + timedelta(days=1)
+
+    minutes = calendar.minutes
+    granularity = calendar.granularity
+    mask = 0
+
+    for rule in rules:
+        for start, end in rule.occurrences(window_start, window_end):
+            # one piece per calendar day the occurrence touches
+            day = start.date()
+            while datetime.combine(day, time()) < end:
+                index = day_of.get(day)
+                if index is not None:
+                    midnight = datetime.combine(day, time())
+                    first = max(start, midnight) - midnight
+                    last = min(end, midnight + timedelta(days=1)) - midnight
+                    offset = index * MINUTES_PER_DAY
+
+                    lo = minutes.searchsorted(
+                        offset + first.total_seconds() // 60 - granularity, "right"
+                    )
+                    hi = minutes.searchsorted(
+                        offset + -(-last.total_seconds() // 60), "left"
+                    )
+                    if hi > lo:
+                        mask |= ((1 << int(hi - lo)) - 1) << int(lo)
+
+                day += timedelta(days=1)
+
+    return mask
+
+
+def busy_offsets(mask: int) -> tuple:
+    """
+    Returns the offsets of the set bits of a mask, in ascending order.
+    """
+
+    offsets = []
+    offset = 0
+
+    while mask:
+        if mask & 1:
+            offsets.append(offset)
+        mask >>= 1
+        offset += 1
+
+    return tuple(offsets)
+
+
+def load_availability(
+    directory: str,
+    calendar: TimeslotCalendar,
+    dates: list,
+    cache_dir: str = None,
+    timezone: str = None,
+) -> dict:
+    """
+    Compile the availability files of a directory into busy timeslots.
+
+    Args:
+        directory: Directory with one ``<login>.<ics|yaml|yml|csv>`` file
+            per person; a missing directory means everyone is free.
+        calendar: Calendar of the horizon.
+        dates: Date of each day of the calendar, see `horizon_dates`.
+        cache_dir: Directory of the `RuleCache`, or None.
+        timezone: Name of the time zone of the timeslots, e.g.
+            "Europe/Berlin", to which UTC calendar times are converted.
+
+    Returns:
+        Dict of person ID to the sorted offsets of their busy timeslots.
+    """
+
+    if not os.path.isdir(directory):
+        return {}
+
+    tz = ZoneInfo(timezone) if timezone else None
+    cache = RuleCache(cache_dir)
+    busy = {}
+
+    for name in sorted(os.listdir(directory)):
+        person_id, extension = os.path.splitext(name)
+        if extension.lower() not in (".ics", ".yaml", ".yml", ".csv"):
+            continue
+
+        path = os.path.join(directory, name)
+        try:
+            rules = cache.rules(path, tz)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring availability file {path}: {e}")
+            continue
+
+        mask = compile_mask(rules, calendar, dates)
+        busy[person_id] = tuple(
+            sorted(set(busy.get(person_id, ())) | set(busy_offsets(mask)))
+        )
+
+    return busy
@@ -0,0 +1,42 @@
+"""
+I/O-free scheduling engine: typed problem and result models, and the
+strategies that turn one into the other.
+"""
+
+from scheduling.engine.availability import (
+    AvailabilityMatrix,
+    earliest_window,
+    find_windows,
+)
+from scheduling.engine.conflicts import ConflictGraph, Saturation
+from scheduling.engine.exact import BranchAndBound
+from scheduling.engine.intervals import IntervalAvailability
+from scheduling.engine.model import Assignment, Club, Person, Problem, Schedule
+from scheduling.engine.parallel import MultiStart
+from scheduling.engine.repair import Delta, ScheduleRepair, from_timeslots, repair
+from scheduling.engine.strategies import RandomGreedy, Strategy, solve
+from scheduling.engine.timeslots import TimeslotCalendar
+
+__all__ = [
+    "Assignment",
+    "AvailabilityMatrix",
+    "BranchAndBound",
+    "Club",
+    "ConflictGraph",
+    "Delta",
+    "IntervalAvailability",
+    "MultiStart",
+    "Person",
+    "Problem",
+    "RandomGreedy",
+    "Saturation",
+    "Schedule",
+    "ScheduleRepair",
+    "Strategy",
+    "TimeslotCalendar",
+    "earliest_window",
+    "find_windows",
+    "from_timeslots",
+    "repair",
+    "solve",
+]
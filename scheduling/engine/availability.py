@@ -0,0 +1,157 @@
+import numpy as np
+
+
+def find_windows(
+    free: np.ndarray, length: int, allowed: np.ndarray = None
+) -> np.ndarray:
+    """
+    Find all windows of `length` consecutive free timeslots.
+
+    The rows of a 2d input are ANDed first, so a window must be free for
+    everyone. Runs are found with a cumulative sum: the number of free slots
+    in the window starting at `i` is `counts[i + length] - counts[i]`, which
+    makes the search O(T) regardless of the window length.
+
+    Args:
+        free: Boolean vector of timeslots, or person x timeslot matrix.
+        length: Number of consecutive timeslots needed.
+        allowed: Optional boolean vector of permitted start offsets, e.g.
+            from `TimeslotCalendar.allowed_starts`.
+
+    Returns:
+        Ascending start offsets of all feasible windows.
+    """
+
+    if free.ndim == 2:
+        free = free.all(axis=0)
+
+    if length < 1 or length > free.shape[0]:
+        return np.empty(0, dtype=np.intp)
+
+    counts = np.concatenate(([0], np.cumsum(free, dtype=np.int64)))
+
+    fits = counts[length:] - counts[:-length] == length
+
+    if allowed is not None:
+        fits &= allowed[: fits.shape[0]]
+
+    return np.flatnonzero(fits)
+
+
+def earliest_window(free: np.ndarray, length: int, allowed: np.ndarray = None):
+    """
+    Returns the start offset of the earliest window of `length` consecutive
+    free timeslots, or None if there is none. See `find_windows`.
+    """
+
+    starts = find_windows(free, length, allowed)
+
+    return int(starts[0]) if starts.size else None
+
+
+class AvailabilityMatrix:
+    """
+    Availability of every person in every timeslot, as one contiguous
+    person × timeslot boolean array.
+
+    Rows are found through a dict from person ID to row index, so looking up
+    the assignees of a club is a dict access per person followed by a single
+    fancy-indexing operation instead of a DataFrame scan per person.
+
+    Args:
+        person_ids: IDs of the persons, one row each.
+        num_slots: Number of timeslots, one column each.
+    """
+
+    def __init__(self, person_ids, num_slots: int):
+        self.index = {}
+        self.num_slots = num_slots
+        self.free = np.ones((0, num_slots), dtype=bool)
+
+        self.add_persons(person_ids)
+
+    def add_persons(self, person_ids):
+        """
+        Add rows for persons that are not in the matrix yet, free in every
+        timeslot.
+        """
+
+        new = [pid for pid in dict.fromkeys(person_ids) if pid not in self.index]
+
+        if not new:
+            return
+
+        for pid in new:
+            self.index[pid] = len(self.index)
+
+        self.free = np.vstack(
+            [self.free, np.ones((len(new), self.num_slots), dtype=bool)]
+        )
+
+    def rows(self, person_ids) -> np.ndarray:
+        """
+        Returns the row indices of the given persons.
+        """
+
+        return np.fromiter(
+            (self.index[pid] for pid in person_ids), dtype=np.intp, count=-1
+        )
+
+    def common(self, person_ids) -> np.ndarray:
+        """
+        Returns a boolean vector that is True in the timeslots in which all
+        given persons are free.
+        """
+
+        return self.free[self.rows(person_ids)].all(axis=0)
+
+    def find_windows(
+        self, person_ids, length: int, allowed: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Returns the start offsets of all windows of `length` consecutive
+        timeslots in which all given persons are free, optionally restricted
+        to `allowed` starts.
+        """
+
+        return find_windows(self.common(person_ids), length, allowed)
+
+    def earliest_window(self, person_ids, length: int, allowed: np.ndarray = None):
+        """
+        Returns the earliest start offset at which all given persons are free
+        for `length` consecutive timeslots, or None.
+        """
+
+        return earliest_window(self.common(person_ids), length, allowed)
+
+    def is_free(self, person_ids, start: int, length: int) -> bool:
+        """
+        Check whether all given persons are free in `length` consecutive
+        timeslots from `start` on.
+        """
+
+        return bool(self.free[self.rows(person_ids), start : start + length].all())
+
+    def block(self, person_id: str, slots):
+        """
+        Mark a person as busy in the given timeslots (an index, slice or
+        boolean mask).
+        """
+
+        self.free[self.index[person_id], slots] = False
+
+    def reserve(self, person_ids, start: int, length: int):
+        """
+        Mark all given persons as busy in `length` consecutive timeslots from
+        `start` on.
+        """
+
+        self.free[self.rows(person_ids), start : start + length] = False
+
+    def release(self, person_ids, start: int, length: int):
+        """
+        Mark all given persons as free again in `length` consecutive
+        timeslots from `start` on.
+        """
+
+        self.free[self.rows(person_ids), start : start + length] = True
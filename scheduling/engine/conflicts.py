@@ -0,0 +1,173 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from scheduling.engine.model import Assignment, Problem, Schedule
+from scheduling.engine.strategies import Strategy, prepare
+
+
+class ConflictGraph:
+    """
+    Clubs as vertices, with an edge between every two clubs that share an
+    attendee (mandatory attendees included) and therefore cannot overlap.
+
+    Args:
+        problem: Problem whose clubs to connect.
+    """
+
+    def __init__(self, problem: Problem):
+        self.neighbours = {club.id: set() for club in problem.clubs}
+
+        clubs_of = {}
+        for club in problem.clubs:
+            for person_id in problem.attendees(club):
+                clubs_of.setdefault(person_id, []).append(club.id)
+
+        for club_ids in clubs_of.values():
+            for club_id in club_ids:
+                self.neighbours[club_id].update(club_ids)
+
+        for club_id, neighbours in self.neighbours.items():
+            neighbours.discard(club_id)
+
+    def degree(self, club_id: str) -> int:
+        return len(self.neighbours[club_id])
+
+    def components(self) -> list:
+        """
+        Returns the connected components as lists of club IDs, in the order
+        of the clubs in the problem. Clubs of different components share no
+        attendee and can be scheduled independently.
+        """
+
+        seen = set()
+        components = []
+
+        for club_id in self.neighbours:
+            if club_id in seen:
+                continue
+
+            seen.add(club_id)
+            component = []
+            stack = [club_id]
+
+            while stack:
+                current = stack.pop()
+                component.append(current)
+                for neighbour in self.neighbours[current]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+
+            components.append(component)
+
+        return components
+
+
+class Saturation(Strategy):
+    """
+    DSATUR-style first-fit: always place next the club with the fewest
+    feasible starts left. Ties go to the club that conflicts with the most
+    others, as in DSATUR, and then to the shortest one. Priority clubs still
+    come first.
+
+    Placing a club only changes the feasible starts of its neighbours in the
+    `ConflictGraph`, so only those are recounted after each placement.
+    Independent components can be solved in separate processes.
+
+    Args:
+        workers: Number of processes for the components; with one, all
+            components are solved in this process.
+    """
+
+    name = "dsatur"
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+
+    def solve(self, problem: Problem) -> Schedule:
+        graph = ConflictGraph(problem)
+        components = graph.components()
+
+        if self.workers > 1 and len(components) > 1:
+            parts = [problem.restrict(component) for component in components]
+            with ProcessPoolExecutor(min(self.workers, len(parts))) as executor:
+                schedules = list(executor.map(Saturation().solve, parts))
+
+            schedule = Schedule(strategy=self.name)
+            for part in schedules:
+                schedule.assignments.update(part.assignments)
+                schedule.unscheduled.extend(part.unscheduled)
+                schedule.order.extend(part.order)
+
+            return schedule
+
+        return self._place(problem, graph)
+
+    def _place(self, problem: Problem, graph: ConflictGraph) -> Schedule:
+        calendar, availability = prepare(problem)
+        schedule = Schedule(strategy=self.name)
+
+        clubs = {}
+        for position, club in enumerate(problem.clubs):
+            attendees = problem.attendees(club)
+            availability.add_persons(attendees)
+            length = calendar.slots_for(club.duration)
+            clubs[club.id] = (
+                club,
+                position,
+                attendees,
+                length,
+                calendar.allowed_starts(length),
+            )
+
+        def options(club_id: str) -> int:
+            _, _, attendees, length, allowed = clubs[club_id]
+            return len(availability.find_windows(attendees, length, allowed))
+
+        def entry(club_id: str) -> tuple:
+            club, position, *_ = clubs[club_id]
+            return (
+                not club.priority,
+                counts[club_id],
+                -graph.degree(club_id),
+                club.duration,
+                position,
+                club_id,
+            )
+
+        counts = {club_id: options(club_id) for club_id in clubs}
+        queue = [entry(club_id) for club_id in clubs]
+        heapq.heapify(queue)
+        done = set()
+
+        while queue:
+            _, count, *_, club_id = heapq.heappop(queue)
+
+            # stale entry from before a neighbour was placed
+            if club_id in done or count != counts[club_id]:
+                continue
+
+            done.add(club_id)
+            schedule.order.append(club_id)
+            club, _, attendees, length, allowed = clubs[club_id]
+
+            start = availability.earliest_window(attendees, length, allowed)
+            if start is None:
+                schedule.unscheduled.append(club_id)
+                continue
+
+            availability.reserve(attendees, start, length)
+            schedule.assignments[club_id] = Assignment(
+                club_id=club_id,
+                start=start,
+                length=length,
+                timeslot=calendar.label(start),
+                span=calendar.span(start, length),
+                attendees=attendees,
+            )
+
+            for neighbour in graph.neighbours[club_id]:
+                if neighbour not in done:
+                    counts[neighbour] = options(neighbour)
+                    heapq.heappush(queue, entry(neighbour))
+
+        return schedule
@@ -0,0 +1,312 @@
+import time
+from bisect import bisect_left
+from scheduling.engine.model import Assignment, Problem, Schedule, objective_key
+from scheduling.engine.strategies import RandomGreedy, Strategy, prepare
+
+# how many search nodes to expand between two looks at the clock
+CLOCK_INTERVAL = 256
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def _max_fit(lengths: list, capacity: int) -> int:
+    """
+    Returns the largest number of the given lengths that fit into `capacity`
+    timeslots together, taking the shortest ones first.
+    """
+
+    fit = 0
+
+    for length in sorted(lengths):
+        if length > capacity:
+            break
+        capacity -= length
+        fit += 1
+
+    return fit
+
+
+class BranchAndBound(Strategy):
+    """
+    Exact search over (club, start) placements that maximises the number of
+    scheduled clubs (or their total duration) under a wall-clock budget.
+
+    Carry-over clubs (`Club.priority`) are a hard priority: a schedule that
+    places more of them always wins, whatever else it places. The search
+    starts from a first-fit schedule and keeps the best schedule found so far,
+    so it returns a valid result even when the budget runs out;
+    `Schedule.optimal` tells whether the search finished.
+
+    The time of every person is a bitmask over the timeslots, so checking a
+    placement is one AND per attendee. A branch is cut when even placing all
+    remaining clubs could not beat the incumbent, where each person can host
+    at most as many remaining clubs as fit into their free timeslots.
+
+    Args:
+        time_limit: Wall-clock budget of the search in seconds.
+        objective: "count" to maximise the number of scheduled clubs,
+            "duration" to maximise their total duration.
+        clock: Monotonic clock in seconds, replaceable for testing.
+    """
+
+    name = "branch-and-bound"
+
+    def __init__(
+        self, time_limit: float = 10.0, objective: str = "count", clock=time.monotonic
+    ):
+        objective_key(objective, 0, 0, 0)
+
+        self.time_limit = time_limit
+        self.objective = objective
+        self.clock = clock
+
+    def solve(self, problem: Problem) -> Schedule:
+        deadline = self.clock() + self.time_limit
+        # the bitmasks are built from the dense matrix
+        calendar, availability = prepare(problem, sparse=False)
+
+        # clubs that cannot be placed even in an empty week are left out of
+        # the search; the others are tried most constrained first
+        candidates = {}
+        for club in problem.clubs:
+            attendees = problem.attendees(club)
+            availability.add_persons(attendees)
+            length = calendar.slots_for(club.duration)
+            starts = availability.find_windows(
+                attendees, length, calendar.allowed_starts(length)
+            )
+            candidates[club.id] = [int(start) for start in starts]
+
+        clubs = sorted(
+            (club for club in problem.clubs if candidates[club.id]),
+            key=lambda club: (
+                not club.priority,
+                len(candidates[club.id]),
+                -club.duration,
+            ),
+        )
+
+        search = _Search(self, problem, calendar, availability, clubs, candidates)
+        search.incumbent(RandomGreedy(seed=0).solve(problem))
+
+        try:
+            search.run(deadline)
+            optimal = True
+        except _OutOfTime:
+            optimal = False
+
+        schedule = Schedule(strategy=self.name, optimal=optimal)
+
+        for index, club in enumerate(clubs):
+            schedule.order.append(club.id)
+            start = search.best_starts.get(index)
+            if start is None:
+                schedule.unscheduled.append(club.id)
+                continue
+
+            length = calendar.slots_for(club.duration)
+            schedule.assignments[club.id] = Assignment(
+                club_id=club.id,
+                start=start,
+                length=length,
+                timeslot=calendar.label(start),
+                span=calendar.span(start, length),
+                attendees=problem.attendees(club),
+            )
+
+        for club in problem.clubs:
+            if not candidates[club.id]:
+                schedule.order.append(club.id)
+                schedule.unscheduled.append(club.id)
+
+        return schedule
+
+
+class _Search:
+    """
+    State of one branch-and-bound run. Clubs are referred to by their index
+    in the search order, persons by their row in the availability matrix.
+    """
+
+    def __init__(self, strategy, problem, calendar, availability, clubs, candidates):
+        self.objective = strategy.objective
+        self.clock = strategy.clock
+        self.clubs = clubs
+        self.nodes = 0
+
+        num_slots = len(calendar)
+        self.lengths = [calendar.slots_for(club.duration) for club in clubs]
+        self.attendees = [
+            tuple(availability.rows(problem.attendees(club))) for club in clubs
+        ]
+        self.moves = [
+            [(start, ((1 << length) - 1) << start) for start in candidates[club.id]]
+            for club, length in zip(clubs, self.lengths)
+        ]
+
+        # busy timeslots per person, and the clubs each person attends
+        self.used = [0] * len(availability.index)
+        for row, free in enumerate(availability.free):
+            for offset in (~free).nonzero()[0]:
+                self.used[row] |= 1 << int(offset)
+
+        self.capacity = num_slots
+        self.person_clubs = {}
+        for index, rows in enumerate(self.attendees):
+            for row in rows:
+                self.person_clubs.setdefault(row, []).append(index)
+
+        # totals of the clubs from each index on, for the optimistic bound
+        n = len(clubs)
+        self.rest_priority = [0] * (n + 1)
+        self.rest_duration = [0] * (n + 1)
+        for index in range(n - 1, -1, -1):
+            self.rest_priority[index] = (
+                self.rest_priority[index + 1] + clubs[index].priority
+            )
+            self.rest_duration[index] = (
+                self.rest_duration[index + 1] + clubs[index].duration
+            )
+
+        self.starts = {}
+        self.best_starts = {}
+        self.best = None
+
+    def incumbent(self, schedule: Schedule):
+        """
+        Start from a known schedule of the same clubs.
+        """
+
+        index = {club.id: i for i, club in enumerate(self.clubs)}
+        self.best_starts = {
+            index[club_id]: assignment.start
+            for club_id, assignment in schedule.assignments.items()
+            if club_id in index
+        }
+        placed = [self.clubs[i] for i in self.best_starts]
+        self.best = self.key(
+            sum(club.priority for club in placed),
+            len(placed),
+            sum(club.duration for club in placed),
+        )
+
+    def key(self, priority: int, count: int, duration: int) -> tuple:
+        return objective_key(self.objective, priority, count, duration)
+
+    def run(self, deadline: float):
+        """
+        Search depth first from the first club on. The search keeps its own
+        stack of frames, one per club on the current path, so that its depth
+        is not limited by Python's recursion limit.
+        """
+
+        self.deadline = deadline
+        used = self.used
+
+        # frame: [index, priority, count, duration, moves, applied mask]
+        stack = []
+        node = (0, 0, 0, 0)
+
+        while True:
+            if node is not None:
+                if self.visit(*node):
+                    stack.append([*node, iter(self.moves[node[0]]), None])
+                node = None
+
+            if not stack:
+                return
+
+            frame = stack[-1]
+            index, priority, count, duration, moves, applied = frame
+            rows = self.attendees[index]
+
+            # undo the placement of the child explored last
+            if applied is not None:
+                del self.starts[index]
+                for row in rows:
+                    used[row] ^= applied
+                frame[5] = None
+
+            for start, mask in moves:
+                if any(used[row] & mask for row in rows):
+                    continue
+
+                for row in rows:
+                    used[row] |= mask
+                self.starts[index] = start
+                frame[5] = mask
+
+                club = self.clubs[index]
+                node = (
+                    index + 1,
+                    priority + club.priority,
+                    count + 1,
+                    duration + club.duration,
+                )
+                break
+            else:
+                # last child: leave the club out; nothing is left to undo
+                stack.pop()
+                node = (index + 1, priority, count, duration)
+
+    def visit(self, index: int, priority: int, count: int, duration: int) -> bool:
+        """
+        Enter a search node: record it if it beats the incumbent.
+
+        Returns:
+            Whether the clubs from `index` on are worth branching on.
+        """
+
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and self.clock() > self.deadline:
+            raise _OutOfTime
+
+        value = self.key(priority, count, duration)
+        if value > self.best:
+            self.best = value
+            self.best_starts = dict(self.starts)
+
+        if index == len(self.clubs):
+            return False
+
+        return self.bound(index, priority, count, duration) > self.best
+
+    def bound(self, index: int, priority: int, count: int, duration: int) -> tuple:
+        """
+        Returns an optimistic key for all schedules below this node: every
+        remaining club placed, except those that cannot fit into the free
+        timeslots of one of their attendees.
+        """
+
+        skipped = skipped_priority = skipped_duration = 0
+
+        for row, indices in self.person_clubs.items():
+            rest = indices[bisect_left(indices, index) :]
+            if not rest:
+                continue
+
+            free = self.capacity - self.used[row].bit_count()
+            lengths = [self.lengths[i] for i in rest]
+            if sum(lengths) <= free:
+                continue
+
+            skipped = max(skipped, len(rest) - _max_fit(lengths, free))
+
+            rest_priority = [self.lengths[i] for i in rest if self.clubs[i].priority]
+            skipped_priority = max(
+                skipped_priority,
+                len(rest_priority) - _max_fit(rest_priority, free),
+            )
+
+            # a club of n timeslots lasts at most n * granularity minutes
+            rest_duration = sum(self.clubs[i].duration for i in rest)
+            granularity = max(self.clubs[i].duration / self.lengths[i] for i in rest)
+            skipped_duration = max(skipped_duration, rest_duration - free * granularity)
+
+        return self.key(
+            priority + self.rest_priority[index] - skipped_priority,
+            count + len(self.clubs) - index - skipped,
+            duration + self.rest_duration[index] - skipped_duration,
+        )
@@ -0,0 +1,241 @@
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+
+def intersect(a: list, b: list) -> list:
+    """
+    Returns the intersection of two sorted lists of disjoint half-open
+    `(start, end)` intervals, in O(len(a) + len(b)).
+    """
+
+    result = []
+    i = j = 0
+
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start < end:
+            result.append((start, end))
+
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+
+    return result
+
+
+def to_runs(slots, num_slots: int) -> list:
+    """
+    Returns the timeslots given as an index, slice, boolean mask or iterable
+    of offsets as a sorted list of `(start, end)` runs.
+    """
+
+    if isinstance(slots, slice):
+        start, stop, step = slots.indices(num_slots)
+        if step == 1:
+            return [(start, stop)] if stop > start else []
+        offsets = list(range(start, stop, step))
+    elif isinstance(slots, np.ndarray) and slots.dtype == bool:
+        offsets = np.flatnonzero(slots).tolist()
+    elif np.ndim(slots) == 0:
+        offsets = [int(slots)]
+    else:
+        offsets = sorted({int(offset) for offset in slots})
+
+    runs = []
+
+    for offset in offsets:
+        if runs and runs[-1][1] == offset:
+            runs[-1] = (runs[-1][0], offset + 1)
+        else:
+            runs.append((offset, offset + 1))
+
+    return runs
+
+
+class IntervalAvailability:
+    """
+    Availability of every person as a sorted, run-length encoded list of free
+    `(start, end)` intervals of timeslot offsets.
+
+    A drop-in alternative to `AvailabilityMatrix` for long horizons: memory,
+    window search and reservations grow with the number of free intervals of
+    the persons involved rather than with the number of timeslots. Free
+    intervals never cross the given segments, so every window found in them
+    is also a valid meeting.
+
+    Args:
+        person_ids: IDs of the persons.
+        num_slots: Number of timeslots.
+        segments: Runs of timeslots a meeting may not leave, e.g.
+            `TimeslotCalendar.segments`; by default the whole horizon.
+    """
+
+    def __init__(self, person_ids, num_slots: int, segments: list = None):
+        self.num_slots = num_slots
+        self.segments = list(segments) if segments is not None else [(0, num_slots)]
+        self._segment_starts = [start for start, _ in self.segments]
+        self.index = {}
+        self.intervals = []
+
+        self.add_persons(person_ids)
+
+    def add_persons(self, person_ids):
+        """
+        Add persons that are not known yet, free in every timeslot.
+        """
+
+        for pid in dict.fromkeys(person_ids):
+            if pid not in self.index:
+                self.index[pid] = len(self.intervals)
+                self.intervals.append(list(self.segments))
+
+    def common(self, person_ids) -> list:
+        """
+        Returns the intervals in which all given persons are free.
+        """
+
+        common = None
+
+        for pid in dict.fromkeys(person_ids):
+            intervals = self.intervals[self.index[pid]]
+            common = intervals if common is None else intersect(common, intervals)
+
+        return list(self.segments) if common is None else common
+
+    def find_windows(
+        self, person_ids, length: int, allowed: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Returns the start offsets of all windows of `length` consecutive
+        timeslots in which all given persons are free, optionally restricted
+        to `allowed` starts.
+        """
+
+        runs = self._start_runs(person_ids, length)
+
+        if not runs:
+            return np.empty(0, dtype=np.intp)
+
+        firsts, stops = np.array(runs, dtype=np.intp).T
+        sizes = stops - firsts
+
+        # offsets of every run laid end to end, shifted back to the run starts
+        shift = firsts - np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        starts = np.arange(sizes.sum(), dtype=np.intp) + np.repeat(shift, sizes)
+
+        if allowed is not None:
+            starts = starts[allowed[starts]]
+
+        return starts
+
+    def earliest_window(self, person_ids, length: int, allowed: np.ndarray = None):
+        """
+        Returns the earliest start offset at which all given persons are free
+        for `length` consecutive timeslots, or None.
+        """
+
+        for first, stop in self._start_runs(person_ids, length):
+            if allowed is None:
+                return first
+
+            hits = np.flatnonzero(allowed[first:stop])
+            if hits.size:
+                return first + int(hits[0])
+
+        return None
+
+    def _start_runs(self, person_ids, length: int) -> list:
+        # candidate starts only come from the free gaps long enough for the
+        # window, so the busy parts of the horizon are never looked at
+        if length < 1:
+            return []
+
+        return [
+            (start, end - length + 1)
+            for start, end in self.common(person_ids)
+            if end - start >= length
+        ]
+
+    def is_free(self, person_ids, start: int, length: int) -> bool:
+        """
+        Check whether all given persons are free in `length` consecutive
+        timeslots from `start` on.
+        """
+
+        for pid in dict.fromkeys(person_ids):
+            intervals = self.intervals[self.index[pid]]
+            i = bisect_right(intervals, (start, self.num_slots + 1)) - 1
+            if i < 0 or intervals[i][1] < start + length:
+                return False
+
+        return True
+
+    def block(self, person_id: str, slots):
+        """
+        Mark a person as busy in the given timeslots (an index, slice,
+        boolean mask or iterable of offsets).
+        """
+
+        for start, end in to_runs(slots, self.num_slots):
+            self._remove(person_id, start, end)
+
+    def reserve(self, person_ids, start: int, length: int):
+        """
+        Mark all given persons as busy in `length` consecutive timeslots from
+        `start` on.
+        """
+
+        for pid in dict.fromkeys(person_ids):
+            self._remove(pid, start, start + length)
+
+    def release(self, person_ids, start: int, length: int):
+        """
+        Mark all given persons as free again in `length` consecutive
+        timeslots from `start` on.
+        """
+
+        for pid in dict.fromkeys(person_ids):
+            self._add(pid, start, start + length)
+
+    def _remove(self, person_id: str, start: int, end: int):
+        intervals = self.intervals[self.index[person_id]]
+
+        # intervals overlapping [start, end)
+        first = bisect_right(intervals, (start, self.num_slots + 1)) - 1
+        if first < 0 or intervals[first][1] <= start:
+            first += 1
+        last = bisect_left(intervals, (end, -1))
+
+        if first >= last:
+            return
+
+        pieces = []
+        if intervals[first][0] < start:
+            pieces.append((intervals[first][0], start))
+        if intervals[last - 1][1] > end:
+            pieces.append((end, intervals[last - 1][1]))
+
+        intervals[first:last] = pieces
+
+    def _add(self, person_id: str, start: int, end: int):
+        intervals = self.intervals[self.index[person_id]]
+
+        # intervals overlapping or touching [start, end)
+        first = bisect_left(intervals, (start, -1))
+        if first > 0 and intervals[first - 1][1] >= start:
+            first -= 1
+        last = bisect_right(intervals, (end, self.num_slots + 1))
+
+        if first < last:
+            start = min(start, intervals[first][0])
+            end = max(end, intervals[last - 1][1])
+
+        # split the merged interval again where a segment begins, leaving out
+        # timeslots outside of all segments
+        starts = self._segment_starts
+        lo = max(0, bisect_right(starts, start) - 1)
+        hi = bisect_left(starts, end)
+
+        intervals[first:last] = intersect([(start, end)], self.segments[lo:hi])
@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+OBJECTIVES = ("count", "duration")
+
+
+def objective_key(objective: str, priority: int, count: int, duration: int) -> tuple:
+    """
+    Returns the comparison key of a schedule with the given number of placed
+    priority clubs, placed clubs and total duration. Priority clubs always
+    come first; `objective` decides whether the number of clubs or their
+    duration breaks the tie.
+    """
+
+    if objective == "count":
+        return (priority, count, duration)
+
+    if objective == "duration":
+        return (priority, duration, count)
+
+    raise ValueError(
+        f"Unknown objective {objective!r}, expected one of {', '.join(OBJECTIVES)}."
+    )
+
+
+@dataclass(frozen=True)
+class Club:
+    """
+    A club meeting to be placed.
+
+    Args:
+        id: Node ID of the project item.
+        title: Title of the club.
+        duration: Length of the meeting in minutes.
+        assignees: Logins of the persons attending.
+        priority: True for clubs carried over from last week ("Unscheduled"),
+            which are placed before all others.
+    """
+
+    id: str
+    title: str
+    duration: int
+    assignees: tuple = ()
+    priority: bool = False
+
+
+@dataclass(frozen=True)
+class Person:
+    """
+    A person who may attend clubs.
+
+    Args:
+        id: GitHub login.
+        busy: Offsets of the timeslots in which the person is not available.
+    """
+
+    id: str
+    busy: tuple = ()
+
+
+@dataclass(frozen=True)
+class Problem:
+    """
+    Everything the scheduler needs to know, free of any I/O. All fields are
+    tuples of plain values, so a problem is hashable and picklable.
+
+    Args:
+        clubs: Clubs to place, in their given order.
+        persons: Known persons; assignees without an entry are always free.
+        slots: Timeslot labels ("HH:MM" or "<day> HH:MM"); other labels are
+            ignored. See `TimeslotCalendar`.
+        granularity: Length of one timeslot in minutes, by default inferred
+            from the slots.
+        boundaries: "HH:MM" times no meeting may run across, e.g. the lunch
+            break.
+        mandatory: Persons who attend every club.
+    """
+
+    clubs: tuple
+    persons: tuple = ()
+    slots: tuple = ()
+    granularity: Optional[int] = None
+    boundaries: tuple = ()
+    mandatory: tuple = ()
+
+    def attendees(self, club: Club) -> tuple:
+        """
+        Returns the assignees of a club plus the mandatory attendees, without
+        duplicates.
+        """
+
+        return tuple(dict.fromkeys(club.assignees + self.mandatory))
+
+    def restrict(self, club_ids) -> "Problem":
+        """
+        Returns the same problem with only the given clubs, and only the
+        persons attending them.
+        """
+
+        club_ids = set(club_ids)
+        clubs = tuple(club for club in self.clubs if club.id in club_ids)
+        attending = {person_id for club in clubs for person_id in self.attendees(club)}
+
+        return replace(
+            self,
+            clubs=clubs,
+            persons=tuple(person for person in self.persons if person.id in attending),
+        )
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """
+    A club placed at a start offset.
+
+    Args:
+        club_id: ID of the club.
+        start: Offset of the first timeslot.
+        length: Number of timeslots.
+        timeslot: Label of the first timeslot.
+        span: "[day] HH:MM - HH:MM" span of the meeting.
+        attendees: Persons attending, mandatory attendees included.
+    """
+
+    club_id: str
+    start: int
+    length: int
+    timeslot: str
+    span: str
+    attendees: tuple = ()
+
+
+@dataclass
+class Schedule:
+    """
+    Result of a scheduling strategy.
+
+    Args:
+        assignments: Dict of club ID to its `Assignment`, in placement order.
+        unscheduled: IDs of the clubs that could not be placed.
+        order: IDs of all clubs in the order the strategy considered them.
+        strategy: Name of the strategy that produced the schedule.
+        seed: Random seed that reproduces the schedule, if any.
+        optimal: True if the strategy proved that no better schedule exists.
+    """
+
+    assignments: dict = field(default_factory=dict)
+    unscheduled: list = field(default_factory=list)
+    order: list = field(default_factory=list)
+    strategy: str = ""
+    seed: Optional[int] = None
+    optimal: bool = False
+
+    def score(self, problem: Problem, objective: str = "count") -> tuple:
+        """
+        Returns the quality of the schedule for comparisons, higher is better:
+        the number of placed priority clubs, then the number of all placed
+        clubs and their total duration, in the order given by `objective`
+        ("count" or "duration").
+        """
+
+        clubs = {club.id: club for club in problem.clubs}
+        placed = [clubs[club_id] for club_id in self.assignments]
+
+        return objective_key(
+            objective,
+            sum(club.priority for club in placed),
+            len(placed),
+            sum(club.duration for club in placed),
+        )
+
+    def person_schedules(self, problem: Problem) -> dict:
+        """
+        Returns a dict of person ID to the "title [day] HH:MM - HH:MM"
+        entries of the clubs the person attends, in placement order.
+        """
+
+        titles = {club.id: club.title for club in problem.clubs}
+        schedules = {}
+
+        for assignment in self.assignments.values():
+            for person_id in assignment.attendees:
+                schedules.setdefault(person_id, []).append(
+                    titles[assignment.club_id] + " " + assignment.span
+                )
+
+        return schedules
@@ -0,0 +1,156 @@
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from scheduling.engine.model import Problem, Schedule
+from scheduling.engine.strategies import RandomGreedy, Strategy
+
+# upper bound of the seeds per task, so that results arrive steadily even
+# when a deadline cuts the runs short
+MAX_BATCH = 64
+
+# problem of the current worker process, set once by `_init_worker` so that
+# it is pickled once per process rather than once per task
+_problem = None
+
+
+def _init_worker(problem: Problem):
+    global _problem
+    _problem = problem
+
+
+def _best_seed(
+    problem: Problem, seeds: list, objective: str, deadline: float = None
+) -> tuple:
+    """
+    Run the random greedy with each seed and return the best score and the
+    seed that achieved it; the first seed wins ties. Stops early once the
+    `time.time()` deadline has passed, returning None if no run finished.
+    """
+
+    best = None
+
+    for seed in seeds:
+        if best is not None and deadline is not None and time.time() > deadline:
+            break
+
+        score = RandomGreedy(seed).solve(problem).score(problem, objective)
+        if best is None or score > best[0]:
+            best = (score, seed)
+
+    return best
+
+
+def _run_batch(seeds: list, objective: str, deadline: float = None) -> tuple:
+    if deadline is not None and time.time() > deadline:
+        return None
+
+    return _best_seed(_problem, seeds, objective, deadline)
+
+
+class MultiStart(Strategy):
+    """
+    Random greedy restarted with many seeds across a process pool, keeping
+    the best schedule.
+
+    The problem is sent to each worker once; workers only return the score
+    and seed of their best run, and the winner is solved again in this
+    process from its seed, so the result is reproducible with
+    `RandomGreedy(schedule.seed)`.
+
+    Args:
+        starts: Number of seeded runs.
+        time_limit: Seconds after which no further runs are started, or None
+            to wait for all of them.
+        workers: Number of processes, by default one per CPU. With one
+            worker, the runs happen in this process.
+        seed: Seed from which the seeds of the runs are drawn.
+        objective: "count" or "duration", see `Schedule.score`.
+    """
+
+    name = "multi-start"
+
+    def __init__(
+        self,
+        starts: int = 64,
+        time_limit: float = None,
+        workers: int = None,
+        seed: int = None,
+        objective: str = "count",
+    ):
+        if starts < 1:
+            raise ValueError("At least one start is needed.")
+
+        self.starts = starts
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.objective = objective
+
+    def solve(self, problem: Problem) -> Schedule:
+        rng = random.Random(self.seed)
+        seeds = [rng.randrange(2**32) for _ in range(self.starts)]
+
+        if self.workers == 1 or self.starts == 1:
+            deadline = None
+            if self.time_limit is not None:
+                deadline = time.time() + self.time_limit
+            _, seed = _best_seed(problem, seeds, self.objective, deadline)
+        else:
+            seed = self._solve_parallel(problem, seeds)
+
+        schedule = RandomGreedy(seed).solve(problem)
+        schedule.strategy = self.name
+
+        return schedule
+
+    def _solve_parallel(self, problem: Problem, seeds: list) -> int:
+        # wall-clock time, as the deadline is also checked by the workers
+        deadline = None if self.time_limit is None else time.time() + self.time_limit
+
+        # a few batches per worker keep all processes busy until the end
+        # without paying the pool round trip for every seed
+        size = max(1, min(len(seeds) // (self.workers * 4), MAX_BATCH))
+        batches = [seeds[i : i + size] for i in range(0, len(seeds), size)]
+
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, len(batches)),
+            initializer=_init_worker,
+            initargs=(problem,),
+        )
+
+        try:
+            futures = {
+                executor.submit(_run_batch, batch, self.objective, deadline): i
+                for i, batch in enumerate(batches)
+            }
+            results = {}
+            pending = set(futures)
+
+            while pending:
+                timeout = None
+                if deadline is not None:
+                    timeout = max(0.0, deadline - time.time())
+
+                done, pending = wait(pending, timeout, FIRST_COMPLETED)
+                if not done:
+                    break
+
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        results[futures[future]] = result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not results:
+            # nothing finished in time: fall back to the first seed
+            return seeds[0]
+
+        # compare in submission order, so the first batch wins ties
+        best = None
+        for i in sorted(results):
+            if best is None or results[i][0] > best[0]:
+                best = results[i]
+
+        return best[1]
@@ -0,0 +1,323 @@
+from dataclasses import dataclass, replace
+from scheduling.engine.model import Assignment, Problem, Schedule
+from scheduling.engine.strategies import prepare
+
+
+@dataclass(frozen=True)
+class Delta:
+    """
+    Changes to a scheduled week.
+
+    Args:
+        changed: New or updated clubs, e.g. with another assignee or
+            duration. Clubs are matched to the schedule by ID.
+        removed: IDs of clubs that no longer take place, e.g. parked ones.
+    """
+
+    changed: tuple = ()
+    removed: tuple = ()
+
+
+def from_timeslots(problem: Problem, timeslots: dict) -> Schedule:
+    """
+    Rebuild a committed schedule from the timeslot label of each placed club,
+    as stored on the project board. Clubs without a known label are
+    unscheduled.
+    """
+
+    calendar, _ = prepare(problem)
+    schedule = Schedule(strategy="committed")
+
+    for club in problem.clubs:
+        schedule.order.append(club.id)
+        start = calendar.offsets.get(timeslots.get(club.id))
+        if start is None:
+            schedule.unscheduled.append(club.id)
+            continue
+
+        length = calendar.slots_for(club.duration)
+        schedule.assignments[club.id] = Assignment(
+            club_id=club.id,
+            start=start,
+            length=length,
+            timeslot=calendar.label(start),
+            span=calendar.span(start, length),
+            attendees=problem.attendees(club),
+        )
+
+    return schedule
+
+
+class ScheduleRepair:
+    """
+    Apply small changes to a committed schedule without planning the week
+    anew.
+
+    The availability of all persons is built once from the committed
+    assignments. Each `apply` releases the reservations of the changed
+    clubs, tries to place them again, preferring their previous start, and
+    only when that fails moves their conflicting neighbours. Unscheduled
+    clubs that share an attendee with a changed club get another try, as
+    the change may have freed their time. The work per change grows with
+    the number of clubs it touches, not with the size of the board: the
+    clubs and the order of the schedule are kept in dicts, and the `problem`
+    and the lists of the `schedule` are only brought up to date when read.
+
+    Args:
+        problem: Problem the schedule was made for.
+        schedule: Committed schedule; its assignments are updated in place.
+    """
+
+    def __init__(self, problem: Problem, schedule: Schedule):
+        self._problem = problem
+        self._schedule = schedule
+        # whether `clubs`, `order` or `unscheduled` changed since last read
+        self._problem_stale = False
+        self._schedule_stale = False
+        self.calendar, self.availability = prepare(problem)
+        self.clubs = {club.id: club for club in problem.clubs}
+
+        # insertion-ordered sets of club IDs
+        self.order = dict.fromkeys(schedule.order)
+        self.unscheduled = dict.fromkeys(schedule.unscheduled)
+
+        # clubs per person, to find the neighbours of a changed club
+        self.clubs_of = {}
+        for club in problem.clubs:
+            self._link(club)
+
+        for assignment in schedule.assignments.values():
+            self.availability.add_persons(assignment.attendees)
+            self.availability.reserve(
+                assignment.attendees, assignment.start, assignment.length
+            )
+
+    @property
+    def problem(self) -> Problem:
+        """
+        The problem with the clubs as changed by all deltas so far.
+        """
+
+        if self._problem_stale:
+            self._problem = replace(self._problem, clubs=tuple(self.clubs.values()))
+            self._problem_stale = False
+
+        return self._problem
+
+    @property
+    def schedule(self) -> Schedule:
+        """
+        The schedule with all deltas so far applied.
+        """
+
+        if self._schedule_stale:
+            self._schedule.order[:] = self.order
+            self._schedule.unscheduled[:] = self.unscheduled
+            self._schedule_stale = False
+
+        return self._schedule
+
+    def apply(self, delta: Delta) -> dict:
+        """
+        Apply a delta to the schedule.
+
+        Returns:
+            Dict of club ID to its new `Assignment`, or None for clubs that
+            lost their place or were removed, with only the clubs whose
+            assignment actually changed.
+        """
+
+        assignments = self._schedule.assignments
+        before = {}
+        touched = set()
+
+        self._problem_stale = self._schedule_stale = True
+
+        def remember(club_id: str):
+            if club_id not in before:
+                before[club_id] = assignments.get(club_id)
+
+        # free the time of all changed and removed clubs
+        for club_id in delta.removed + tuple(club.id for club in delta.changed):
+            remember(club_id)
+            touched.update(self._neighbours(club_id))
+            self._release(club_id)
+
+        for club_id in delta.removed:
+            self._unlink(club_id)
+            self.clubs.pop(club_id, None)
+            self._forget(club_id)
+
+        for club in delta.changed:
+            if club.id in self.clubs:
+                self._unlink(club.id)
+            else:
+                self.order[club.id] = None
+            self.clubs[club.id] = club
+            self._link(club)
+            touched.update(self._neighbours(club.id))
+
+        # changed clubs, priority ones first
+        for club in sorted(delta.changed, key=lambda club: not club.priority):
+            previous = before.get(club.id)
+            hint = previous.start if previous else None
+            if self._place(club.id, hint):
+                continue
+
+            for neighbour in self._neighbours(club.id):
+                remember(neighbour)
+            self._place_displacing(club.id)
+
+        # clubs that were waiting for time the change may have freed, priority
+        # ones first
+        changed_ids = {club.id for club in delta.changed}
+        waiting = (touched & self.unscheduled.keys()) - changed_ids
+        for club_id in sorted(
+            waiting, key=lambda club_id: (not self.clubs[club_id].priority, club_id)
+        ):
+            remember(club_id)
+            self._place(club_id)
+
+        return {
+            club_id: assignments.get(club_id)
+            for club_id, previous in before.items()
+            if assignments.get(club_id) != previous
+        }
+
+    def _link(self, club):
+        for person_id in self._problem.attendees(club):
+            self.clubs_of.setdefault(person_id, set()).add(club.id)
+
+    def _unlink(self, club_id: str):
+        club = self.clubs.get(club_id)
+        if club is None:
+            return
+
+        for person_id in self._problem.attendees(club):
+            self.clubs_of.get(person_id, set()).discard(club_id)
+
+    def _neighbours(self, club_id: str) -> set:
+        club = self.clubs.get(club_id)
+        if club is None:
+            return set()
+
+        neighbours = set()
+        for person_id in self._problem.attendees(club):
+            neighbours.update(self.clubs_of.get(person_id, ()))
+        neighbours.discard(club_id)
+
+        return neighbours
+
+    def _forget(self, club_id: str):
+        self.unscheduled.pop(club_id, None)
+        self.order.pop(club_id, None)
+
+    def _release(self, club_id: str):
+        assignment = self._schedule.assignments.pop(club_id, None)
+        if assignment is not None:
+            self.availability.release(
+                assignment.attendees, assignment.start, assignment.length
+            )
+
+    def _reserve(self, assignment: Assignment):
+        self.availability.reserve(
+            assignment.attendees, assignment.start, assignment.length
+        )
+        self._schedule.assignments[assignment.club_id] = assignment
+        self.unscheduled.pop(assignment.club_id, None)
+
+    def _place(self, club_id: str, hint: int = None) -> bool:
+        """
+        Place a club at `hint` if all attendees are free there, else at the
+        earliest feasible start. Returns False and marks the club
+        unscheduled if there is none.
+        """
+
+        club = self.clubs[club_id]
+        attendees = self._problem.attendees(club)
+        self.availability.add_persons(attendees)
+
+        length = self.calendar.slots_for(club.duration)
+        allowed = self.calendar.allowed_starts(length)
+
+        if (
+            hint is not None
+            and hint + length <= len(self.calendar)
+            and allowed[hint]
+            and self.availability.is_free(attendees, hint, length)
+        ):
+            start = hint
+        else:
+            start = self.availability.earliest_window(attendees, length, allowed)
+
+        if start is None:
+            self.unscheduled[club_id] = None
+            return False
+
+        self._reserve(
+            Assignment(
+                club_id=club_id,
+                start=start,
+                length=length,
+                timeslot=self.calendar.label(start),
+                span=self.calendar.span(start, length),
+                attendees=attendees,
+            )
+        )
+
+        return True
+
+    def _place_displacing(self, club_id: str) -> bool:
+        """
+        Lift the placed neighbours of a club, place the club and put the
+        neighbours back, each at its old start if possible. The attempt is
+        undone unless every neighbour finds a place again.
+        """
+
+        lifted = [
+            self._schedule.assignments[neighbour]
+            for neighbour in sorted(self._neighbours(club_id))
+            if neighbour in self._schedule.assignments
+        ]
+
+        for assignment in lifted:
+            self._release(assignment.club_id)
+
+        placed = self._place(club_id)
+        if placed:
+            for assignment in lifted:
+                if not self._place(assignment.club_id, assignment.start):
+                    placed = False
+                    break
+
+        if not placed:
+            for assignment in lifted:
+                self._release(assignment.club_id)
+            self._release(club_id)
+            self.unscheduled[club_id] = None
+            for assignment in lifted:
+                self._reserve(assignment)
+
+        return placed
+
+
+def repair(
+    problem: Problem,
+    schedule: Schedule,
+    delta: Delta,
+    repairer: ScheduleRepair = None,
+) -> tuple:
+    """
+    Apply a delta to a committed schedule. Pass the returned repairer with
+    the next delta of the same schedule, so that the availability of all
+    persons is not built again for every change; `problem` is then ignored.
+
+    Returns:
+        The changed assignments, see `ScheduleRepair.apply`, and the
+        `ScheduleRepair` holding the repaired schedule and problem.
+    """
+
+    if repairer is None or repairer._schedule is not schedule:
+        repairer = ScheduleRepair(problem, schedule)
+
+    return repairer.apply(delta), repairer
@@ -0,0 +1,142 @@
+import random
+from abc import ABC, abstractmethod
+from scheduling.engine.availability import AvailabilityMatrix
+from scheduling.engine.intervals import IntervalAvailability
+from scheduling.engine.model import Assignment, Problem, Schedule
+from scheduling.engine.timeslots import TimeslotCalendar
+
+# above this many timeslots (a full week at ten minutes is 1,008), availability
+# is tracked as free intervals rather than as a person x timeslot matrix
+SPARSE_SLOTS = 1000
+
+
+class Strategy(ABC):
+    """
+    Interface of all scheduling strategies: turn a `Problem` into a
+    `Schedule` without side effects.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def solve(self, problem: Problem) -> Schedule:
+        """
+        Place the clubs of `problem`.
+        """
+
+
+def prepare(problem: Problem, sparse: bool = None) -> tuple:
+    """
+    Build the timeslot calendar and the initial availability of a problem.
+
+    Args:
+        problem: Problem to prepare.
+        sparse: Track availability as free intervals (`IntervalAvailability`)
+            instead of a dense matrix (`AvailabilityMatrix`). By default,
+            horizons of more than `SPARSE_SLOTS` timeslots are sparse.
+
+    Returns:
+        The `TimeslotCalendar` and the availability.
+    """
+
+    calendar = TimeslotCalendar(
+        problem.slots, granularity=problem.granularity, boundaries=problem.boundaries
+    )
+    person_ids = [person.id for person in problem.persons]
+
+    if sparse is None:
+        sparse = len(calendar) > SPARSE_SLOTS
+
+    if sparse:
+        availability = IntervalAvailability(
+            person_ids, len(calendar), calendar.segments
+        )
+    else:
+        availability = AvailabilityMatrix(person_ids, len(calendar))
+
+    for person in problem.persons:
+        busy = [offset for offset in person.busy if 0 <= offset < len(calendar)]
+        if busy:
+            availability.block(person.id, busy)
+
+    return calendar, availability
+
+
+def first_fit(
+    problem: Problem,
+    clubs: list,
+    calendar: TimeslotCalendar,
+    availability,
+) -> Schedule:
+    """
+    Place each club, in the given order, at the earliest start at which all
+    its attendees are free. Clubs without such a start stay unscheduled.
+    `availability` is updated in place.
+    """
+
+    schedule = Schedule()
+
+    for club in clubs:
+        schedule.order.append(club.id)
+
+        attendees = problem.attendees(club)
+        availability.add_persons(attendees)
+
+        length = calendar.slots_for(club.duration)
+        start = availability.earliest_window(
+            attendees, length, calendar.allowed_starts(length)
+        )
+
+        if start is None:
+            schedule.unscheduled.append(club.id)
+            continue
+
+        availability.reserve(attendees, start, length)
+        schedule.assignments[club.id] = Assignment(
+            club_id=club.id,
+            start=start,
+            length=length,
+            timeslot=calendar.label(start),
+            span=calendar.span(start, length),
+            attendees=attendees,
+        )
+
+    return schedule
+
+
+class RandomGreedy(Strategy):
+    """
+    First-fit in random order: priority clubs first, in their given order,
+    then all other clubs shuffled.
+
+    Args:
+        seed: Seed of the shuffle. Without one, a seed is drawn and recorded
+            in the result, so that every schedule can be reproduced.
+    """
+
+    name = "random-greedy"
+
+    def __init__(self, seed: int = None):
+        self.seed = seed
+
+    def solve(self, problem: Problem) -> Schedule:
+        seed = self.seed if self.seed is not None else random.randrange(2**32)
+
+        priority = [club for club in problem.clubs if club.priority]
+        regular = [club for club in problem.clubs if not club.priority]
+        random.Random(seed).shuffle(regular)
+
+        calendar, availability = prepare(problem)
+        schedule = first_fit(problem, priority + regular, calendar, availability)
+        schedule.strategy = self.name
+        schedule.seed = seed
+
+        return schedule
+
+
+def solve(problem: Problem, strategy: Strategy = None) -> Schedule:
+    """
+    Schedule a problem with the given strategy, by default `RandomGreedy`.
+    """
+
+    return (strategy or RandomGreedy()).solve(problem)
@@ -0,0 +1,202 @@
+from math import gcd
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+
+# slot length used when the labels do not reveal one, e.g. a single slot
+DEFAULT_GRANULARITY = 15
+
+
+def parse_minute(label: str):
+    """
+    Returns the minute of day of an "HH:MM" label, or None if the label is not
+    a time of day.
+    """
+
+    hours, sep, minutes = str(label).partition(":")
+
+    if not (sep and hours.isdigit() and minutes.isdigit()):
+        return None
+
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_slot(label: str):
+    """
+    Split a timeslot label of the form "[day] HH:MM" into its day and minute
+    of day. The day is everything before the time, e.g. "Mon" or
+    "2024-05-13", and empty for plain "HH:MM" labels.
+
+    Returns:
+        Tuple of day and minute, or None if the label does not end in a time.
+    """
+
+    day, _, time = str(label).strip().rpartition(" ")
+    minute = parse_minute(time)
+
+    if minute is None:
+        return None
+
+    return day.strip(), minute
+
+
+def format_minute(minute: int) -> str:
+    """
+    Returns the "HH:MM" label of a minute of day.
+    """
+
+    return "%02d:%02d" % divmod(minute % MINUTES_PER_DAY, 60)
+
+
+class TimeslotCalendar:
+    """
+    Bidirectional index between timeslot labels, integer offsets and minutes
+    of the horizon, built once from the timeslot options of the board.
+
+    Labels are "HH:MM" for a single day, or "<day> HH:MM" (e.g. "Mon 09:00"
+    or "2024-05-13 09:00") for a horizon of several days or weeks. Days are
+    ordered by their first appearance among the labels, which on the board is
+    the order of the options, and every day spans 24 hours of the horizon.
+
+    Offsets count the timeslots in chronological order and are what the
+    scheduler works with; labels are only needed to report a result. A
+    meeting may not run across a boundary: a gap between two consecutive
+    timeslots (such as the night between two days), or one of the given
+    boundary times such as the start of the lunch break, on every day.
+
+    Args:
+        labels: Timeslot labels; labels that are not "[day] HH:MM" times
+            (such as "skipped") are ignored.
+        granularity: Length of one timeslot in minutes. By default the
+            smallest step between two timeslots of the same day.
+        boundaries: "HH:MM" times no meeting may run across.
+    """
+
+    def __init__(self, labels, granularity: int = None, boundaries=()):
+        # day names in horizon order, "" for plain "HH:MM" labels
+        self.days = []
+        days = {}
+        by_minute = {}
+        for label in labels:
+            slot = parse_slot(label)
+            if slot is None:
+                continue
+            day, minute = slot
+            day_index = days.setdefault(day.lower(), len(days))
+            if day_index == len(self.days):
+                self.days.append(day)
+            by_minute.setdefault(day_index * MINUTES_PER_DAY + minute, str(label))
+        minutes = sorted(by_minute)
+
+        if granularity is None:
+            granularity = infer_granularity(minutes)
+
+        self.granularity = granularity
+        self.minutes = np.array(minutes, dtype=np.int64)
+        self.labels = [by_minute[m] for m in minutes]
+        self.offsets = {label: i for i, label in enumerate(self.labels)}
+        self._end_labels = [format_minute(m + granularity) for m in minutes]
+
+        # barrier[i] is True if a meeting may not contain both slot i - 1
+        # and slot i
+        barrier = np.zeros(len(minutes), dtype=bool)
+        if len(minutes) > 1:
+            barrier[1:] = np.diff(self.minutes) != granularity
+        for boundary in boundaries:
+            barrier[self.minutes % MINUTES_PER_DAY == parse_minute(boundary)] = True
+        barrier[0:1] = False
+        self._barriers = np.concatenate(([0], np.cumsum(barrier, dtype=np.int64)))
+        self._allowed = {}
+
+        # maximal runs of timeslots without a barrier inside
+        cuts = np.flatnonzero(barrier).tolist()
+        self.segments = [
+            (start, end)
+            for start, end in zip([0] + cuts, cuts + [len(minutes)])
+            if end > start
+        ]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def offset(self, label: str) -> int:
+        """
+        Returns the offset of a timeslot label.
+        """
+
+        return self.offsets[label]
+
+    def label(self, offset: int) -> str:
+        """
+        Returns the label of the timeslot at `offset`.
+        """
+
+        return self.labels[offset]
+
+    def minute(self, offset: int) -> int:
+        """
+        Returns the minute of the horizon at which the timeslot at `offset`
+        starts; the first day starts at minute 0.
+        """
+
+        return int(self.minutes[offset])
+
+    def day(self, offset: int) -> int:
+        """
+        Returns the index into `days` of the timeslot at `offset`.
+        """
+
+        return int(self.minutes[offset]) // MINUTES_PER_DAY
+
+    def slots_for(self, duration: int) -> int:
+        """
+        Returns the number of timeslots a meeting of `duration` minutes needs.
+        """
+
+        return max(1, -(-int(duration) // self.granularity))
+
+    def span(self, start: int, length: int) -> str:
+        """
+        Returns the "[day] HH:MM - HH:MM" span of `length` timeslots from
+        `start`.
+        """
+
+        return self.labels[start] + " - " + self._end_labels[start + length - 1]
+
+    def allowed_starts(self, length: int) -> np.ndarray:
+        """
+        Returns a boolean vector over offsets that is True where a meeting of
+        `length` timeslots may start without running across a boundary or
+        past the last timeslot. Results are cached per length.
+        """
+
+        allowed = self._allowed.get(length)
+
+        if allowed is None:
+            allowed = np.zeros(len(self), dtype=bool)
+            count = len(self) - length + 1
+            if length >= 1 and count > 0:
+                # number of barriers strictly inside each window
+                inside = (
+                    self._barriers[length : length + count]
+                    - self._barriers[1 : 1 + count]
+                )
+                allowed[:count] = inside == 0
+            self._allowed[length] = allowed
+
+        return allowed
+
+
+def infer_granularity(minutes: list) -> int:
+    """
+    Returns the greatest common divisor of the steps between consecutive
+    timeslots of the same day, or `DEFAULT_GRANULARITY` if there are none.
+    """
+
+    step = 0
+
+    for previous, current in zip(minutes, minutes[1:]):
+        if current // MINUTES_PER_DAY == previous // MINUTES_PER_DAY:
+            step = gcd(step, current - previous)
+
+    return step or DEFAULT_GRANULARITY
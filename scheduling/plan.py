@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from biocypher._logger import logger
+from scheduling.adapters.mutations import (
+    MAX_MUTATIONS_PER_DOCUMENT,
+    FieldUpdate,
+    chunked,
+)
+
+# format of the plan files; plans of another version are refused
+PLAN_VERSION = 1
+
+# where runs that plan and apply in one go keep their plan, below the cache
+# directory
+PLAN_DIR = "plans"
+
+
+@dataclass
+class Plan:
+    """
+    Everything a run intends to change, computed without writing anything:
+    the field updates of the project board and what the README should show.
+
+    Args:
+        project_id: Node ID of the project the updates were resolved for.
+        updates: `FieldUpdate`s in the order they are to be sent.
+        schedule: Rows of the planned schedule, one dict per club.
+        persons: Dict of person ID to the clubs they attend.
+        created_at: ISO time the plan was made.
+    """
+
+    project_id: str
+    updates: list = field(default_factory=list)
+    schedule: list = field(default_factory=list)
+    persons: dict = field(default_factory=dict)
+    created_at: str = None
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now(timezone.utc).isoformat()
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PLAN_VERSION,
+            "project_id": self.project_id,
+            "created_at": self.created_at,
+            "updates": [asdict(update) for update in self.updates],
+            "schedule": self.schedule,
+            "persons": self.persons,
+        }
+
+    def digest(self) -> str:
+        """
+        Returns a hash of the plan's content, which ties journal entries to
+        the plan they were written for.
+        """
+
+        content = json.dumps(self.to_dict(), sort_keys=True, default=str)
+
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+    def save(self, path: str):
+        """
+        Write the plan to a JSON file atomically.
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+
+def read_plan(path: str) -> Plan:
+    """
+    Read a plan written by `Plan.save`.
+
+    Raises:
+        ValueError: If the file is not a plan of the current version.
+    """
+
+    with open(path, encoding="utf-8") as f:
+        content = json.load(f)
+
+    if content.get("version") != PLAN_VERSION:
+        raise ValueError(
+            f"{path} is a plan of version {content.get('version')}, "
+            f"expected {PLAN_VERSION}; plan the run again."
+        )
+
+    return Plan(
+        project_id=content["project_id"],
+        updates=[FieldUpdate(**update) for update in content.get("updates", [])],
+        schedule=content.get("schedule", []),
+        persons=content.get("persons", {}),
+        created_at=content.get("created_at"),
+    )
+
+
+class ApplyJournal:
+    """
+    Append-only JSON lines log of the updates of a plan that were sent.
+
+    Every line records the outcome of one update, identified by the digest
+    of its plan and its position in it. A restarted apply skips the updates
+    that already succeeded, so an apply can be repeated until it is through.
+    Lines of other plans are ignored.
+
+    Args:
+        path: Location of the journal, e.g. next to the plan file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def succeeded(self, plan: Plan) -> set:
+        """
+        Returns the positions of the updates of `plan` that succeeded.
+        """
+
+        if not os.path.exists(self.path):
+            return set()
+
+        digest = plan.digest()
+        done = set()
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short by a crash
+                    continue
+                if entry.get("plan") == digest and entry.get("ok"):
+                    done.add(entry["index"])
+
+        return done
+
+    def record(self, plan: Plan, entries: list):
+        """
+        Append the outcome of sent updates and flush them to disk.
+
+        Args:
+            plan: Plan the updates belong to.
+            entries: Tuples of the position of an update in the plan and its
+                `MutationResult`.
+        """
+
+        digest = plan.digest()
+        now = datetime.now(timezone.utc).isoformat()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            for index, result in entries:
+                entry = {
+                    "plan": digest,
+                    "index": index,
+                    "item_id": result.update.item_id,
+                    "update": result.update.description,
+                    "ok": result.ok,
+                    "error": result.error,
+                    "time": now,
+                }
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def keep_plan(plan: Plan, name: str) -> str:
+    """
+    Save the plan of a run that plans and applies in one go, so that an
+    interrupted apply can be resumed with `--apply`.
+
+    The plan is written to `<name>.json` in the `plans` directory below
+    `BIOCYPHER_GITHUB_CACHE_DIR` (by default `.cache`), replacing the plan
+    and journal of the previous run.
+
+    Returns:
+        The path of the plan; its journal is the path plus ".journal".
+    """
+
+    cache_dir = os.getenv("BIOCYPHER_GITHUB_CACHE_DIR") or ".cache"
+    path = os.path.join(cache_dir, PLAN_DIR, f"{name}.json")
+    plan.save(path)
+
+    if os.path.exists(path + ".journal"):
+        os.remove(path + ".journal")
+
+    return path
+
+
+def apply_plan(
+    adapter,
+    plan: Plan,
+    journal: ApplyJournal = None,
+    chunk_size: int = MAX_MUTATIONS_PER_DOCUMENT,
+    concurrency: int = 4,
+) -> list:
+    """
+    Send the updates of a plan in batched mutation documents, skipping those
+    the journal lists as done. Up to `concurrency` documents are in flight
+    through the adapter's `MutationDispatcher`, which keeps the updates of
+    each item in plan order, and each batch is journaled as soon as it is
+    sent. After a request fails for good, no further batches are started;
+    the batches in flight are still journaled before the error is raised.
+
+    Returns:
+        The `MutationResult` of every update sent in this call, in plan
+        order.
+
+    Raises:
+        ValueError: If the plan was made for another project.
+    """
+
+    if plan.project_id != adapter.project_id:
+        raise ValueError(
+            f"The plan was made for project {plan.project_id}, not "
+            f"{adapter.project_id}."
+        )
+
+    done = journal.succeeded(plan) if journal else set()
+    pending = [
+        (index, update)
+        for index, update in enumerate(plan.updates)
+        if index not in done
+    ]
+
+    if done:
+        logger.info(f"Skipping {len(done)} updates already applied.")
+
+    results = {}
+    error = None
+
+    with adapter.dispatcher(concurrency) as dispatcher:
+        futures = {
+            dispatcher.submit_chunk([update for _, update in chunk]): chunk
+            for chunk in chunked(pending, chunk_size)
+        }
+
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+
+            try:
+                chunk_results = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+
+            entries = [
+                (index, result)
+                for (index, _), result in zip(futures[future], chunk_results)
+            ]
+            if journal:
+                journal.record(plan, entries)
+            results.update(entries)
+
+    failed = sum(not result.ok for result in results.values())
+    logger.info(f"Sent {len(results)} project updates, {failed} failed.")
+
+    if error is not None:
+        raise error
+
+    return [results[index] for index, _ in pending if index in results]
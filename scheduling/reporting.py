@@ -0,0 +1,126 @@
+import json
+import sys
+from datetime import datetime, timezone
+
+# verbosity levels: nothing but errors, the end-of-run summary, one event per
+# club, and full table dumps
+QUIET = 0
+SUMMARY = 1
+PROGRESS = 2
+DEBUG = 3
+
+
+class Reporter:
+    """
+    Leveled progress output of the pipeline scripts.
+
+    Events are single JSON lines (`{"event": ..., ...}`) that are cheap to
+    write and easy to grep or parse in CI logs; tables are meant for the end
+    of a run. Anything above the verbosity level is dropped before it is
+    formatted, and tables may be passed as callables so that they are not
+    even built.
+
+    Args:
+        level: Verbosity, one of `QUIET`, `SUMMARY`, `PROGRESS` and `DEBUG`.
+        stream: Output of tables and messages.
+        events: Output of the JSON events, by default `stream`.
+        events_level: Verbosity of the events, by default `level`.
+    """
+
+    def __init__(
+        self, level: int = SUMMARY, stream=None, events=None, events_level=None
+    ):
+        self.level = level
+        self.stream = stream or sys.stdout
+        self.events = events or self.stream
+        self.events_level = level if events_level is None else events_level
+
+    def enabled(self, level: int) -> bool:
+        return self.level >= level
+
+    def event(self, name: str, level: int = PROGRESS, **fields):
+        """
+        Write one event as a JSON line.
+        """
+
+        if self.events_level < level:
+            return
+
+        record = {
+            "event": name,
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            **fields,
+        }
+        self.events.write(json.dumps(record, default=str) + "\n")
+
+    def message(self, text, level: int = SUMMARY):
+        """
+        Write a plain message, or the result of calling `text`.
+        """
+
+        if self.level < level:
+            return
+
+        self.stream.write(str(text() if callable(text) else text) + "\n")
+
+    def table(self, title: str, table, level: int = SUMMARY):
+        """
+        Write a titled table: a DataFrame, or a callable returning one.
+        """
+
+        if self.level < level:
+            return
+
+        if callable(table):
+            table = table()
+
+        self.stream.write(f"{title}\n{table.to_string(index=False)}\n")
+
+    def close(self):
+        if self.events is not self.stream:
+            self.events.close()
+
+
+def add_arguments(parser):
+    """
+    Add the -v, -q and --events options of a `Reporter` to an argument
+    parser.
+    """
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="print an event per club (-v) or all tables (-vv)",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="print nothing but errors",
+    )
+    parser.add_argument(
+        "--events",
+        metavar="PATH",
+        default=None,
+        help="append the JSON events, including those of every club, to a "
+        "file instead of standard output",
+    )
+
+
+def from_arguments(args) -> Reporter:
+    """
+    Returns the `Reporter` configured by the options of `add_arguments`.
+    """
+
+    level = QUIET if args.quiet else min(SUMMARY + args.verbose, DEBUG)
+
+    if not args.events:
+        return Reporter(level)
+
+    return Reporter(
+        level,
+        events=open(args.events, "a", encoding="utf-8"),
+        events_level=max(level, PROGRESS),
+    )
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pickle
+from importlib.metadata import PackageNotFoundError, version
+import pandas as pd
+from biocypher._logger import logger
+
+# configuration files that determine the ontology BioCypher builds
+ONTOLOGY_CONFIG_FILES = ("config/biocypher_config.yaml", "config/schema_config.yaml")
+
+
+def load_tables(adapter, biocypher: bool = False, cache_dir: str = None) -> dict:
+    """
+    Returns the adapter's graph as one DataFrame per node and edge label.
+
+    By default, the tables are built straight from `GitHubAdapter.to_records`.
+    With `biocypher`, the graph goes through BioCypher instead, e.g. to
+    validate it against the schema, starting from a cached ontology if
+    `cache_dir` is given.
+    """
+
+    if not biocypher:
+        return {
+            name: pd.DataFrame(columns)
+            for name, columns in adapter.to_records().items()
+        }
+
+    # download the project while BioCypher loads its ontology
+    adapter.prefetch()
+    bc = cached_biocypher(cache_dir)
+    bc.add_nodes(adapter.get_nodes())
+    bc.add_edges(adapter.get_edges())
+
+    return bc.to_df()
+
+
+def ontology_key() -> str:
+    """
+    Returns a hash of everything the ontology depends on: the BioCypher
+    version and the contents of the configuration files.
+    """
+
+    digest = hashlib.sha256()
+
+    try:
+        digest.update(version("biocypher").encode())
+    except PackageNotFoundError:
+        pass
+
+    for path in ONTOLOGY_CONFIG_FILES:
+        digest.update(path.encode())
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def cached_biocypher(cache_dir: str = None):
+    """
+    Returns a `BioCypher` instance whose ontology is loaded from a pickle in
+    `cache_dir`, so that the head ontology is neither downloaded nor parsed
+    again while the configuration stays the same. Without a usable cached
+    ontology, it is built as usual and then saved.
+
+    The ontology is reached through private attributes of `BioCypher`; if a
+    version lacks them, or the pickle cannot be read or written, the cache is
+    bypassed and BioCypher builds the ontology itself.
+    """
+
+    from biocypher import BioCypher
+
+    bc = BioCypher()
+
+    if not cache_dir:
+        return bc
+
+    if not hasattr(bc, "_ontology") or not callable(
+        getattr(bc, "_get_ontology", None)
+    ):
+        logger.warning(
+            "Ontology cache miss: this BioCypher version keeps its ontology "
+            "elsewhere, building it without the cache."
+        )
+        return bc
+
+    path = os.path.join(cache_dir, f"ontology-{ontology_key()[:16]}.pickle")
+
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                bc._ontology = pickle.load(f)
+            return bc
+        except Exception as e:
+            # e.g. a truncated file, or classes renamed in another version
+            bc._ontology = None
+            logger.warning(f"Ontology cache miss, unreadable {path}: {e}")
+    else:
+        logger.info(f"Ontology cache miss, building the ontology for {path}.")
+
+    ontology = bc._get_ontology()
+
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(ontology, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not cache the ontology in {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return bc
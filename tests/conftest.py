@@ -0,0 +1,131 @@
+import json
+import re
+import pytest
+from scheduling.engine import Club, Person, Problem, TimeslotCalendar
+
+
+class FakeTransport:
+    """
+    In-memory stand-in for `GraphQLTransport` that serves a project board
+    in pages and counts the requests it answers.
+    """
+
+    def __init__(self, items: list, fields: list = None):
+        self.items = items
+        self.fields = fields or [
+            {
+                "id": "F_status",
+                "name": "Status",
+                "options": [
+                    {"id": "S_todo", "name": "To be scheduled"},
+                    {"id": "S_done", "name": "Scheduled"},
+                ],
+            },
+            {"id": "F_title", "name": "Title"},
+        ]
+        self.queries = []
+        self.mutations = []
+
+    def query(self, query: str, variables: dict = None) -> dict:
+        self.queries.append(query)
+
+        if "organization" in query:
+            return {"organization": {"projectV2": {"id": "P"}}}
+
+        if "fields(first" in query:
+            return {"node": {"fields": {"nodes": self.fields}}}
+
+        if "nodes(ids:" in query:
+            ids = json.loads(re.search(r"nodes\(ids: (\[.*?\])\)", query).group(1))
+            return {"nodes": [item for item in self.items if item["id"] in ids]}
+
+        # the cursor of a page is the position of its last item
+        first = int(re.search(r"items\(first: (\d+)", query).group(1))
+        after = re.search(r'after: "(\d+)"', query)
+        start = int(after.group(1)) if after else 0
+        end = start + first
+
+        return {
+            "node": {
+                "items": {
+                    "nodes": self.items[start:end],
+                    "pageInfo": {
+                        "hasNextPage": end < len(self.items),
+                        "endCursor": str(min(end, len(self.items))),
+                    },
+                }
+            }
+        }
+
+    def execute(self, query: str, variables: dict = None) -> dict:
+        self.mutations.append(query)
+        aliases = re.findall(r"(m\d+): update", query)
+
+        return {"data": {alias: {"clientMutationId": None} for alias in aliases}}
+
+
+def make_item(number: int, status: str = "To be scheduled", updated: str = "1"):
+    """
+    Returns a project item node as the API returns it.
+    """
+
+    return {
+        "id": f"I{number}",
+        "updatedAt": f"2024-01-01T00:00:0{updated}Z",
+        "fieldValue_0": {"text": f"Club {number}", "field": {"name": "Title"}},
+        "fieldValue_1": {"name": status, "field": {"name": "Status"}},
+        "content": {
+            "updatedAt": "2024-01-01T00:00:00Z",
+            "number": number,
+            "body": "",
+            "assignees": {"nodes": [{"login": "alice"}]},
+        },
+    }
+
+
+def assert_valid(problem, schedule):
+    """
+    Every club is either placed or unscheduled, and no person is busy or
+    double-booked in a timeslot of their clubs.
+    """
+
+    assert set(schedule.assignments) | set(schedule.unscheduled) == {
+        club.id for club in problem.clubs
+    }
+    assert not set(schedule.assignments) & set(schedule.unscheduled)
+
+    calendar = TimeslotCalendar(problem.slots, boundaries=problem.boundaries)
+    taken = {person.id: set(person.busy) for person in problem.persons}
+
+    for assignment in schedule.assignments.values():
+        slots = set(range(assignment.start, assignment.start + assignment.length))
+        assert (
+            assignment.start in calendar.allowed_starts(assignment.length).nonzero()[0]
+        )
+        for person_id in assignment.attendees:
+            assert not taken.setdefault(person_id, set()) & slots
+            taken[person_id] |= slots
+
+
+@pytest.fixture
+def small_problem():
+    """
+    Five clubs of four persons in a day of 15-minute timeslots, with a
+    lunch break at noon.
+    """
+
+    clubs = (
+        Club("c1", "Club 1", 60, ("alice", "bob")),
+        Club("c2", "Club 2", 90, ("bob", "carol")),
+        Club("c3", "Club 3", 30, ("carol", "dave"), priority=True),
+        Club("c4", "Club 4", 60, ("alice", "dave")),
+        Club("c5", "Club 5", 45, ("alice", "bob", "carol")),
+    )
+    slots = tuple(f"{9 + m // 60:02d}:{m % 60:02d}" for m in range(0, 8 * 60, 15))
+
+    return Problem(
+        clubs=clubs,
+        persons=(Person("alice", busy=(0, 1)),),
+        slots=slots,
+        boundaries=("12:00",),
+    )
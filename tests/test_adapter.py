@@ -0,0 +1,198 @@
+from itertools import islice
+import numpy as np
+import pytest
+from calculate_schedule import build_problem
+from scheduling.adapters.adapter import (
+    RECORD_COLUMNS,
+    GitHubAdapter,
+    GitHubAdapterEdgeType,
+    GitHubAdapterIssueField,
+)
+from scheduling.tables import load_tables
+from tests.conftest import FakeTransport, make_item
+
+
+def page_queries(transport: FakeTransport) -> list:
+    return [query for query in transport.queries if "items(first" in query]
+
+
+def test_items_are_streamed_across_page_boundaries():
+    transport = FakeTransport([make_item(i) for i in range(1, 6)])
+    adapter = GitHubAdapter(transport=transport, page_size=2, lazy=True)
+
+    clubs = [node for node in adapter.get_nodes() if node[1] == "club"]
+
+    assert [node[0] for node in clubs] == [f"I{i}" for i in range(1, 6)]
+    queries = page_queries(transport)
+    assert len(queries) == 3
+    assert "after" not in queries[0]
+    assert 'after: "2"' in queries[1] and 'after: "4"' in queries[2]
+
+    # a second pass replays the downloaded items
+    assert len([node for node in adapter.get_nodes() if node[1] == "club"]) == 5
+    assert len(page_queries(transport)) == 3
+
+
+def test_stopping_early_leaves_later_pages_alone():
+    transport = FakeTransport([make_item(i) for i in range(1, 10)])
+    adapter = GitHubAdapter(transport=transport, page_size=2, lazy=True)
+
+    nodes = adapter.get_nodes()
+    assert len(list(islice(nodes, 1))) == 1
+    nodes.close()
+
+    # the first page and at most the prefetched second one
+    assert len(page_queries(transport)) <= 2
+
+
+class FailingTransport(FakeTransport):
+    def query(self, query: str, variables: dict = None) -> dict:
+        if "items(first" in query:
+            raise ConnectionError("board unavailable")
+
+        return super().query(query, variables)
+
+
+def test_lazy_adapter_waits_for_first_use():
+    transport = FakeTransport([make_item(1)])
+    adapter = GitHubAdapter(transport=transport, lazy=True)
+
+    assert transport.queries == []
+
+    assert adapter.get_node_count() > 0
+    assert transport.queries
+
+
+def test_eager_adapter_sets_up_the_project():
+    transport = FakeTransport([make_item(1)])
+    GitHubAdapter(transport=transport)
+
+    assert any("fields(first" in query for query in transport.queries)
+
+
+def test_prefetch_errors_are_raised_on_use():
+    transport = FailingTransport([make_item(1)])
+    adapter = GitHubAdapter(transport=transport, lazy=True)
+
+    future = adapter.prefetch()
+    assert isinstance(future.exception(timeout=5), ConnectionError)
+
+    with pytest.raises(ConnectionError, match="board unavailable"):
+        list(adapter.get_nodes())
+    with pytest.raises(ConnectionError):
+        adapter.get_node_count()
+
+
+def test_records_have_one_column_per_property():
+    items = [make_item(1), make_item(2, status="Scheduled")]
+    adapter = GitHubAdapter(transport=FakeTransport(items), lazy=True)
+
+    records = adapter.to_records()
+    clubs = records["club"]
+
+    assert list(clubs) == [
+        "id",
+        "title",
+        "duration",
+        "timeslot",
+        "status",
+        "labels",
+        "assignees",
+        "issue",
+    ]
+    assert clubs["id"] == ["I1", "I2"]
+    assert clubs["duration"] == [30, 30] and clubs["issue"] == [1, 2]
+    assert clubs["timeslot"] == [None, None]
+    assert clubs["assignees"] == [["alice"], ["alice"]]
+    assert records["person"] == {"id": ["alice"]}
+    assert records["attends"] == {"source_id": ["alice"] * 2, "target_id": ["I1", "I2"]}
+    assert records["status"] == {"id": ["to be scheduled", "scheduled"]}
+
+    frame = load_tables(adapter)["club"]
+    assert frame["duration"].dtype == np.int64 and frame["issue"].dtype == np.int64
+
+
+def test_empty_project_has_empty_tables():
+    adapter = GitHubAdapter(transport=FakeTransport([]), lazy=True)
+
+    records = adapter.to_records()
+
+    assert records["club"] == {column: [] for column in RECORD_COLUMNS["club"]}
+    assert records["person"] == {"id": []}
+    assert records["attends"] == {"source_id": [], "target_id": []}
+
+    tables = load_tables(adapter)
+    assert tables["club"].empty and list(tables["club"]) == list(RECORD_COLUMNS["club"])
+    assert build_problem(tables, ["09:00", "09:30"], {}).clubs == ()
+
+
+def clubs(adapter: GitHubAdapter) -> list:
+    return [node[0] for node in adapter.get_nodes() if node[1] == "club"]
+
+
+def test_only_the_fields_in_use_are_selected():
+    transport = FakeTransport([make_item(1)])
+    adapter = GitHubAdapter(
+        node_fields=[GitHubAdapterIssueField.TITLE, GitHubAdapterIssueField.STATUS],
+        edge_types=[GitHubAdapterEdgeType.ATTENDS],
+        transport=transport,
+        lazy=True,
+    )
+
+    assert clubs(adapter) == ["I1"]
+    (query,) = page_queries(transport)
+    assert 'fieldValueByName(name: "Status")' in query
+    assert "assignees(first" in query
+    assert "Duration" not in query and "labels(first" not in query
+    assert "body" not in query
+
+
+def test_part_of_edges_select_the_issue_body():
+    transport = FakeTransport([make_item(1)])
+    adapter = GitHubAdapter(
+        node_fields=[GitHubAdapterIssueField.TITLE],
+        edge_types=[GitHubAdapterEdgeType.PART_OF],
+        transport=transport,
+        lazy=True,
+    )
+
+    adapter.load()
+    (query,) = page_queries(transport)
+    assert "body" in query
+    assert 'fieldValueByName(name: "Component Type")' in query
+    assert "assignees(first" not in query
+
+
+def test_item_filter_drops_other_items():
+    items = [make_item(1), make_item(2, "Scheduled"), make_item(3, "Scheduled")]
+    transport = FakeTransport(items)
+    adapter = GitHubAdapter(
+        node_fields=[GitHubAdapterIssueField.TITLE],
+        item_filter={"Status": "Scheduled"},
+        transport=transport,
+        lazy=True,
+    )
+
+    assert clubs(adapter) == ["I2", "I3"]
+    assert adapter.to_records()["attends"]["target_id"] == ["I2", "I3"]
+    # the filter field is selected even though no node field needs it
+    (query,) = page_queries(transport)
+    assert 'fieldValueByName(name: "Status")' in query
+
+
+def test_item_filter_skips_downloads_with_a_cache(tmp_path):
+    items = [make_item(1), make_item(2, "Scheduled"), make_item(3)]
+    transport = FakeTransport(items)
+    adapter = GitHubAdapter(
+        item_filter={"Status": ["Scheduled", "Unscheduled"]},
+        transport=transport,
+        cache_dir=str(tmp_path),
+        lazy=True,
+    )
+
+    assert clubs(adapter) == ["I2"]
+    (listing,) = page_queries(transport)
+    assert 'fieldValueByName(name: "Status")' in listing
+    assert "Title" not in listing
+    (download,) = [query for query in transport.queries if "nodes(ids:" in query]
+    assert '["I2"]' in download
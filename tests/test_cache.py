@@ -0,0 +1,166 @@
+import time
+from scheduling.adapters.adapter import GitHubAdapter
+from scheduling.adapters.cache import ItemSnapshot, ProjectMetadata, item_version
+from tests.conftest import FakeTransport, make_item
+
+
+def node(item_id: str, updated: str) -> dict:
+    return {"id": item_id, "updatedAt": updated, "content": {"updatedAt": "0"}}
+
+
+def test_diff_finds_new_changed_and_deleted_items(tmp_path):
+    snapshot = ItemSnapshot(str(tmp_path / "items.json.gz"), "P")
+    versions = {"a": "1", "b": "1", "c": "1"}
+    snapshot.merge([node(i, "1") for i in versions], versions, [])
+
+    changed, deleted = snapshot.diff({"a": "1", "b": "2", "d": "1"})
+
+    assert sorted(changed) == ["b", "d"]
+    assert deleted == ["c"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "items.json.gz")
+    snapshot = ItemSnapshot(path, "P")
+    snapshot.merge([node("a", "1")], {"a": "1"}, [])
+    snapshot.save()
+
+    loaded = ItemSnapshot(path, "P")
+    assert loaded.load()
+    assert loaded.nodes() == [node("a", "1")]
+
+    assert not ItemSnapshot(path, "other project").load()
+
+
+def test_item_version_is_the_later_timestamp():
+    assert item_version({"updatedAt": "2", "content": {"updatedAt": "3"}}) == "3"
+    assert item_version({"updatedAt": "2", "content": None}) == "2"
+
+
+def test_adapter_downloads_only_changed_items(tmp_path):
+    items = [make_item(1), make_item(2)]
+    transport = FakeTransport(items)
+
+    adapter = GitHubAdapter(transport=transport, cache_dir=str(tmp_path), lazy=True)
+    assert len(list(adapter.get_nodes())) > 0
+    assert sum("nodes(ids:" in query for query in transport.queries) == 1
+
+    # the second item changed
+    items[1] = make_item(2, status="Scheduled", updated="2")
+    transport.queries.clear()
+
+    adapter = GitHubAdapter(transport=transport, cache_dir=str(tmp_path), lazy=True)
+    clubs = {
+        node_id: properties
+        for node_id, label, properties in adapter.get_nodes()
+        if label == "club"
+    }
+
+    by_id = [query for query in transport.queries if "nodes(ids:" in query]
+    assert len(by_id) == 1
+    assert '"I2"' in by_id[0] and '"I1"' not in by_id[0]
+    assert clubs["I2"]["status"] == "Scheduled"
+    assert clubs["I1"]["status"] == "To be scheduled"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecreatedFieldTransport(FakeTransport):
+    """
+    A board whose "Scheduled" option is deleted and created again after the
+    metadata were first downloaded; updates to the old option ID fail once.
+    """
+
+    def query(self, query: str, variables: dict = None) -> dict:
+        data = super().query(query, variables)
+
+        if "fields(first" in query:
+            self.fields = [
+                {
+                    "id": "F_status",
+                    "name": "Status",
+                    "options": [{"id": "S_new", "name": "Scheduled"}],
+                }
+            ]
+
+        return data
+
+    def execute(self, query: str, variables: dict = None) -> dict:
+        self.mutations.append(query)
+
+        if "S_done" in query:
+            return {
+                "errors": [
+                    {
+                        "path": ["m0"],
+                        "message": "Could not resolve to a node with the "
+                        "global id of 'S_done'",
+                    }
+                ]
+            }
+
+        return {"data": {"m0": {"clientMutationId": None}}}
+
+
+def metadata_queries(transport: FakeTransport) -> int:
+    return sum("fields(first" in query for query in transport.queries)
+
+
+def test_metadata_expire_after_the_ttl(tmp_path):
+    clock = Clock()
+    metadata = ProjectMetadata(str(tmp_path / "p.json"), "saezlab", 18, 60, clock)
+    metadata.save("P", [{"id": "F_title", "name": "Title"}])
+
+    clock.now += 60
+    assert metadata.load() == ("P", [{"id": "F_title", "name": "Title"}])
+    assert ProjectMetadata(metadata.path, "saezlab", 19, 60, clock).load() is None
+
+    clock.now += 1
+    assert metadata.load() is None
+
+    metadata.save("P", [])
+    metadata.invalidate()
+    assert metadata.load() is None
+    metadata.invalidate()
+
+
+def test_adapter_reuses_metadata_until_expired_or_invalidated(tmp_path):
+    transport = FakeTransport([make_item(1)])
+    GitHubAdapter(transport=transport, cache_dir=str(tmp_path))
+    assert metadata_queries(transport) == 1
+
+    adapter = GitHubAdapter(transport=transport, cache_dir=str(tmp_path), lazy=True)
+    assert adapter.get_field_option("Status", "Scheduled") == ("F_status", "S_done")
+    assert metadata_queries(transport) == 1
+
+    adapter.invalidate_metadata()
+    adapter.get_field_option("Status", "Scheduled")
+    assert metadata_queries(transport) == 2
+
+    adapter = GitHubAdapter(
+        transport=transport, cache_dir=str(tmp_path), metadata_ttl=60, lazy=True
+    )
+    adapter._metadata.clock = lambda: time.time() + 61
+    adapter.get_field_option("Status", "Scheduled")
+    assert metadata_queries(transport) == 3
+
+
+def test_unknown_ids_refresh_metadata_and_resend(tmp_path):
+    transport = RecreatedFieldTransport([make_item(1)])
+    adapter = GitHubAdapter(transport=transport, cache_dir=str(tmp_path), lazy=True)
+    update = adapter.make_update("I1", "Status", "Scheduled")
+
+    (result,) = adapter.send_updates([update])
+
+    assert result.ok and result.update.option_id == "S_new"
+    assert metadata_queries(transport) == 2
+    assert len(transport.mutations) == 2 and "S_new" in transport.mutations[1]
+    # the cache now holds the recreated option
+    _, fields = ProjectMetadata(adapter._metadata.path, "saezlab", 18, 60).load()
+    assert fields[0]["options"] == [{"id": "S_new", "name": "Scheduled"}]
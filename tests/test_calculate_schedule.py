@@ -0,0 +1,27 @@
+import pandas as pd
+from calculate_schedule import MANDATORY_ATTENDEES, build_problem
+from scheduling.engine import RandomGreedy
+
+
+def test_busy_mandatory_attendee_blocks_placement():
+    (mandatory,) = MANDATORY_ATTENDEES
+    dfs = {
+        "club": pd.DataFrame(
+            {
+                "id": ["c1"],
+                "title": ["Club 1"],
+                "duration": ["30"],
+                "status": ["To be scheduled"],
+            }
+        ),
+        "person": pd.DataFrame({"id": ["alice"]}),
+        "attends": pd.DataFrame({"source_id": ["alice"], "target_id": ["c1"]}),
+    }
+    timeslots = ["09:00", "09:15", "09:30", "09:45"]
+
+    # the mandatory attendee has no person node, only a calendar
+    problem = build_problem(dfs, timeslots, {mandatory: (0, 1)})
+    schedule = RandomGreedy(seed=0).solve(problem)
+
+    assert mandatory in {person.id for person in problem.persons}
+    assert schedule.assignments["c1"].timeslot == "09:30"
@@ -0,0 +1,181 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+import pytest
+from scheduling.calendars import (
+    BusyRule,
+    busy_offsets,
+    compile_mask,
+    load_availability,
+    parse_ics,
+    parse_table,
+)
+from scheduling.engine import TimeslotCalendar
+
+
+def ics(*events: str) -> list:
+    lines = ["BEGIN:VCALENDAR"]
+    for event in events:
+        lines += ["BEGIN:VEVENT", *event.strip().split("\n"), "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+
+    return [line.strip() + "\r\n" for line in lines]
+
+
+def starts(rule: BusyRule, first: str, last: str) -> list:
+    return [
+        start.isoformat()
+        for start, _ in rule.occurrences(
+            datetime.fromisoformat(first), datetime.fromisoformat(last)
+        )
+    ]
+
+
+def test_weekly_rule_expands_within_window_only():
+    (rule,) = parse_ics(ics("""
+            UID:standup
+            DTSTART:20240101T090000
+            DTEND:20240101T093000
+            RRULE:FREQ=WEEKLY;BYDAY=MO,WE
+            """))
+
+    assert rule.freq == "WEEKLY" and rule.weekdays == (0, 2)
+    assert rule.minutes == 30
+    assert starts(rule, "2030-01-07", "2030-01-13") == [
+        "2030-01-07T09:00:00",
+        "2030-01-09T09:00:00",
+    ]
+
+
+def test_daily_rule_with_interval_count_and_exdate():
+    (rule,) = parse_ics(ics("""
+            UID:daily
+            DTSTART:20240101T120000
+            DURATION:PT1H
+            RRULE:FREQ=DAILY;INTERVAL=2;COUNT=4
+            EXDATE:20240103T120000
+            """))
+
+    assert starts(rule, "2024-01-01", "2024-02-01") == [
+        "2024-01-01T12:00:00",
+        "2024-01-05T12:00:00",
+        "2024-01-07T12:00:00",
+    ]
+
+
+def test_until_ends_the_recurrence():
+    (rule,) = parse_ics(ics("""
+            UID:until
+            DTSTART:20240101T090000
+            DTEND:20240101T100000
+            RRULE:FREQ=WEEKLY;UNTIL=20240115T090000
+            """))
+
+    assert starts(rule, "2024-01-01", "2024-03-01") == [
+        "2024-01-01T09:00:00",
+        "2024-01-08T09:00:00",
+        "2024-01-15T09:00:00",
+    ]
+
+
+def test_utc_until_is_converted_to_the_time_zone():
+    (rule,) = parse_ics(
+        ics("""
+            UID:until-utc
+            DTSTART;TZID=Europe/Berlin:20240101T090000
+            DTEND;TZID=Europe/Berlin:20240101T100000
+            RRULE:FREQ=WEEKLY;UNTIL=20240115T080000Z
+            """),
+        tz=ZoneInfo("Europe/Berlin"),
+    )
+
+    # 08:00 UTC is the start of the last occurrence at 09:00 in Berlin
+    assert starts(rule, "2024-01-01", "2024-03-01")[-1] == "2024-01-15T09:00:00"
+
+
+def test_date_until_includes_its_day():
+    (rule,) = parse_ics(ics("""
+            UID:until-date
+            DTSTART:20240101T090000
+            DTEND:20240101T100000
+            RRULE:FREQ=WEEKLY;UNTIL=20240115
+            """))
+
+    assert starts(rule, "2024-01-01", "2024-03-01")[-1] == "2024-01-15T09:00:00"
+
+
+def test_overrides_transparent_and_cancelled_events():
+    rules = parse_ics(
+        ics(
+            """
+            UID:weekly
+            DTSTART:20240101T090000
+            DTEND:20240101T100000
+            RRULE:FREQ=WEEKLY
+            """,
+            """
+            UID:weekly
+            RECURRENCE-ID:20240108T090000
+            DTSTART:20240108T140000
+            DTEND:20240108T150000
+            """,
+            """
+            UID:free
+            DTSTART:20240102T090000
+            DTEND:20240102T100000
+            TRANSP:TRANSPARENT
+            """,
+            """
+            UID:cancelled
+            DTSTART:20240103T090000
+            DTEND:20240103T100000
+            STATUS:CANCELLED
+            """,
+        )
+    )
+
+    assert len(rules) == 2
+    weekly, moved = rules
+    assert starts(weekly, "2024-01-01", "2024-01-16") == [
+        "2024-01-01T09:00:00",
+        "2024-01-15T09:00:00",
+    ]
+    assert starts(moved, "2024-01-01", "2024-01-16") == ["2024-01-08T14:00:00"]
+
+
+def test_table_rules_compile_to_timeslots():
+    rules = parse_table(
+        [
+            {"start": "09:00", "end": "09:30", "day": "Tue"},
+            {"start": 600, "end": "10:15"},
+        ]
+    )
+    calendar = TimeslotCalendar(
+        [
+            f"{day} {hour}:{minute}"
+            for day in ("Mon", "Tue")
+            for hour in ("09", "10")
+            for minute in ("00", "15", "30", "45")
+        ]
+    )
+
+    mask = compile_mask(rules, calendar, [date(2024, 1, 1), date(2024, 1, 2)])
+
+    # 10:00 on both days, 09:00 and 09:15 on Tuesday
+    assert busy_offsets(mask) == (4, 8, 9, 12)
+
+
+def test_malformed_files_are_skipped(tmp_path):
+    (tmp_path / "alice.yaml").write_text("- start: '09:00'\n  end: '09:30'\n")
+    (tmp_path / "bob.yaml").write_text("- start: '09:00\n  end: [\n")
+    (tmp_path / "carol.yaml").write_text("- start: '09:00'\n  end: '09:30'\n- 10\n")
+    (tmp_path / "dave.yaml").write_text("busy: 10\n")
+    calendar = TimeslotCalendar(["09:00", "09:15", "09:30"])
+
+    busy = load_availability(str(tmp_path), calendar, [date(2024, 1, 1)])
+
+    assert busy == {"alice": (0, 1)}
+
+
+def test_row_that_is_not_a_mapping_is_refused():
+    with pytest.raises(ValueError):
+        parse_table([{"start": "09:00", "end": "09:30"}, ["09:00", "09:30"]])
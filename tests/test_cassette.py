@@ -0,0 +1,90 @@
+import gzip
+import json
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from scheduling.adapters.cassette import (
+    REDACTED,
+    CassetteMissError,
+    CassetteSession,
+)
+
+MUTATION = (
+    "mutation { m0: updateProjectV2ItemFieldValue (input: {}) { clientMutationId } }"
+)
+
+
+class FakeSession:
+    headers = CaseInsensitiveDict()
+
+    def post(self, url, json=None, timeout=None, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(
+            {
+                "Content-Type": "application/json",
+                "Set-Cookie": "session=secret",
+                "X-OAuth-Scopes": "project",
+            }
+        )
+        response._content = b'{"data": {"viewer": {"login": "alice", "id": 1}}}'
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def record(path, **kwargs) -> dict:
+    cassette = CassetteSession(path, "record", session=FakeSession(), **kwargs)
+    cassette.post("https://api.github.com/graphql", json={"query": "{ viewer }"})
+    cassette.save()
+
+    with gzip.open(path, "rt") as f:
+        (exchange,) = json.load(f).values()
+
+    return exchange["responses"][0]
+
+
+def test_sensitive_headers_and_fields_are_scrubbed(tmp_path):
+    exchange = record(str(tmp_path / "fixture.json.gz"), scrub_fields=("login",))
+
+    assert exchange["headers"] == {"Content-Type": "application/json"}
+    assert json.loads(exchange["body"]) == {
+        "data": {"viewer": {"login": REDACTED, "id": 1}}
+    }
+
+
+def test_custom_scrubber(tmp_path):
+    def scrubber(exchange):
+        exchange["body"] = exchange["body"].replace("alice", "someone")
+        return exchange
+
+    exchange = record(str(tmp_path / "fixture.json.gz"), scrubber=scrubber)
+
+    assert "someone" in exchange["body"]
+
+
+def test_replay_answers_recorded_requests(tmp_path):
+    path = str(tmp_path / "fixture.json.gz")
+    record(path)
+
+    response = CassetteSession(path).post("url", json={"query": "{  viewer }"})
+
+    assert response.json()["data"]["viewer"]["id"] == 1
+
+
+def test_unrecorded_mutations_fail_unless_allowed(tmp_path):
+    path = str(tmp_path / "fixture.json.gz")
+    record(path)
+
+    with pytest.raises(CassetteMissError, match="No recorded interaction for key"):
+        CassetteSession(path).post("url", json={"query": MUTATION})
+
+    cassette = CassetteSession(path, allow_unrecorded_mutations=True)
+    response = cassette.post("url", json={"query": MUTATION})
+
+    assert response.json() == {"data": {"m0": {"clientMutationId": None}}}
+
+    with pytest.raises(CassetteMissError):
+        cassette.post("url", json={"query": "{ other }"})
@@ -0,0 +1,51 @@
+from scheduling.engine import Club, Problem, Saturation
+from scheduling.engine.conflicts import ConflictGraph
+from tests.conftest import assert_valid
+
+
+def test_clubs_sharing_an_attendee_conflict():
+    clubs = (
+        Club("a", "A", 15, ("alice",)),
+        Club("b", "B", 15, ("alice", "bob")),
+        Club("c", "C", 15, ("bob",)),
+        Club("d", "D", 15, ("dave",)),
+    )
+
+    graph = ConflictGraph(Problem(clubs=clubs, slots=("09:00",)))
+
+    assert graph.neighbours["b"] == {"a", "c"}
+    assert graph.degree("a") == 1 and graph.degree("d") == 0
+    assert [sorted(component) for component in graph.components()] == [
+        ["a", "b", "c"],
+        ["d"],
+    ]
+
+    # a mandatory attendee joins every club
+    graph = ConflictGraph(Problem(clubs=clubs, slots=("09:00",), mandatory=("erin",)))
+    assert graph.degree("d") == 3
+    assert [sorted(component) for component in graph.components()] == [
+        ["a", "b", "c", "d"]
+    ]
+
+
+def test_saturation_breaks_ties_by_highest_degree():
+    clubs = (
+        Club("loner", "Loner", 15, ("dave",)),
+        Club("hub", "Hub", 15, ("alice", "bob")),
+        Club("left", "Left", 15, ("alice",)),
+        Club("right", "Right", 15, ("bob",)),
+    )
+    problem = Problem(clubs=clubs, slots=("09:00", "09:15", "09:30"))
+
+    schedule = Saturation().solve(problem)
+
+    assert schedule.order[0] == "hub"
+    assert schedule.order[-1] == "loner"
+
+
+def test_components_are_solved_in_parallel(small_problem):
+    sequential = Saturation().solve(small_problem)
+    parallel = Saturation(workers=2).solve(small_problem)
+
+    assert_valid(small_problem, parallel)
+    assert parallel.assignments == sequential.assignments
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+import pytest
+from scheduling.adapters.adapter import GitHubAdapter
+from scheduling.adapters.dispatcher import MutationDispatcher
+from scheduling.adapters.mutations import FieldUpdate, MutationResult
+from scheduling.plan import Plan, apply_plan
+from tests.conftest import FakeTransport, make_item
+
+
+class SlowAdapter:
+    """
+    Adapter stand-in whose requests take a while, recording the order in
+    which the updates of each item arrive and the most requests in flight.
+    """
+
+    project_id = "P"
+
+    def __init__(self, failing_items=()):
+        self.failing_items = set(failing_items)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.arrived = {}
+
+    def dispatcher(self, concurrency: int) -> MutationDispatcher:
+        return MutationDispatcher(self, concurrency)
+
+    def send_updates(self, updates: list) -> list:
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+            for update in updates:
+                self.arrived.setdefault(update.item_id, []).append(update.option_name)
+
+        time.sleep(0.02)
+
+        with self.lock:
+            self.in_flight -= 1
+
+        if self.failing_items & {update.item_id for update in updates}:
+            raise RuntimeError("rate limited")
+
+        return [
+            MutationResult(update, f"m{i}", True) for i, update in enumerate(updates)
+        ]
+
+
+def update(item: int, option: str) -> FieldUpdate:
+    return FieldUpdate(f"I{item}", "F", "O", f"Status={option}", "Status", option)
+
+
+def test_chunks_keep_item_order_and_bounded_concurrency():
+    adapter = SlowAdapter()
+    chunks = [[update(i, "first"), update(i + 1, "first")] for i in range(0, 12, 2)]
+    chunks += [[update(i, "second")] for i in range(12)]
+
+    with MutationDispatcher(adapter, concurrency=3) as dispatcher:
+        futures = [dispatcher.submit_chunk(chunk) for chunk in chunks]
+        results = asyncio.run(dispatcher.flush())
+
+    assert all(future.done() for future in futures)
+    assert [result.update for result in results] == [u for c in chunks for u in c]
+    assert 1 < adapter.most_in_flight <= 3
+    assert all(options == ["first", "second"] for options in adapter.arrived.values())
+
+
+def test_apply_stops_after_a_failed_request():
+    adapter = SlowAdapter(failing_items={"I1"})
+    plan = Plan(project_id="P", updates=[update(i, "x") for i in range(5)])
+
+    with pytest.raises(RuntimeError):
+        apply_plan(adapter, plan, chunk_size=1, concurrency=1)
+
+    # the chunks after the failed one were never sent
+    assert sorted(adapter.arrived) == ["I0", "I1"]
+
+
+def test_adapter_sends_plan_in_concurrent_documents():
+    transport = FakeTransport([make_item(i) for i in range(1, 8)])
+    adapter = GitHubAdapter(transport=transport, lazy=True)
+    updates = adapter.plan_changes(
+        {f"I{i}": {"Status": "Scheduled"} for i in range(1, 8)}
+    )
+
+    results = apply_plan(
+        adapter, Plan(adapter.project_id, updates), chunk_size=3, concurrency=2
+    )
+
+    assert [result.update.item_id for result in results] == [
+        f"I{i}" for i in range(1, 8)
+    ]
+    assert all(result.ok for result in results)
+    assert len(transport.mutations) == 3
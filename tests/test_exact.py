@@ -0,0 +1,39 @@
+import sys
+from itertools import count
+from scheduling.engine import BranchAndBound, Club, Problem
+from tests.conftest import assert_valid
+
+
+def deep_problem() -> Problem:
+    """
+    A chain of more clubs than the recursion limit, each sharing a person
+    with the next one.
+    """
+
+    n_clubs = sys.getrecursionlimit() + 100
+    clubs = tuple(
+        Club(f"c{i}", f"Club {i}", 15, (f"p{i}", f"p{i + 1}")) for i in range(n_clubs)
+    )
+
+    return Problem(clubs=clubs, slots=("09:00", "09:15"))
+
+
+def test_more_clubs_than_the_recursion_limit():
+    problem = deep_problem()
+
+    schedule = BranchAndBound(time_limit=5).solve(problem)
+
+    assert_valid(problem, schedule)
+    assert len(schedule.assignments) == len(problem.clubs)
+    assert schedule.optimal
+
+
+def test_out_of_time_returns_the_incumbent():
+    problem = deep_problem()
+    ticks = count()
+    strategy = BranchAndBound(time_limit=0, clock=lambda: next(ticks))
+
+    schedule = strategy.solve(problem)
+
+    assert_valid(problem, schedule)
+    assert not schedule.optimal
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from scheduling.engine import AvailabilityMatrix, IntervalAvailability
+from scheduling.engine.timeslots import TimeslotCalendar
+
+PERSONS = ["alice", "bob", "carol", "dave"]
+
+
+def assert_same_windows(sparse, dense, length: int, allowed: np.ndarray = None):
+    for size in (1, 2, 3):
+        for persons in (PERSONS[:size], PERSONS[-size:]):
+            windows = sparse.find_windows(persons, length)
+            expected = dense.find_windows(persons, length, allowed)
+            np.testing.assert_array_equal(windows, expected)
+
+            earliest = expected[0] if expected.size else None
+            assert sparse.earliest_window(persons, length) == earliest
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_the_availability_matrix(seed):
+    rng = np.random.default_rng(seed)
+    num_slots = 60
+    sparse = IntervalAvailability(PERSONS, num_slots)
+    dense = AvailabilityMatrix(PERSONS, num_slots)
+
+    for pid in PERSONS:
+        busy = rng.random(num_slots) < 0.3
+        sparse.block(pid, busy)
+        dense.block(pid, busy)
+
+    reserved = []
+    for _ in range(40):
+        persons = list(rng.choice(PERSONS, size=rng.integers(1, 4), replace=False))
+        length = int(rng.integers(1, 6))
+
+        if reserved and rng.random() < 0.4:
+            persons, start, length = reserved.pop(int(rng.integers(len(reserved))))
+            sparse.release(persons, start, length)
+            dense.release(persons, start, length)
+        else:
+            start = int(rng.integers(num_slots - length + 1))
+            sparse.reserve(persons, start, length)
+            dense.reserve(persons, start, length)
+            reserved.append((persons, start, length))
+
+        assert sparse.is_free(persons, start, length) == dense.is_free(
+            persons, start, length
+        )
+        assert_same_windows(sparse, dense, length)
+
+        allowed = rng.random(num_slots) < 0.5
+        np.testing.assert_array_equal(
+            sparse.find_windows(persons, length, allowed),
+            dense.find_windows(persons, length, allowed),
+        )
+
+
+def test_windows_stay_within_the_days_of_a_long_horizon():
+    # three days from 09:00 to 17:00 in half hours, split at lunch
+    labels = [
+        f"{day} {hour:02d}:{minute:02d}"
+        for day in ("Mon", "Tue", "Wed")
+        for hour in range(9, 17)
+        for minute in (0, 30)
+    ]
+    calendar = TimeslotCalendar(labels, boundaries=["12:00"])
+    num_slots = len(calendar)
+    sparse = IntervalAvailability(PERSONS, num_slots, calendar.segments)
+    dense = AvailabilityMatrix(PERSONS, num_slots)
+
+    # busy from Mon 16:00 until Tue 10:00, and on Wednesday morning
+    for availability in (sparse, dense):
+        availability.block("alice", slice(14, 18))
+        availability.block("bob", slice(32, 38))
+
+    for length in (1, 2, 4, 6, 7):
+        assert_same_windows(sparse, dense, length, calendar.allowed_starts(length))
+
+    # releasing a reservation across the night leaves the days apart
+    for availability in (sparse, dense):
+        availability.reserve(["carol"], 10, 12)
+        availability.release(["carol"], 10, 12)
+
+    assert sparse.intervals[sparse.index["carol"]] == calendar.segments
+    for length in (2, 6):
+        assert_same_windows(sparse, dense, length, calendar.allowed_starts(length))
+    assert calendar.label(sparse.earliest_window(["alice", "bob"], 6)) == "Mon 09:00"
+    # mornings are six half hours long
+    starts = [calendar.label(start) for start in sparse.find_windows(["alice"], 7)]
+    assert starts and all(label.split()[1] >= "12:00" for label in starts)
@@ -0,0 +1,100 @@
+import pytest
+from scheduling.adapters.adapter import GitHubAdapter, UnknownFieldOptionError
+from scheduling.adapters.mutations import (
+    FieldUpdate,
+    build_mutation_document,
+    chunked,
+    parse_mutation_response,
+)
+from scheduling.adapters.transport import GitHubAPIError
+from tests.conftest import FakeTransport, make_item
+
+
+def updates(n: int) -> list:
+    return [FieldUpdate(f"I{i}", "F", f"O{i}", f"Status=O{i}") for i in range(n)]
+
+
+def test_document_has_one_alias_per_update():
+    document, aliases = build_mutation_document("P", updates(3))
+
+    assert document.startswith("mutation {")
+    assert list(aliases) == ["m0", "m1", "m2"]
+    assert document.count("updateProjectV2ItemFieldValue") == 3
+    assert '"I2"' in document and '"O2"' in document and '"P"' in document
+
+
+def test_ids_are_escaped():
+    update = FieldUpdate('I"1', "F", "O")
+
+    document, _ = build_mutation_document("P", [update])
+
+    assert r'"I\"1"' in document
+
+
+def test_response_maps_errors_to_aliases():
+    _, aliases = build_mutation_document("P", updates(3))
+    response = {
+        "data": {"m0": {"clientMutationId": None}, "m1": None, "m2": None},
+        "errors": [
+            {"message": "Could not resolve to a node", "path": ["m1"]},
+            {"message": "Something went wrong"},
+        ],
+    }
+
+    results = parse_mutation_response(response, aliases)
+
+    assert [result.ok for result in results] == [True, False, False]
+    assert results[1].error == "Could not resolve to a node"
+    assert results[2].error == "Something went wrong"
+    assert results[0].update is aliases["m0"]
+
+
+def test_chunks():
+    assert [len(chunk) for chunk in chunked(updates(7), 3)] == [3, 3, 1]
+
+    with pytest.raises(ValueError):
+        list(chunked(updates(1), 0))
+
+
+class RejectingTransport(FakeTransport):
+    """
+    Fails every mutation with a GraphQL error.
+    """
+
+    def execute(self, query: str, variables: dict = None) -> dict:
+        self.mutations.append(query)
+
+        return {"errors": [{"path": ["m0"], "message": "Resource not accessible"}]}
+
+
+def test_mutate_column_sends_one_document():
+    transport = FakeTransport([make_item(1)])
+    adapter = GitHubAdapter(transport=transport, lazy=True)
+
+    adapter.mutate_column("I1", "Scheduled")
+
+    (document,) = transport.mutations
+    assert '"I1"' in document and '"S_done"' in document
+
+
+def test_mutate_column_raises_on_errors():
+    adapter = GitHubAdapter(transport=RejectingTransport([make_item(1)]), lazy=True)
+
+    with pytest.raises(GitHubAPIError, match="Resource not accessible"):
+        adapter.mutate_column("I1", "Scheduled")
+
+    with pytest.raises(UnknownFieldOptionError):
+        adapter.mutate_column("I1", "Nowhere")
+
+
+def test_plan_ignores_the_case_of_option_names():
+    items = [make_item(1, status="Scheduled"), make_item(2)]
+    adapter = GitHubAdapter(transport=FakeTransport(items), lazy=True)
+
+    updates = adapter.plan_changes(
+        {"I1": {"Status": "scheduled"}, "I2": {"Status": "to be scheduled"}}
+    )
+    assert updates == []
+
+    (update,) = adapter.plan_changes({"I2": {"Status": "scheduled"}})
+    assert (update.item_id, update.option_id) == ("I2", "S_done")
@@ -0,0 +1,46 @@
+import random
+from dataclasses import replace
+import pytest
+from scheduling.engine import MultiStart, RandomGreedy
+from tests.conftest import assert_valid
+
+
+def test_seeded_starts_are_reproducible(small_problem):
+    first = MultiStart(starts=16, workers=1, seed=7).solve(small_problem)
+    second = MultiStart(starts=16, workers=1, seed=7).solve(small_problem)
+
+    assert_valid(small_problem, first)
+    assert first.seed == second.seed
+    assert first.assignments == second.assignments
+    assert first.strategy == "multi-start"
+    # the winner is solved again from its seed
+    assert RandomGreedy(first.seed).solve(small_problem).assignments == (
+        first.assignments
+    )
+
+
+def test_process_pool_picks_the_same_seed(small_problem):
+    sequential = MultiStart(starts=16, workers=1, seed=7).solve(small_problem)
+    parallel = MultiStart(starts=16, workers=2, seed=7).solve(small_problem)
+
+    assert parallel.seed == sequential.seed
+    assert parallel.assignments == sequential.assignments
+
+
+def test_best_start_is_kept(small_problem):
+    # drop the last hour, so that the starts differ in what they place
+    problem = replace(small_problem, slots=small_problem.slots[:12])
+    rng = random.Random(7)
+    scores = [
+        RandomGreedy(rng.randrange(2**32)).solve(problem).score(problem)
+        for _ in range(16)
+    ]
+
+    schedule = MultiStart(starts=16, workers=1, seed=7).solve(problem)
+
+    assert schedule.score(problem) == max(scores)
+
+
+def test_at_least_one_start():
+    with pytest.raises(ValueError):
+        MultiStart(starts=0)
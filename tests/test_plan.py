@@ -0,0 +1,123 @@
+import pytest
+from scheduling.adapters.dispatcher import MutationDispatcher
+from scheduling.adapters.mutations import FieldUpdate, MutationResult
+from scheduling.plan import ApplyJournal, Plan, apply_plan, keep_plan, read_plan
+
+
+class FakeAdapter:
+    """
+    Adapter stand-in that fails every update of `failing` items and raises
+    once `crash_after` updates have been sent.
+    """
+
+    project_id = "P"
+
+    def __init__(self, failing=(), crash_after: int = None):
+        self.failing = set(failing)
+        self.crash_after = crash_after
+        self.sent = []
+
+    def dispatcher(self, concurrency: int) -> MutationDispatcher:
+        return MutationDispatcher(self, concurrency)
+
+    def send_updates(self, updates: list) -> list:
+        if self.crash_after is not None and len(self.sent) >= self.crash_after:
+            raise RuntimeError("rate limited")
+
+        self.sent.extend(updates)
+
+        return [
+            MutationResult(update, f"m{i}", update.item_id not in self.failing)
+            for i, update in enumerate(updates)
+        ]
+
+
+def make_plan(n: int = 10) -> Plan:
+    return Plan(
+        project_id="P",
+        updates=[
+            FieldUpdate(f"I{i}", "F", "O", "Status=Scheduled", "Status", "Scheduled")
+            for i in range(n)
+        ],
+        persons={"alice": ["Club 1 09:00 - 10:00"]},
+    )
+
+
+def test_plan_round_trip(tmp_path):
+    path = str(tmp_path / "plan.json")
+    plan = make_plan()
+    plan.save(path)
+
+    loaded = read_plan(path)
+
+    assert loaded == plan
+    assert loaded.digest() == plan.digest()
+
+
+def test_plan_of_another_version_is_refused(tmp_path):
+    path = tmp_path / "plan.json"
+    path.write_text('{"version": 0, "project_id": "P"}')
+
+    with pytest.raises(ValueError):
+        read_plan(str(path))
+
+
+def test_apply_resumes_from_journal(tmp_path):
+    plan = make_plan(10)
+    journal = ApplyJournal(str(tmp_path / "plan.json.journal"))
+
+    with pytest.raises(RuntimeError):
+        apply_plan(
+            FakeAdapter(crash_after=4), plan, journal, chunk_size=4, concurrency=1
+        )
+
+    assert journal.succeeded(plan) == {0, 1, 2, 3}
+
+    adapter = FakeAdapter(failing={"I7"})
+    results = apply_plan(adapter, plan, journal, chunk_size=4)
+
+    assert sorted(update.item_id for update in adapter.sent) == [
+        f"I{i}" for i in range(4, 10)
+    ]
+    assert [result.ok for result in results].count(False) == 1
+
+    # only the failed update is sent again
+    adapter = FakeAdapter()
+    apply_plan(adapter, plan, journal, chunk_size=4)
+    assert [update.item_id for update in adapter.sent] == ["I7"]
+
+    assert apply_plan(FakeAdapter(), plan, journal) == []
+
+
+def test_journal_ignores_other_plans_and_torn_lines(tmp_path):
+    plan = make_plan(3)
+    journal = ApplyJournal(str(tmp_path / "journal"))
+    apply_plan(FakeAdapter(), plan, journal)
+
+    with open(journal.path, "a") as f:
+        f.write('{"plan": "cut sho')
+
+    assert journal.succeeded(plan) == {0, 1, 2}
+    assert journal.succeeded(make_plan(4)) == set()
+
+
+def test_plan_of_another_project_is_refused():
+    plan = make_plan()
+    plan.project_id = "other"
+
+    with pytest.raises(ValueError):
+        apply_plan(FakeAdapter(), plan)
+
+
+def test_kept_plan_starts_a_fresh_journal(tmp_path, monkeypatch):
+    monkeypatch.setenv("BIOCYPHER_GITHUB_CACHE_DIR", str(tmp_path))
+    old = make_plan(3)
+    journal = ApplyJournal(keep_plan(old, "run") + ".journal")
+    apply_plan(FakeAdapter(), old, journal)
+
+    plan = make_plan(4)
+    path = keep_plan(plan, "run")
+
+    assert path == str(tmp_path / "plans" / "run.json")
+    assert read_plan(path) == plan
+    assert ApplyJournal(path + ".journal").succeeded(old) == set()
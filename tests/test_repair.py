@@ -0,0 +1,86 @@
+from dataclasses import replace
+from scheduling.engine import (
+    Club,
+    Delta,
+    Problem,
+    RandomGreedy,
+    ScheduleRepair,
+    repair,
+)
+from tests.conftest import assert_valid
+
+
+def two_groups() -> Problem:
+    """
+    Two groups of clubs without a common attendee, in a morning of
+    15-minute timeslots.
+    """
+
+    clubs = (
+        Club("a1", "A 1", 60, ("alice", "bob")),
+        Club("a2", "A 2", 60, ("bob",)),
+        Club("a3", "A 3", 30, ("alice",)),
+        Club("b1", "B 1", 60, ("carol", "dave")),
+        Club("b2", "B 2", 45, ("dave",)),
+    )
+    slots = tuple(f"{9 + m // 60:02d}:{m % 60:02d}" for m in range(0, 3 * 60, 15))
+
+    return Problem(clubs=clubs, slots=slots)
+
+
+def test_only_affected_assignments_change():
+    problem = two_groups()
+    schedule = RandomGreedy(seed=1).solve(problem)
+    committed = dict(schedule.assignments)
+    longer = replace(problem.clubs[0], duration=120)
+
+    changes, repairer = repair(problem, schedule, Delta(changed=(longer,)))
+
+    assert "a1" in changes
+    assert set(changes) <= {"a1", "a2", "a3"}
+    for club_id in ("b1", "b2"):
+        assert schedule.assignments[club_id] is committed[club_id]
+    assert_valid(repairer.problem, repairer.schedule)
+
+
+def test_removed_club_frees_its_time():
+    problem = two_groups()
+    schedule = RandomGreedy(seed=1).solve(problem)
+    blocker = Club("b3", "B 3", 180, ("carol",))
+
+    changes, repairer = repair(problem, schedule, Delta(changed=(blocker,)))
+
+    # the whole morning is taken by b1
+    assert changes == {}
+    assert repairer.schedule.unscheduled == ["b3"]
+    assert repairer.schedule.order[-1] == "b3"
+
+    changes, repairer = repair(
+        problem, schedule, Delta(removed=("b1",)), repairer=repairer
+    )
+
+    assert set(changes) == {"b1", "b3"}
+    assert changes["b1"] is None
+    assert changes["b3"].start == 0
+    assert "b1" not in repairer.schedule.order
+    assert repairer.schedule.unscheduled == []
+    assert [club.id for club in repairer.problem.clubs] == [
+        "a1",
+        "a2",
+        "a3",
+        "b2",
+        "b3",
+    ]
+    assert_valid(repairer.problem, repairer.schedule)
+
+
+def test_repairer_is_reused():
+    problem = two_groups()
+    schedule = RandomGreedy(seed=1).solve(problem)
+    repairer = ScheduleRepair(problem, schedule)
+
+    _, same = repair(problem, schedule, Delta(removed=("a3",)), repairer=repairer)
+    _, other = repair(problem, RandomGreedy(seed=1).solve(problem), Delta())
+
+    assert same is repairer
+    assert other is not repairer
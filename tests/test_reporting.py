@@ -0,0 +1,73 @@
+import argparse
+import io
+import json
+import pandas as pd
+from scheduling import reporting
+from scheduling.reporting import DEBUG, PROGRESS, QUIET, SUMMARY, Reporter
+
+
+def fail():
+    raise AssertionError("disabled output was built")
+
+
+def test_output_above_the_level_is_dropped():
+    stream = io.StringIO()
+    reporter = Reporter(SUMMARY, stream)
+
+    reporter.event("club_scheduled", club="I1")
+    reporter.message("shown")
+    reporter.message("hidden", level=PROGRESS)
+    reporter.table("Schedule", pd.DataFrame({"club": ["I1"]}))
+    reporter.table("Dump", pd.DataFrame({"club": ["I1"]}), level=DEBUG)
+
+    assert stream.getvalue() == "shown\nSchedule\nclub\n  I1\n"
+    assert reporter.enabled(SUMMARY) and not reporter.enabled(PROGRESS)
+
+
+def test_disabled_callables_are_not_called():
+    stream = io.StringIO()
+    reporter = Reporter(QUIET, stream)
+
+    reporter.message(fail)
+    reporter.table("Dump", fail)
+
+    assert stream.getvalue() == ""
+
+    reporter = Reporter(DEBUG, stream)
+    reporter.message(lambda: "built")
+    reporter.table("Dump", lambda: pd.DataFrame({"n": [1]}))
+
+    assert stream.getvalue() == "built\nDump\n n\n 1\n"
+
+
+def test_events_have_their_own_level_and_stream():
+    stream, events = io.StringIO(), io.StringIO()
+    reporter = Reporter(QUIET, stream, events=events, events_level=PROGRESS)
+
+    reporter.event("club_scheduled", club="I1")
+    reporter.event("table_dumped", level=DEBUG)
+
+    (line,) = events.getvalue().splitlines()
+    record = json.loads(line)
+    assert record["event"] == "club_scheduled" and record["club"] == "I1"
+    assert "time" in record
+    assert stream.getvalue() == ""
+
+
+def test_levels_from_arguments(tmp_path):
+    parser = argparse.ArgumentParser()
+    reporting.add_arguments(parser)
+
+    assert reporting.from_arguments(parser.parse_args([])).level == SUMMARY
+    assert reporting.from_arguments(parser.parse_args(["-q"])).level == QUIET
+    assert reporting.from_arguments(parser.parse_args(["-vvv"])).level == DEBUG
+
+    path = tmp_path / "events.jsonl"
+    reporter = reporting.from_arguments(
+        parser.parse_args(["-q", "--events", str(path)])
+    )
+    reporter.event("club_scheduled")
+    reporter.close()
+
+    assert reporter.level == QUIET and reporter.events_level == PROGRESS
+    assert json.loads(path.read_text())["event"] == "club_scheduled"
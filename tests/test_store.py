@@ -0,0 +1,43 @@
+from scheduling.adapters.store import GraphStore
+
+
+def test_duplicate_nodes_are_merged():
+    store = GraphStore()
+
+    assert store.add_node("I1", "club", {"name": "Club 1"})
+    assert not store.add_node("I1", "club", {"status": "Scheduled"})
+    assert store.add_node("I1", "person")
+
+    assert store.node_count() == 2
+    assert store.get_node("I1", "club") == (
+        "I1",
+        "club",
+        {"name": "Club 1", "status": "Scheduled"},
+    )
+    assert store.get_node("I2", "club") is None
+    assert store.has_node("I1", "person") and not store.has_node("I2", "person")
+    assert [node[0] for node in store.nodes("person")] == ["I1"]
+
+
+def test_duplicate_edges_are_merged_and_indexed_by_endpoint():
+    store = GraphStore()
+
+    assert store.add_edge("e1", "alice", "I1", "attends", {"role": "host"})
+    assert store.add_edge("e2", "bob", "I1", "attends")
+    assert store.add_edge("e3", "alice", "I2", "attends")
+    assert not store.add_edge(None, "alice", "I1", "attends", {"mandatory": True})
+
+    assert store.edge_count() == 3
+    assert list(store.edges_from("alice")) == [
+        ("e1", "alice", "I1", "attends", {"role": "host", "mandatory": True}),
+        ("e3", "alice", "I2", "attends", {}),
+    ]
+    assert [edge[0] for edge in store.edges_to("I1")] == ["e1", "e2"]
+    assert list(store.edges_to("nobody")) == []
+
+    # a later duplicate with an ID replaces the stored one
+    store.add_edge("e4", "bob", "I1", "attends")
+    assert [edge[0] for edge in store.edges("attends")] == ["e1", "e4", "e3"]
+
+    store.clear_edges()
+    assert store.edge_count() == 0 and list(store.edges_from("alice")) == []
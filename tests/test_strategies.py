@@ -0,0 +1,48 @@
+from dataclasses import replace
+import pytest
+from scheduling.engine import (
+    BranchAndBound,
+    MultiStart,
+    RandomGreedy,
+    Saturation,
+    solve,
+)
+from tests.conftest import assert_valid
+
+STRATEGIES = [
+    RandomGreedy(seed=1),
+    BranchAndBound(time_limit=5),
+    MultiStart(starts=8, workers=1, seed=1),
+    Saturation(),
+]
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=lambda s: s.name)
+def test_strategies_place_every_club_of_a_loose_problem(small_problem, strategy):
+    schedule = solve(small_problem, strategy)
+
+    assert_valid(small_problem, schedule)
+    assert schedule.unscheduled == []
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES, ids=lambda s: s.name)
+def test_strategies_agree_with_the_exact_search(small_problem, strategy):
+    # two hours only, so that not every club fits
+    problem = replace(small_problem, slots=small_problem.slots[:8], boundaries=())
+
+    exact = solve(problem, BranchAndBound(time_limit=5))
+    schedule = solve(problem, strategy)
+
+    assert_valid(problem, schedule)
+    assert exact.optimal
+    assert schedule.score(problem) <= exact.score(problem)
+    # carry-over clubs are placed whenever they fit
+    assert "c3" in schedule.assignments
+
+
+def test_seeded_greedy_is_reproducible(small_problem):
+    first = solve(small_problem, RandomGreedy(seed=42))
+    second = solve(small_problem, RandomGreedy(seed=42))
+
+    assert first.assignments == second.assignments
+    assert first.seed == 42
@@ -0,0 +1,65 @@
+import os
+import biocypher
+import pytest
+from scheduling.tables import cached_biocypher
+
+
+class FakeBioCypher:
+    """
+    Stand-in for `BioCypher` that counts how often its ontology is built.
+    """
+
+    builds = 0
+
+    def __init__(self):
+        self._ontology = None
+
+    def _get_ontology(self):
+        if not self._ontology:
+            FakeBioCypher.builds += 1
+            self._ontology = {"head": "ontology"}
+
+        return self._ontology
+
+
+class PrivateBioCypher:
+    """
+    A `BioCypher` version without the private ontology attributes.
+    """
+
+
+@pytest.fixture
+def fake_biocypher(monkeypatch):
+    FakeBioCypher.builds = 0
+    monkeypatch.setattr(biocypher, "BioCypher", FakeBioCypher)
+
+
+def test_ontology_is_built_once(tmp_path, fake_biocypher):
+    first = cached_biocypher(str(tmp_path))
+    second = cached_biocypher(str(tmp_path))
+
+    assert first._get_ontology() == second._get_ontology() == {"head": "ontology"}
+    assert FakeBioCypher.builds == 1
+
+
+def test_unreadable_cache_is_rebuilt(tmp_path, fake_biocypher):
+    cached_biocypher(str(tmp_path))
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(b"not a pickle")
+
+    bc = cached_biocypher(str(tmp_path))
+
+    assert bc._get_ontology() == {"head": "ontology"}
+    assert FakeBioCypher.builds == 2
+    # the rebuilt ontology replaced the broken pickle
+    cached_biocypher(str(tmp_path))
+    assert FakeBioCypher.builds == 2
+
+
+def test_missing_private_attributes_bypass_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(biocypher, "BioCypher", PrivateBioCypher)
+
+    bc = cached_biocypher(str(tmp_path))
+
+    assert isinstance(bc, PrivateBioCypher)
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,128 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from scheduling.adapters.transport import GitHubAPIError, GraphQLTransport
+
+
+class StubServer:
+    """
+    Local HTTP server that answers each POST with the next scripted
+    `(status, headers, body)` response.
+    """
+
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                stub.requests.append(json.loads(self.rfile.read(length)))
+                status, headers, body = stub.responses.pop(0)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/graphql"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(responses):
+        server = StubServer(responses)
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.close()
+
+
+def transport(url: str, sleeps: list, **kwargs) -> GraphQLTransport:
+    return GraphQLTransport(
+        url, {"Authorization": "Bearer x"}, sleep=sleeps.append, **kwargs
+    )
+
+
+def test_retries_transient_errors_with_backoff(stub):
+    server = stub(
+        [
+            (502, {}, "Bad gateway"),
+            (503, {}, "Unavailable"),
+            (200, {}, json.dumps({"data": {"ok": True}})),
+        ]
+    )
+    sleeps = []
+
+    data = transport(server.url, sleeps, backoff_factor=0.5).query("{ ok }")
+
+    assert data == {"ok": True}
+    assert sleeps == [0.5, 1.0]
+    assert len(server.requests) == 3
+    assert server.requests[0] == {"query": "{ ok }"}
+
+
+def test_retry_after_takes_precedence(stub):
+    server = stub(
+        [
+            (429, {"Retry-After": "7"}, ""),
+            (200, {}, json.dumps({"data": {}})),
+        ]
+    )
+    sleeps = []
+
+    transport(server.url, sleeps).execute("{ ok }")
+
+    assert sleeps == [7.0]
+
+
+def test_rate_limited_graphql_error_is_retried(stub):
+    server = stub(
+        [
+            (200, {}, json.dumps({"errors": [{"type": "RATE_LIMITED"}]})),
+            (200, {}, json.dumps({"data": {"ok": 1}})),
+        ]
+    )
+    sleeps = []
+
+    assert transport(server.url, sleeps).query("{ ok }") == {"ok": 1}
+    assert len(sleeps) == 1
+
+
+def test_gives_up_after_max_retries(stub):
+    server = stub([(500, {}, "")] * 3)
+    sleeps = []
+
+    with pytest.raises(GitHubAPIError) as error:
+        transport(server.url, sleeps, max_retries=2).execute("{ ok }")
+
+    assert error.value.status_code == 500
+    assert sleeps == [1.0, 2.0]
+
+
+def test_client_errors_are_not_retried(stub):
+    server = stub([(401, {}, json.dumps({"message": "Bad credentials"}))])
+    sleeps = []
+
+    with pytest.raises(GitHubAPIError) as error:
+        transport(server.url, sleeps).execute("{ ok }")
+
+    assert error.value.status_code == 401
+    assert sleeps == []